@@ -4,13 +4,14 @@ Ce script montre comment utiliser les fonctions de requête LLM directement,
 sans passer par l'interface graphique Taipy.
 """
 
-import requests
 import os
 
+from utils.http_client import http_client
+
 # Configuration de l'API HuggingFace
 API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-xxl"
 # Utiliser la variable d'environnement pour l'API key ou la valeur par défaut
-headers = {"Authorization": f"Bearer {os.environ.get('HUGGINGFACE_API_KEY', '[)}"}
+headers = {"Authorization": f"Bearer {os.environ.get('HUGGINGFACE_API_KEY', '[YOUR ACCESS TOKEN]')}"}
 
 def query_huggingface(prompt):
     """
@@ -26,7 +27,7 @@ def query_huggingface(prompt):
         "inputs": prompt,
     }
     
-    response = requests.post(API_URL, headers=headers, json=payload)
+    response = http_client.post(API_URL, headers=headers, json=payload)
     return response.json()
 
 def query_openai(prompt, api_key=None):
@@ -60,7 +61,7 @@ def query_openai(prompt, api_key=None):
         "max_tokens": 150
     }
     
-    response = requests.post(api_url, headers=headers, json=payload)
+    response = http_client.post(api_url, headers=headers, json=payload)
     return response.json()
 
 def main():
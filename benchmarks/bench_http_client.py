@@ -0,0 +1,161 @@
+"""
+Benchmark du client HTTP partagé face à des appels requests.post isolés.
+Lance un faux fournisseur de LLM local (HTTP ou HTTPS auto-signé) et mesure
+le temps moyen par requête avec et sans réutilisation des connexions.
+
+Usage:
+    python benchmarks/bench_http_client.py [--requests 500] [--tls]
+"""
+import argparse
+import datetime
+import json
+import os
+import ssl
+import sys
+import tempfile
+import threading
+import time
+import warnings
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.http_client import ProviderClient
+
+
+class MockProviderHandler(BaseHTTPRequestHandler):
+    """Simule un endpoint d'inférence : renvoie une réponse JSON fixe en keep-alive."""
+
+    protocol_version = "HTTP/1.1"
+    # Évite les 40 ms d'ACK retardé entre l'envoi des en-têtes et du corps
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        body = json.dumps([{"generated_text": "ok"}]).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_self_signed_cert(directory: str):
+    """
+    Génère un certificat auto-signé pour localhost.
+
+    Args:
+        directory: Le dossier où écrire le certificat et la clé
+
+    Returns:
+        Le couple (chemin du certificat, chemin de la clé)
+    """
+    from cryptography import x509
+    from cryptography.hazmat.primitives import hashes, serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from cryptography.x509.oid import NameOID
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "localhost")])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now)
+        .not_valid_after(now + datetime.timedelta(days=1))
+        .sign(key, hashes.SHA256())
+    )
+    cert_path = os.path.join(directory, "cert.pem")
+    key_path = os.path.join(directory, "key.pem")
+    with open(cert_path, "wb") as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.TraditionalOpenSSL,
+            serialization.NoEncryption(),
+        ))
+    return cert_path, key_path
+
+
+def start_mock_server(tls: bool, tmp_dir: str):
+    """
+    Démarre le faux fournisseur dans un thread.
+
+    Args:
+        tls: Si True, sert en HTTPS avec un certificat auto-signé
+        tmp_dir: Dossier temporaire pour le certificat
+
+    Returns:
+        Le couple (serveur, URL de l'endpoint)
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockProviderHandler)
+    scheme = "http"
+    if tls:
+        cert_path, key_path = make_self_signed_cert(tmp_dir)
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(cert_path, key_path)
+        server.socket = context.wrap_socket(server.socket, server_side=True)
+        scheme = "https"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"{scheme}://127.0.0.1:{server.server_address[1]}/models/mock"
+
+
+def bench(label: str, post, url: str, n: int) -> float:
+    """
+    Mesure le temps moyen d'une requête.
+
+    Args:
+        label: Libellé affiché
+        post: La fonction d'envoi (signature de requests.post)
+        url: L'URL du faux fournisseur
+        n: Nombre de requêtes
+
+    Returns:
+        Le temps moyen par requête en millisecondes
+    """
+    payload = {"inputs": "Hello"}
+    headers = {"Authorization": "Bearer test"}
+    start = time.perf_counter()
+    for _ in range(n):
+        response = post(url, headers=headers, json=payload, verify=False)
+        response.json()
+    elapsed_ms = (time.perf_counter() - start) * 1000 / n
+    print(f"{label:<32} {elapsed_ms:8.3f} ms/requête")
+    return elapsed_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=500, help="Nombre de requêtes par scénario")
+    parser.add_argument("--tls", action="store_true", help="Servir le faux fournisseur en HTTPS")
+    args = parser.parse_args()
+
+    warnings.filterwarnings("ignore", message="Unverified HTTPS request")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        server, url = start_mock_server(args.tls, tmp_dir)
+        print(f"Faux fournisseur sur {url} ({args.requests} requêtes)")
+        try:
+            bare = bench("requests.post (sans pool)", requests.post, url, args.requests)
+            client = ProviderClient()
+            pooled = bench("ProviderClient (keep-alive)", client.post, url, args.requests)
+            client.close()
+        finally:
+            server.shutdown()
+
+    print(f"Gain par requête : {bare - pooled:.3f} ms ({bare / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
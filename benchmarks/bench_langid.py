@@ -0,0 +1,117 @@
+"""
+Benchmark de l'identification de langue du traducteur (source_lang="auto").
+Mesure la latence par texte court sans cache (médiane et 99e centile, en
+microsecondes), puis servie par le cache des empreintes, et l'exactitude sur
+des phrases absentes du corpus d'entraînement des profils.
+
+Usage:
+    python benchmarks/bench_langid.py [--repeat 2000]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcps import text_translator
+from utils.langid import LanguageIdentifier
+
+# Phrases de test (hors corpus), par langue attendue
+SAMPLES = {
+    "en": [
+        "Hello, how are you doing?",
+        "I would like to book a table for two people tonight.",
+        "Where is the nearest pharmacy?",
+        "This product arrived broken and I want a refund.",
+    ],
+    "fr": [
+        "Bonjour, comment ça va ?",
+        "Je voudrais réserver une table pour deux personnes ce soir.",
+        "Où est la pharmacie la plus proche ?",
+        "Ce produit est arrivé cassé et je veux être remboursé.",
+    ],
+    "de": [
+        "Guten Morgen, wie geht es dir?",
+        "Ich möchte heute Abend einen Tisch für zwei Personen reservieren.",
+        "Wo ist die nächste Apotheke?",
+        "Dieses Produkt kam kaputt an und ich möchte mein Geld zurück.",
+    ],
+    "es": [
+        "Hola, ¿qué tal estás?",
+        "Quisiera reservar una mesa para dos personas esta noche.",
+        "¿Dónde está la farmacia más cercana?",
+        "Este producto llegó roto y quiero un reembolso.",
+    ],
+    "it": [
+        "Ciao, come stai?",
+        "Vorrei prenotare un tavolo per due persone stasera.",
+        "Dov'è la farmacia più vicina?",
+        "Questo prodotto è arrivato rotto e voglio un rimborso.",
+    ],
+    "pt": [
+        "Olá, como estás?",
+        "Queria reservar uma mesa para duas pessoas esta noite.",
+        "Onde fica a farmácia mais próxima?",
+        "Este produto chegou partido e quero o reembolso.",
+    ],
+    "nl": [
+        "Hallo, hoe gaat het met je?",
+        "Ik wil graag een tafel voor twee personen reserveren voor vanavond.",
+        "Waar is de dichtstbijzijnde apotheek?",
+        "Dit product kwam kapot aan en ik wil mijn geld terug.",
+    ],
+    "ru": [
+        "Привет, как дела?",
+        "Я хотел бы заказать столик на двоих на сегодня вечером.",
+        "Где ближайшая аптека?",
+        "Этот товар пришёл сломанным, и я хочу вернуть деньги.",
+    ],
+}
+
+
+def latencies(func, texts: list, repeat: int) -> list:
+    """Durées d'exécution de func sur chaque texte, répétées (microsecondes)."""
+    durations = []
+    for _ in range(repeat):
+        for text in texts:
+            start = time.perf_counter()
+            func(text)
+            durations.append((time.perf_counter() - start) * 1e6)
+    return durations
+
+
+def describe(durations: list) -> str:
+    """Médiane et 99e centile d'une série de durées."""
+    durations = sorted(durations)
+    return f"médiane {statistics.median(durations):7.1f} µs   p99 {durations[int(len(durations) * 0.99)]:7.1f} µs"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="Passes sur l'ensemble des phrases")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    uncached = LanguageIdentifier.from_file(text_translator.LANGID_PROFILES, cache_size=0)
+    print(f"chargement des profils ({len(uncached.languages)} langues) : {(time.perf_counter() - start) * 1000:.1f} ms")
+
+    texts = [text for group in SAMPLES.values() for text in group]
+    correct = 0
+    for lang, group in SAMPLES.items():
+        for text in group:
+            detected, probability = uncached.detect(text)
+            correct += detected == lang
+            if detected != lang:
+                print(f"  erreur : {text!r} -> {detected} ({probability:.2f}), attendu {lang}")
+    print(f"exactitude : {correct}/{len(texts)}")
+
+    print(f"sans cache   : {describe(latencies(uncached.detect, texts, args.repeat))}")
+    cached = text_translator.get_language_identifier()
+    print(f"avec cache   : {describe(latencies(cached.detect, texts, args.repeat))}")
+    print(f"cache        : {cached.get_stats()}")
+
+
+if __name__ == "__main__":
+    main()
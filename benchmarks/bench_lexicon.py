@@ -0,0 +1,111 @@
+"""
+Benchmark du moteur de lexiques (utils/lexicon.py) face à la recherche par
+sous-chaînes de l'ancien analyseur de sentiment (`word in text` pour chaque
+terme). Mesure les deux approches sur des documents et des lexiques de
+tailles croissantes, générés de manière reproductible.
+
+Usage:
+    python benchmarks/bench_lexicon.py [--doc-kb 16 256 1024] [--lexicon 14 1000 50000] [--runs 3]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.lexicon import Lexicon
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyzéè"
+
+
+def make_words(count: int, rng: random.Random) -> list:
+    """
+    Génère des mots distincts.
+
+    Args:
+        count: Nombre de mots
+        rng: Le générateur aléatoire
+
+    Returns:
+        Les mots
+    """
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choice(ALPHABET) for _ in range(rng.randint(3, 10))))
+    return sorted(words)
+
+
+def make_document(size: int, vocabulary: list, rng: random.Random) -> str:
+    """
+    Génère un document d'environ `size` caractères à partir d'un vocabulaire.
+
+    Args:
+        size: Taille visée en caractères
+        vocabulary: Les mots utilisés
+        rng: Le générateur aléatoire
+
+    Returns:
+        Le document
+    """
+    parts, length = [], 0
+    while length < size:
+        word = rng.choice(vocabulary)
+        parts.append(word)
+        length += len(word) + 1
+    return " ".join(parts)
+
+
+def substring_score(text: str, positive: list, negative: list) -> tuple:
+    """Ancienne méthode : une recherche de sous-chaîne par terme."""
+    text_lower = text.lower()
+    return (
+        sum(1 for word in positive if word in text_lower),
+        sum(1 for word in negative if word in text_lower),
+    )
+
+
+def best_of(func, runs: int) -> float:
+    """Médiane des durées d'exécution de func (secondes)."""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doc-kb", type=int, nargs="+", default=[16, 256, 1024], help="Tailles des documents (Ko)")
+    parser.add_argument("--lexicon", type=int, nargs="+", default=[14, 1000, 50000], help="Tailles des lexiques (termes)")
+    parser.add_argument("--runs", type=int, default=3, help="Mesures par scénario")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_words(max(args.lexicon) * 2, rng)
+
+    print(f"{'document':>10} {'lexique':>8} {'sous-chaînes':>14} {'construction':>13} {'moteur':>10} {'gain':>8}")
+    for doc_kb in args.doc_kb:
+        document = make_document(doc_kb * 1024, vocabulary, rng)
+        for size in args.lexicon:
+            terms = rng.sample(vocabulary, size)
+            positive, negative = terms[: size // 2], terms[size // 2:]
+            entries = {**{word: 1.0 for word in positive}, **{word: -1.0 for word in negative}}
+
+            start = time.perf_counter()
+            lexicon = Lexicon(entries)
+            build = time.perf_counter() - start
+
+            old = best_of(lambda: substring_score(document, positive, negative), args.runs)
+            new = best_of(lambda: lexicon.score(document), args.runs)
+            print(
+                f"{doc_kb:>8}Ko {size:>8} {old * 1000:>11.1f} ms {build * 1000:>10.1f} ms "
+                f"{new * 1000:>7.1f} ms {old / new:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""
+Benchmark du routeur de fournisseurs de LLM sur des fournisseurs simulés.
+Lance trois faux fournisseurs locaux (API de chat compatible OpenAI) aux
+comportements différents, appelés par les vrais adaptateurs :
+  - "rapide"  : environ 20 ms, mais tombe en panne (503) à mi-parcours
+  - "traine"  : environ 30 ms, et 4 % des réponses à 600 ms (latence de queue)
+  - "stable"  : environ 60 ms
+Compare un fournisseur fixe (comme les applications avant le routeur), le
+routeur sans hedging et le routeur avec hedging : taux de réussite, latences
+(médiane, 95e et 99e centiles), appels par requête et répartition des réponses.
+
+Usage:
+    python benchmarks/bench_llm_router.py [--requests 400] [--concurrency 8]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.llm_router import LLMRouter, NoProviderAvailable, OpenAIProvider
+
+
+class MockChatHandler(BaseHTTPRequestHandler):
+    """Simule l'endpoint /v1/chat/completions d'un fournisseur, selon le comportement du serveur."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        behavior = self.server.behavior
+        time.sleep(behavior["latency"]())
+        if behavior["down"].is_set():
+            status, body = 503, {"error": {"message": "service indisponible"}}
+        else:
+            status, body = 200, {"choices": [{"message": {"role": "assistant", "content": behavior["name"]}}]}
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_provider(name: str, latency) -> tuple:
+    """
+    Démarre un faux fournisseur dans un thread.
+
+    Args:
+        name: Le nom du fournisseur (retourné comme texte généré)
+        latency: La fonction qui tire la durée de chaque réponse (secondes)
+
+    Returns:
+        Le couple (serveur, adaptateur OpenAI pointant vers lui)
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockChatHandler)
+    server.daemon_threads = True
+    server.behavior = {"name": name, "latency": latency, "down": threading.Event()}
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    provider = OpenAIProvider(name, "mock-model", "mock-key", base_url=f"http://127.0.0.1:{server.server_address[1]}/v1")
+    return server, provider
+
+
+def percentile(values: list, quantile: float) -> float:
+    """Centile d'une liste de valeurs."""
+    values = sorted(values)
+    return values[min(int(quantile * len(values)), len(values) - 1)]
+
+
+def run_scenario(label: str, router: LLMRouter, servers: dict, requests_count: int, concurrency: int) -> None:
+    """
+    Envoie les requêtes d'un scénario et affiche ses résultats.
+
+    Args:
+        label: Libellé du scénario
+        router: Le routeur à utiliser
+        servers: Les faux fournisseurs, par nom
+        requests_count: Nombre de requêtes
+        concurrency: Nombre de requêtes simultanées
+    """
+    servers["rapide"].behavior["down"].clear()
+    latencies, winners, failures = [], Counter(), 0
+    lock = threading.Lock()
+
+    def one(index: int) -> None:
+        nonlocal failures
+        # Panne du fournisseur le plus rapide à mi-parcours
+        if index == requests_count // 2:
+            servers["rapide"].behavior["down"].set()
+        start = time.perf_counter()
+        try:
+            result = router.generate("Bonjour", timeout=1.0)
+        except NoProviderAvailable:
+            with lock:
+                failures += 1
+            return
+        with lock:
+            latencies.append((time.perf_counter() - start) * 1000)
+            winners[result["provider"]] += 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(requests_count)))
+
+    stats = router.get_stats()
+    calls = sum(provider["requests"] for provider in stats["providers"].values())
+    success = len(latencies) / requests_count * 100
+    print(f"\n{label}")
+    print(f"  réussite {success:5.1f} %   médiane {percentile(latencies, 0.5):6.1f} ms   p95 {percentile(latencies, 0.95):6.1f} ms"
+          f"   p99 {percentile(latencies, 0.99):6.1f} ms   appels/requête {calls / requests_count:.2f}")
+    print(f"  réponses : {dict(winners)}   compteurs : {stats['router']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="Requêtes par scénario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Requêtes simultanées")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rng_lock = threading.Lock()
+
+    def jitter(mean: float, spread: float, tail: float = 0.0, tail_latency: float = 0.0):
+        def sample() -> float:
+            with rng_lock:
+                if tail and rng.random() < tail:
+                    return tail_latency
+                return max(0.001, rng.gauss(mean, spread))
+        return sample
+
+    servers, providers = {}, {}
+    for name, latency in (
+        ("rapide", jitter(0.020, 0.004)),
+        ("traine", jitter(0.030, 0.005, tail=0.04, tail_latency=0.600)),
+        ("stable", jitter(0.060, 0.008)),
+    ):
+        servers[name], providers[name] = start_mock_provider(name, latency)
+
+    run_scenario("Fournisseur fixe (rapide)", LLMRouter([providers["rapide"]], hedge=False), servers, args.requests, args.concurrency)
+    run_scenario("Routeur sans hedging", LLMRouter(providers.values(), hedge=False), servers, args.requests, args.concurrency)
+    router = LLMRouter(providers.values(), hedge=True)
+    run_scenario("Routeur avec hedging", router, servers, args.requests, args.concurrency)
+    print("\nFournisseurs (dernier scénario) :")
+    for name, stats in router.get_stats()["providers"].items():
+        print(f"  {name:<8} {json.dumps(stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
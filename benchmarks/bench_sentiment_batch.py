@@ -0,0 +1,94 @@
+"""
+Benchmark du traitement par lot de l'analyseur de sentiment.
+Compare le débit (textes par seconde) d'une boucle d'appels à run() et de
+run_batch(), qui calcule les scores du lot avec NumPy, puis des mêmes chemins
+via le registre (execute_mcp en boucle et execute_mcp_batch, cache désactivé),
+sur des textes courts générés de manière reproductible. Vérifie aussi que les
+résultats sont identiques.
+
+Usage:
+    python benchmarks/bench_sentiment_batch.py [--texts 1000 100000] [--words 20] [--runs 3]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Chaque mesure doit calculer les résultats, pas les relire dans le cache
+os.environ["MCP_CACHE_ENABLED"] = "0"
+
+import mcps
+from mcps import sentiment_analyzer
+
+# Mots neutres mêlés aux termes du lexique dans les textes générés
+FILLER = (
+    "the a service was this my and it of to in is for on with order delivery product "
+    "le la les un une de des et est pour avec dans commande livraison produit client"
+).split()
+
+
+def make_texts(count: int, words: int, rng: random.Random) -> list:
+    """
+    Génère des textes courts contenant quelques termes du lexique.
+
+    Args:
+        count: Nombre de textes
+        words: Nombre moyen de mots par texte
+        rng: Le générateur aléatoire
+
+    Returns:
+        Les textes
+    """
+    terms = list(sentiment_analyzer.lexicon.words) + [" ".join(p[0]) for e in sentiment_analyzer.lexicon.phrases.values() for p in e]
+    texts = []
+    for _ in range(count):
+        length = max(1, int(rng.gauss(words, words / 4)))
+        texts.append(" ".join(rng.choice(terms) if rng.random() < 0.15 else rng.choice(FILLER) for _ in range(length)))
+    return texts
+
+
+def median_time(func, runs: int) -> float:
+    """Médiane des durées d'exécution de func (secondes)."""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--texts", type=int, nargs="+", default=[1000, 100000], help="Tailles des lots")
+    parser.add_argument("--words", type=int, default=20, help="Nombre moyen de mots par texte")
+    parser.add_argument("--runs", type=int, default=3, help="Mesures par scénario")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(
+        f"{'textes':>8} {'run() en boucle':>16} {'run_batch()':>16} {'gain':>6}"
+        f" {'execute_mcp':>16} {'execute_mcp_batch':>18} {'gain':>6}"
+    )
+    for count in args.texts:
+        inputs = [{"text": text} for text in make_texts(count, args.words, rng)]
+
+        expected = [sentiment_analyzer.run(item) for item in inputs]
+        if sentiment_analyzer.run_batch(inputs) != expected:
+            raise SystemExit("run_batch() ne retourne pas les mêmes résultats que run()")
+
+        loop = median_time(lambda: [sentiment_analyzer.run(item) for item in inputs], args.runs)
+        batch = median_time(lambda: sentiment_analyzer.run_batch(inputs), args.runs)
+        registry_loop = median_time(lambda: [mcps.execute_mcp("sentiment_analyzer", item) for item in inputs], args.runs)
+        registry_batch = median_time(lambda: mcps.execute_mcp_batch("sentiment_analyzer", inputs), args.runs)
+        print(
+            f"{count:>8} {count / loop:>11,.0f} /s {count / batch:>11,.0f} /s {loop / batch:>5.1f}x"
+            f" {count / registry_loop:>11,.0f} /s {count / registry_batch:>15,.0f} /s {registry_loop / registry_batch:>5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark du temps de démarrage de l'API MCP (import de mcp_app).
+Mesure, dans des processus neufs, le temps d'import avec la dérivation de
+clé paresseuse, puis avec une dérivation forcée au démarrage (l'ancien
+comportement), ainsi que le coût de la dérivation PBKDF2 seule.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 5] [--module mcp_app]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+sys.path.insert(0, ROOT)
+
+from utils.config_manager import KDF_ITERATIONS, KDF_SALT
+
+# Mesure exécutée dans chaque processus neuf ; affiche la durée en secondes
+IMPORT_SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+{eager}
+print(time.perf_counter() - start)
+"""
+
+# Reproduit la dérivation faite au chargement du module avant qu'elle soit paresseuse
+EAGER_SNIPPET = "from utils.config_manager import config_manager; config_manager.encryption_key"
+
+
+def time_import(module: str, eager: bool, runs: int) -> list:
+    """
+    Mesure le temps d'import d'un module dans des processus neufs.
+
+    Args:
+        module: Le module à importer
+        eager: True pour forcer la dérivation de la clé au démarrage
+        runs: Nombre de processus lancés
+
+    Returns:
+        Les durées mesurées (secondes)
+    """
+    code = IMPORT_SNIPPET.format(module=module, eager=EAGER_SNIPPET if eager else "")
+    env = dict(os.environ)
+    # Le cache disque de la clé dérivée fausserait la mesure du démarrage à froid
+    env.pop("CONFIG_KEY_CACHE_FILE", None)
+    durations = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        ).stdout
+        durations.append(float(output.strip().splitlines()[-1]))
+    return durations
+
+
+def time_derivation(runs: int) -> list:
+    """
+    Mesure le coût d'une dérivation PBKDF2 de la clé de chiffrement.
+
+    Args:
+        runs: Nombre de dérivations
+
+    Returns:
+        Les durées mesurées (secondes)
+    """
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        PBKDF2HMAC(algorithm=hashes.SHA256(), length=32, salt=KDF_SALT, iterations=KDF_ITERATIONS).derive(b"fuinjutsu")
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def report(label: str, durations: list) -> float:
+    """Affiche la médiane et le minimum d'une série de mesures."""
+    median = statistics.median(durations)
+    print(f"{label:<32} médiane {median * 1000:8.1f} ms   min {min(durations) * 1000:8.1f} ms")
+    return median
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Nombre de mesures par scénario")
+    parser.add_argument("--module", default="mcp_app", help="Module dont l'import est mesuré")
+    args = parser.parse_args()
+
+    print(f"Import de {args.module} ({args.runs} processus par scénario)")
+    report(f"PBKDF2 ({KDF_ITERATIONS} itérations)", time_derivation(args.runs))
+    lazy = report("import, dérivation paresseuse", time_import(args.module, False, args.runs))
+    eager = report("import, dérivation au démarrage", time_import(args.module, True, args.runs))
+    print(f"Gain au démarrage: {(eager - lazy) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+Benchmark du résumé extractif (utils/textrank.py) sur de longs documents.
+Mesure, pour des documents générés de manière reproductible (1 Mo et plus),
+l'ancien résumé (découpage sur '.' et concaténation des premières phrases),
+le mode "lead" et le mode "textrank", avec le détail du découpage en phrases
+et du classement.
+
+Usage:
+    python benchmarks/bench_summarizer.py [--doc-kb 1024 4096] [--max-length 500] [--runs 3]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.textrank import split_sentences, summarize, textrank_scores
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyzéè"
+
+
+def make_document(size: int, rng: random.Random) -> str:
+    """
+    Génère un document d'environ `size` caractères : des phrases de 8 à 30 mots
+    tirés d'un vocabulaire selon une loi de Zipf, en paragraphes.
+
+    Args:
+        size: Taille visée en caractères
+        rng: Le générateur aléatoire
+
+    Returns:
+        Le document
+    """
+    vocabulary = ["".join(rng.choice(ALPHABET) for _ in range(rng.randint(2, 10))) for _ in range(20000)]
+    weights = [1.0 / rank for rank in range(1, len(vocabulary) + 1)]
+    parts, length = [], 0
+    while length < size:
+        words = rng.choices(vocabulary, weights, k=rng.randint(8, 30))
+        sentence = " ".join(words).capitalize() + rng.choice(".....!?")
+        if rng.random() < 0.1:
+            sentence += "\n\n"
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)
+
+
+def legacy_summary(text: str, max_length: int) -> str:
+    """Ancienne méthode : découpage sur '.' et concaténation des premières phrases."""
+    summary = ""
+    for sentence in text.split('.'):
+        if len(summary) + len(sentence) + 1 <= max_length:
+            summary += sentence + "."
+        else:
+            break
+    return summary
+
+
+def median_time(func, runs: int) -> float:
+    """Médiane des durées d'exécution de func (secondes)."""
+    durations = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return statistics.median(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--doc-kb", type=int, nargs="+", default=[1024, 4096], help="Tailles des documents (Ko)")
+    parser.add_argument("--max-length", type=int, default=500, help="Longueur maximale du résumé")
+    parser.add_argument("--runs", type=int, default=3, help="Mesures par scénario")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    print(f"{'document':>10} {'phrases':>8} {'ancien':>9} {'lead':>9} {'découpage':>10} {'classement':>11} {'textrank':>9}")
+    for doc_kb in args.doc_kb:
+        document = make_document(doc_kb * 1024, rng)
+        sentences = split_sentences(document)
+
+        legacy = median_time(lambda: legacy_summary(document, args.max_length), args.runs)
+        lead = median_time(lambda: summarize(document, args.max_length, "lead"), args.runs)
+        split = median_time(lambda: split_sentences(document), args.runs)
+        ranking = median_time(lambda: textrank_scores(sentences), args.runs)
+        textrank = median_time(lambda: summarize(document, args.max_length, "textrank"), args.runs)
+        print(
+            f"{doc_kb:>8}Ko {len(sentences):>8} {legacy * 1000:>6.0f} ms {lead * 1000:>6.0f} ms "
+            f"{split * 1000:>7.0f} ms {ranking * 1000:>8.0f} ms {textrank * 1000:>6.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark du regroupement des traductions (utils/coalesce.py).
+Simule une API d'inférence (latence fixe, appels simultanés limités comme par
+un quota) et envoie des traductions simultanées, dont une part de doublons,
+avec et sans regroupement. Mesure le nombre d'appels à l'API et la durée totale.
+
+Usage:
+    python benchmarks/bench_translate_batching.py [--requests 1000] [--distinct 300] [--latency 0.2] [--upstream-concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mcps import text_translator
+
+
+class MockResponse:
+    """Réponse minimale du client HTTP asynchrone."""
+
+    def __init__(self, status_code: int, data):
+        self.status_code = status_code
+        self.data = data
+        self.text = str(data)
+
+    def json(self):
+        return self.data
+
+
+class MockInferenceAPI:
+    """Simule l'API d'inférence : une liste de textes en entrée, une traduction par texte."""
+
+    def __init__(self, latency: float, concurrency: int):
+        self.latency = latency
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.calls = 0
+
+    async def post(self, url, headers=None, json=None):
+        self.calls += 1
+        async with self.semaphore:
+            await asyncio.sleep(self.latency)
+        return MockResponse(200, [{"translation_text": f"[fr] {text}"} for text in json["inputs"]])
+
+
+async def run_scenario(texts: list, batched: bool, latency: float, concurrency: int) -> tuple:
+    """
+    Traduit des textes simultanément.
+
+    Args:
+        texts: Les textes
+        batched: Avec regroupement (translate_with_huggingface) ou un appel par texte
+        latency: La latence simulée de l'API
+        concurrency: Le nombre d'appels simultanés acceptés par l'API
+
+    Returns:
+        Le couple (appels à l'API, durée en secondes)
+    """
+    api = MockInferenceAPI(latency, concurrency)
+    text_translator.async_http_client = api
+    text_translator._batchers.clear()
+    url = "https://api-inference.huggingface.co/models/Helsinki-NLP/opus-mt-en-fr"
+
+    async def translate(text: str):
+        if batched:
+            return await text_translator.translate_with_huggingface(text, "en", "fr", "cle")
+        return await text_translator._post_translations(url, "cle", [text])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(translate(text) for text in texts))
+    return api.calls, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=1000, help="Nombre de traductions simultanées")
+    parser.add_argument("--distinct", type=int, default=300, help="Nombre de textes distincts")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latence de l'API simulée (secondes)")
+    parser.add_argument("--upstream-concurrency", type=int, default=8, help="Appels simultanés acceptés par l'API")
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    texts = [f"Phrase numéro {rng.randrange(args.distinct)}" for _ in range(args.requests)]
+
+    print(f"{'mode':>18} {'appels API':>11} {'durée':>9}")
+    for label, batched in (("un appel par texte", False), ("regroupement", True)):
+        calls, duration = asyncio.run(run_scenario(texts, batched, args.latency, args.upstream_concurrency))
+        print(f"{label:>18} {calls:>11} {duration:>7.2f} s")
+
+
+if __name__ == "__main__":
+    main()
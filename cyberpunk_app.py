@@ -1,24 +1,13 @@
-import requests
 import json
 import os
 import webbrowser
-import http.server
-import socketserver
-import threading
 import datetime
+from functools import partial
 from taipy.gui import Gui, State, notify, navigate
 
-# Configuration de l'API HuggingFace
-API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-xxl"
-headers = {"Authorization": f"Bearer {os.environ.get('HUGGINGFACE_API_KEY', '[YOUR ACCESS TOKEN]')}"}
-
-# Configuration de l'API OpenAI (pour l'exemple)
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "your-openai-api-key")
-OPENAI_API_URL = "https://api.openai.com/v1/chat/completions"
-openai_headers = {
-    "Authorization": f"Bearer {OPENAI_API_KEY}",
-    "Content-Type": "application/json"
-}
+from utils.cache import make_cache_key, response_cache
+from utils.llm_router import llm_router
+from utils.static_server import StaticAssetCache, StaticFileHandler, UIServer
 
 # Variables pour stocker les paramètres
 model_settings = {
@@ -36,145 +25,214 @@ model_settings = {
 
 current_model = "FLAN-T5"
 
-def query_huggingface(prompt, temperature=0.7, max_length=150):
+# Fournisseur de chaque modèle dans le routeur : essayé en premier, les autres prennent le relais
+MODEL_PROVIDERS = {
+    "FLAN-T5": "huggingface",
+    "GPT-3.5": "openai"
+}
+
+def llm_cache_key(model, prompt, temperature, max_length):
     """
-    Envoie une requête à l'API HuggingFace et retourne la réponse.
+    Calcule la clé de cache d'une requête LLM déterministe.
     
     Args:
-        - prompt: Le prompt à envoyer à l'API.
+        - model: Le modèle utilisé.
+        - prompt: Le prompt envoyé à l'API.
         - temperature: Paramètre de température pour la génération.
         - max_length: Longueur maximale de la réponse.
         
     Returns:
-        La réponse de l'API.
+        La clé de cache, ou None si la requête n'est pas déterministe (température non nulle).
     """
-    payload = {
-        "inputs": prompt,
-        "parameters": {
-            "temperature": temperature,
-            "max_length": max_length
-        }
-    }
+    if float(temperature) != 0.0:
+        return None
+    return make_cache_key(f"llm:{model}", "", {"prompt": prompt, "max_length": max_length})
+
+def is_error_answer(answer):
+    """
+    Indique si une réponse textuelle correspond à une erreur (à ne pas mettre en cache).
     
-    try:
-        response = requests.post(API_URL, headers=headers, json=payload)
-        return response.json()
-    except Exception as e:
-        return {"error": str(e)}
+    Args:
+        - answer: La réponse du modèle.
+        
+    Returns:
+        True si la réponse est un message d'erreur.
+    """
+    return answer.startswith(("Erreur", "Réponse inattendue", "Modèle non pris en charge"))
 
-def query_openai(prompt, temperature=0.7, max_tokens=150):
+def process_query_stream(model, prompt, temperature=0.7, max_length=150):
     """
-    Envoie une requête à l'API OpenAI et retourne la réponse.
+    Traite une requête en streaming en fonction du modèle sélectionné.
+    Les requêtes déterministes (température nulle) sont servies depuis le cache.
+    Le fournisseur du modèle est essayé en premier ; en cas d'erreur ou de timeout avant
+    le premier token, le routeur s'adresse au fournisseur configuré le plus rapide.
     
     Args:
+        - model: Le modèle à utiliser (FLAN-T5 ou GPT-3.5).
         - prompt: Le prompt à envoyer à l'API.
         - temperature: Paramètre de température pour la génération.
-        - max_tokens: Nombre maximum de tokens dans la réponse.
+        - max_length: Longueur maximale de la réponse.
         
     Returns:
-        La réponse de l'API.
+        Un itérateur sur les fragments de la réponse du modèle. Une erreur, même après
+        des tokens, termine le flux par un fragment "Erreur: ..." et la réponse n'est pas mise en cache.
     """
-    payload = {
-        "model": "gpt-3.5-turbo",
-        "messages": [
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt}
-        ],
-        "temperature": temperature,
-        "max_tokens": max_tokens
-    }
+    key = llm_cache_key(model, prompt, temperature, max_length)
+    if key is not None:
+        found, answer = response_cache.get(key)
+        if found:
+            yield answer
+            return
+    
+    if model not in MODEL_PROVIDERS:
+        yield "Modèle non pris en charge."
+        return
     
+    tokens, provider = [], None
     try:
-        response = requests.post(OPENAI_API_URL, headers=openai_headers, json=payload)
-        return response.json()
+        for fragment in llm_router.stream(prompt, temperature, max_length, prefer=MODEL_PROVIDERS[model]):
+            provider = fragment["provider"]
+            tokens.append(fragment["text"])
+            yield fragment["text"]
     except Exception as e:
-        return {"error": str(e)}
+        # Aucun fournisseur disponible, ou erreur en cours de flux (StreamError) : la réponse partielle n'est pas mise en cache
+        yield f"Erreur: {str(e)}"
+        return
+    
+    answer = "".join(tokens)
+    # Une réponse d'un autre fournisseur (relais en cas de panne) n'est pas mise en cache au nom du modèle
+    if key is not None and provider == MODEL_PROVIDERS[model] and not is_error_answer(answer):
+        response_cache.set(key, answer)
+
+# Fichiers statiques de l'interface, servis depuis un cache mémoire
+UI_FILES = ["index.html", "cyberpunk-style.css", "main.css"]
+UI_PORT = 8000
+ui_assets = None
+
+# Serveur HTTP de l'interface : fichiers statiques et flux de réponses
+class InterfaceRequestHandler(StaticFileHandler):
+    def do_POST(self):
+        """
+        Relaie la réponse du modèle token par token en Server-Sent Events (POST /api/chat/stream).
+        """
+        if self.path != "/api/chat/stream":
+            self.send_error(404)
+            return
+        
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+            prompt = body["prompt"]
+            model = body.get("model", current_model)
+            temperature = float(body.get("temperature", model_settings.get(model, {}).get("temperature", 0.7)))
+            max_length = int(body.get("max_length", model_settings.get(model, {}).get("max_length", 150)))
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400, "Requête non valide")
+            return
+        
+        # Flux sans Content-Length : la fin de la réponse est signalée par la fermeture de la connexion
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream; charset=utf-8")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("X-Accel-Buffering", "no")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        
+        try:
+            for token in process_query_stream(model, prompt, temperature, max_length):
+                self.wfile.write(f"data: {json.dumps({'token': token}, ensure_ascii=False)}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"event: done\ndata: {}\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # Le navigateur a fermé la connexion : arrêter de relayer les tokens
+            pass
 
-def process_query(model, prompt, temperature=0.7, max_length=150):
+def get_ui_assets(directory=None):
     """
-    Traite une requête en fonction du modèle sélectionné.
+    Récupère le cache des fichiers statiques de l'interface (chargé à la première demande).
     
     Args:
-        - model: Le modèle à utiliser (FLAN-T5 ou GPT-3.5).
-        - prompt: Le prompt à envoyer à l'API.
-        - temperature: Paramètre de température pour la génération.
-        - max_length: Longueur maximale de la réponse.
+        - directory: Le répertoire contenant les fichiers à servir (par défaut celui de ce script).
         
     Returns:
-        La réponse du modèle.
+        Le cache des fichiers statiques.
     """
-    if model == "FLAN-T5":
-        response = query_huggingface(prompt, temperature, max_length)
-        if isinstance(response, list) and len(response) > 0:
-            return response[0]["generated_text"]
-        elif "error" in response:
-            return f"Erreur: {response['error']}"
-        else:
-            return f"Réponse inattendue: {response}"
-    elif model == "GPT-3.5":
-        response = query_openai(prompt, temperature, max_length)
-        if "choices" in response and len(response["choices"]) > 0:
-            return response["choices"][0]["message"]["content"]
-        elif "error" in response:
-            return f"Erreur: {response['error']}"
-        else:
-            return f"Réponse inattendue: {response}"
-    else:
-        return "Modèle non pris en charge."
+    global ui_assets
+    if ui_assets is None:
+        ui_assets = StaticAssetCache(directory or os.path.dirname(os.path.abspath(__file__)), UI_FILES)
+    return ui_assets
 
-# Serveur HTTP simple pour servir l'interface
-class SimpleHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-    def log_message(self, format, *args):
-        # Supprimer les logs pour éviter de polluer la console
-        pass
+def get_interface_server(port=UI_PORT, directory=None):
+    """
+    Récupère le serveur de l'interface (une seule instance par port).
+    
+    Args:
+        - port: Le port du serveur.
+        - directory: Le répertoire contenant les fichiers à servir.
+        
+    Returns:
+        Le serveur de l'interface.
+    """
+    return UIServer.get_instance(port, partial(InterfaceRequestHandler, assets=get_ui_assets(directory)))
 
-def start_server(port=8000, directory=None):
+def start_server(port=UI_PORT, directory=None):
     """
-    Démarre un serveur HTTP simple pour servir l'interface.
+    Démarre le serveur HTTP de l'interface en arrière-plan (une seule instance par port).
     
     Args:
         - port: Le port sur lequel démarrer le serveur.
         - directory: Le répertoire contenant les fichiers à servir.
+        
+    Returns:
+        Le serveur de l'interface (voir server.status() pour un éventuel port occupé).
     """
-    handler = SimpleHTTPRequestHandler
-    
-    # Configurer le répertoire
-    if directory:
-        os.chdir(directory)
-    
-    httpd = socketserver.TCPServer(("0.0.0.0", port), handler)
-    print(f"Serveur démarré sur le port {port}")
-    httpd.serve_forever()
+    server = get_interface_server(port, directory)
+    server.start()
+    return server
 
-def launch_interface():
+def launch_interface(wait=False):
     """
     Lance l'interface web dans le navigateur par défaut.
+    
+    Args:
+        - wait: Si True, bloque jusqu'à l'arrêt du serveur (Ctrl+C pour quitter).
+        
+    Returns:
+        L'état du serveur de l'interface.
     """
     # Obtenir le chemin absolu du répertoire contenant les fichiers HTML/CSS
     current_dir = os.path.dirname(os.path.abspath(__file__))
     
-    # Démarrer le serveur dans un thread séparé
-    server_thread = threading.Thread(target=start_server, kwargs={
-        'port': 8000,
-        'directory': current_dir
-    })
-    server_thread.daemon = True
-    server_thread.start()
+    # Démarrer le serveur (sans effet s'il tourne déjà)
+    already_running = get_interface_server(UI_PORT, current_dir).is_running
+    server = start_server(port=UI_PORT, directory=current_dir)
+    status = server.status()
+    if status["state"] != "running":
+        print(f"Impossible de démarrer l'interface: {status['error']}")
+        return status
     
     # Ouvrir le navigateur (désactivé dans Docker)
     if os.environ.get("DOCKER_ENV") != "true":
         webbrowser.open(f"http://localhost:8000/index.html")
     
-    print("Interface lancée.")
-    print("Accédez à http://localhost:8000/index.html dans votre navigateur.")
-    print("Appuyez sur Ctrl+C pour quitter.")
+    if not already_running:
+        print("Interface lancée.")
+        print("Accédez à http://localhost:8000/index.html dans votre navigateur.")
     
-    try:
-        # Garder le programme en cours d'exécution
-        while True:
-            pass
-    except KeyboardInterrupt:
-        print("Serveur arrêté.")
+    if wait:
+        print("Appuyez sur Ctrl+C pour quitter.")
+        try:
+            # Attente passive : le thread dort jusqu'à l'arrêt du serveur
+            # (réveil chaque seconde pour rester interruptible par Ctrl+C sous Windows)
+            while not server.wait(timeout=1.0):
+                pass
+        except KeyboardInterrupt:
+            server.stop()
+            print("Serveur arrêté.")
+    
+    return status
 
 # Interface Taipy pour les paramètres avancés
 advanced_settings_page = """
@@ -198,6 +256,7 @@ advanced_settings_page = """
 
 <|Sauvegarder les paramètres|button|on_action=save_settings|>
 <|Lancer l'interface cyberpunk|button|on_action=launch_cyberpunk_interface|>
+<|Arrêter l'interface cyberpunk|button|on_action=stop_cyberpunk_interface|>
 |>
 
 <|
@@ -228,17 +287,10 @@ def save_settings(state: State):
     Args:
         - state: L'état actuel de l'application.
     """
-    # Mettre à jour les variables globales
-    global API_URL, headers, OPENAI_API_KEY, openai_headers
-    
-    if state.current_model == "FLAN-T5":
-        headers = {"Authorization": f"Bearer {state.model_settings[state.current_model]['api_key']}"}
-    elif state.current_model == "GPT-3.5":
-        OPENAI_API_KEY = state.model_settings[state.current_model]["api_key"]
-        openai_headers = {
-            "Authorization": f"Bearer {OPENAI_API_KEY}",
-            "Content-Type": "application/json"
-        }
+    # Clé utilisée par le routeur (une clé vide ou d'exemple rétablit celle de la configuration)
+    provider = llm_router.get_provider(MODEL_PROVIDERS.get(state.current_model, ""))
+    if provider is not None:
+        provider.set_api_key(state.model_settings[state.current_model]["api_key"])
     
     notify(state, "success", f"Paramètres du modèle {state.current_model} sauvegardés!")
 
@@ -252,12 +304,26 @@ def launch_cyberpunk_interface(state: State):
     # Sauvegarder les paramètres avant de lancer l'interface
     save_settings(state)
     
-    # Lancer l'interface dans un thread séparé
-    interface_thread = threading.Thread(target=launch_interface)
-    interface_thread.daemon = True
-    interface_thread.start()
+    # Le serveur tourne en arrière-plan : un nouveau clic ne crée pas de doublon
+    status = launch_interface()
+    if status["state"] == "running":
+        notify(state, "info", "Interface cyberpunk lancée dans le navigateur!")
+    else:
+        notify(state, "error", f"Impossible de lancer l'interface cyberpunk: {status['error']}")
+
+def stop_cyberpunk_interface(state: State):
+    """
+    Arrête le serveur de l'interface cyberpunk.
     
-    notify(state, "info", "Interface cyberpunk lancée dans le navigateur!")
+    Args:
+        - state: L'état actuel de l'application.
+    """
+    server = get_interface_server(UI_PORT)
+    if server.is_running:
+        server.stop()
+        notify(state, "info", "Interface cyberpunk arrêtée.")
+    else:
+        notify(state, "warning", "L'interface cyberpunk n'est pas démarrée.")
 
 def go_home(state: State):
     """
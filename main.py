@@ -1,10 +1,30 @@
-import requests
 import json
 import os
+from typing import Optional
 from taipy.gui import Gui, State, notify
 
+from utils.context_window import ConversationWindow, get_token_budget
+from utils.llm_router import NoProviderAvailable, llm_router
+
+MODEL = "google/flan-t5-xxl"
+# Provider tried first by the router; the other configured providers take over on errors or slowness
+PROVIDER = "huggingface"
+SYSTEM_PROMPT = "The following is a conversation with an AI assistant. The assistant is helpful, creative, clever, and very friendly."
+
+def new_context() -> ConversationWindow:
+    """
+    Create the context of a new conversation, bounded by the model's token budget.
+
+    Returns:
+        The conversation window, seeded with the assistant's introduction.
+    """
+    context = ConversationWindow(SYSTEM_PROMPT, max_tokens=get_token_budget(MODEL))
+    context.add("user", "Hello, who are you?")
+    context.add("assistant", "I am an AI created by Google. How can I help you today?")
+    return context
+
 # Initialize variables
-context = "The following is a conversation with an AI assistant. The assistant is helpful, creative, clever, and very friendly.\n\nHuman: Hello, who are you?\nAI: I am an AI created by Google. How can I help you today? "
+context = new_context()
 conversation = {
     "Conversation": ["Who are you?", "Hi! I am FLAN-T5 XXL. How can I help you today?"]
 }
@@ -12,33 +32,22 @@ current_user_message = ""
 conversation_history = []
 selected_conversation = None
 
-# HuggingFace API configuration
-API_URL = "https://api-inference.huggingface.co/models/google/flan-t5-xxl"
-headers = {"Authorization": f"Bearer {os.environ.get('HUGGINGFACE_API_KEY', '[YOUR ACCESS TOKEN]')}"}
-
-def query(payload):
-    response = requests.post(API_URL, headers=headers, json=payload)
-    return response.json()
-
-def request(state: State, prompt: str) -> str:
+def request(state: State, messages: list) -> Optional[str]:
     """
-    Send a prompt to the HuggingFace API and return the response.
+    Send the conversation to the fastest healthy provider (HuggingFace first) and return the response.
 
     Args:
         - state: The current state of the app.
-        - prompt: The prompt to send to the API.
+        - messages: The conversation to send, as chat messages.
 
     Returns:
-        The response from the API.
+        The response from the model, or None if no provider could answer.
     """
-    
-    output = query(
-        {
-            "inputs": prompt,
-        }
-    )
-    print(output)
-    return output[0]["generated_text"]
+    try:
+        return llm_router.generate(messages, prefer=PROVIDER)["text"]
+    except NoProviderAvailable as e:
+        notify(state, "error", str(e))
+        return None
 
 def send_message(state: State) -> None:
     """
@@ -47,12 +56,18 @@ def send_message(state: State) -> None:
     Args:
         - state: The current state of the app.
     """
-    # Add the user's message to the context
-    state.context += f"Human: \n {state.current_user_message}\n\n AI:"
-    # Send the user's message to the API and get the response
-    answer = request(state, state.context).replace("\n", "")
-    # Add the response to the context for future messages
-    state.context += answer
+    # Send the system prompt, the summary of older turns, the recent turns and the user's message
+    # (rendered as a "Human:/AI:" transcript for completion models such as FLAN-T5)
+    context = state.context
+    answer = request(state, context.chat_messages() + [{"role": "user", "content": state.current_user_message}])
+    if answer is None:
+        # Nothing is recorded: the message stays in the input field so that it can be sent again
+        return
+    answer = answer.replace("\n", "")
+    # Add both turns to the context for future messages (older turns slide out of the token budget)
+    context.add("user", state.current_user_message)
+    context.add("assistant", answer)
+    state.context = context
     # Update the conversation
     conv = state.conversation._dict.copy()
     conv["Conversation"] += [state.current_user_message, answer]
@@ -122,7 +137,7 @@ def clear_conversation(state: State) -> None:
     state.conversation = {
         "Conversation": []
     }
-    state.context = "The following is a conversation with an AI assistant. The assistant is helpful, creative, clever, and very friendly.\n\nHuman: Hello, who are you?\nAI: I am an AI created by Google. How can I help you today? "
+    state.context = new_context()
     notify(state, "info", "Conversation cleared!")
 
 # Define the UI with sidebar
@@ -5,12 +5,16 @@ Intègre également un endpoint Flask pour l'accès par API
 
 import json
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterable, Iterator, List
 from taipy.gui import Gui, State, notify, navigate
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 
 # Importer les MCPs
-from mcps import load_mcps, get_all_mcps, get_mcp, execute_mcp
+from mcps import load_mcps, get_all_mcps, get_mcp, execute_mcp, execute_mcp_batch, execute_mcp_map_reduce, execute_mcp_stream, get_cache_stats, get_import_stats, get_limit_stats, start_services
+from utils.limits import DeadlineExceeded, Rejected
+from utils.schema import SchemaError, describe_schema, example_input
+from utils.data_files import READ_BLOCK_SIZE, decode_blocks, iter_data_file
+from utils.textrank import iter_chunks
 
 # Importer le gestionnaire de configuration
 from utils.config_manager import config_manager
@@ -25,8 +29,20 @@ LLM_SERVICES = [
     {"id": "cohere", "name": "Cohere", "description": "API Cohere pour les modèles de langage et d'embeddings"}
 ]
 
-# Initialisation des variables
-mcps = load_mcps()
+# Nombre maximal d'éléments acceptés par l'endpoint de traitement par lots
+BATCH_MAX_ITEMS = int(os.environ.get("MCP_BATCH_MAX_ITEMS", 1000))
+
+# Fenêtre de traitement du mode flux NDJSON (entrées en cours simultanément)
+STREAM_WINDOW = int(os.environ.get("MCP_STREAM_WINDOW", 32))
+STREAM_MAX_WINDOW = int(os.environ.get("MCP_STREAM_MAX_WINDOW", 256))
+
+# Traitement par morceaux des longs documents : taille des morceaux (caractères) et morceaux traités simultanément
+CHUNK_SIZE = int(os.environ.get("MCP_CHUNK_SIZE", 64 * 1024))
+CHUNK_MAX_SIZE = int(os.environ.get("MCP_CHUNK_MAX_SIZE", 1024 * 1024))
+CHUNK_WINDOW = int(os.environ.get("MCP_CHUNK_WINDOW", os.cpu_count() or 4))
+
+# Initialisation des variables (les MCPs sont découverts à l'import du package mcps)
+mcps = get_all_mcps()
 selected_mcp = None
 input_json = "{}"
 result_json = ""
@@ -55,6 +71,25 @@ def parse_input_json(input_str: str) -> Dict[str, Any]:
     except json.JSONDecodeError as e:
         return {"error": f"Erreur de syntaxe JSON: {str(e)}"}
 
+def parse_ndjson_lines(lines: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Décode un flux NDJSON ligne par ligne
+    
+    Args:
+        lines: Les lignes brutes du flux
+        
+    Returns:
+        Un itérateur sur les objets décodés (None pour une ligne non valide)
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
 def format_json(data: Dict[str, Any]) -> str:
     """
     Formate un dictionnaire en JSON avec indentation
@@ -115,29 +150,19 @@ def update_mcp_info(state: State) -> None:
         
         # Formater le schéma d'entrée
         input_schema = metadata.get("input_schema", {})
-        state.mcp_input_schema = "\n".join([f"- {key}: {value}" for key, value in input_schema.items()])
+        try:
+            state.mcp_input_schema = "\n".join(describe_schema(input_schema))
+            example = example_input(input_schema)
+        except ValueError as e:
+            state.mcp_input_schema = f"Schéma d'entrée non valide: {str(e)}"
+            example = {}
         
         # Formater le schéma de sortie
         output_schema = metadata.get("output_schema", {})
         state.mcp_output_schema = "\n".join([f"- {key}: {value}" for key, value in output_schema.items()])
         
-        # Préparer un exemple JSON d'entrée basé sur le schéma
-        example_input = {}
-        for key in input_schema:
-            if "str" in input_schema[key].lower():
-                example_input[key] = ""
-            elif "int" in input_schema[key].lower():
-                example_input[key] = 0
-            elif "float" in input_schema[key].lower():
-                example_input[key] = 0.0
-            elif "bool" in input_schema[key].lower():
-                example_input[key] = False
-            elif "list" in input_schema[key].lower() or "array" in input_schema[key].lower():
-                example_input[key] = []
-            elif "dict" in input_schema[key].lower() or "object" in input_schema[key].lower():
-                example_input[key] = {}
-        
-        state.input_json = format_json(example_input)
+        # Exemple JSON d'entrée généré à partir du schéma
+        state.input_json = format_json(example)
 
 def on_change_mcp(state: State, var_name: str, var_value: str) -> None:
     """
@@ -153,18 +178,19 @@ def on_change_mcp(state: State, var_name: str, var_value: str) -> None:
 
 def reload_mcps(state: State) -> None:
     """
-    Recharge tous les MCPs
+    Recharge les MCPs modifiés, ajoutés ou supprimés
     
     Args:
         state: L'état actuel de l'application
     """
     global mcps
     mcps = load_mcps()
+    discovery = get_import_stats()["discovery"]
     state.selected_mcp = None
     state.input_json = "{}"
     state.result_json = ""
     update_mcp_info(state)
-    notify(state, "info", "MCPs rechargés")
+    notify(state, "info", f"MCPs rechargés ({len(discovery['changed'])} modifié(s), {len(discovery['removed'])} retiré(s))")
 
 def go_home(state: State) -> None:
     """
@@ -392,6 +418,38 @@ Content-Type: application/json
 ```
 
 Le serveur répond avec un JSON contenant le résultat du MCP.
+
+Pour traiter plusieurs entrées en une seule requête :
+
+```
+POST /mcp/<nom_du_mcp>/batch
+Content-Type: application/json
+
+[{"param1": "valeur1"}, {"param1": "valeur2"}]
+```
+
+Le serveur répond avec un tableau de résultats dans le même ordre.
+
+Pour les gros volumes, envoyez un flux NDJSON (une entrée JSON par ligne) :
+
+```
+POST /mcp/<nom_du_mcp>/stream?window=32
+Content-Type: application/x-ndjson
+```
+
+Les résultats sont renvoyés en NDJSON au fil du traitement.
+
+Pour résumer un long document par morceaux, envoyez-le en texte brut, ou désignez un fichier du dossier de données :
+
+```
+POST /mcp/text_summarizer/chunked?max_length=500&mode=textrank
+Content-Type: text/plain
+
+POST /mcp/text_summarizer/chunked
+Content-Type: application/json
+
+{"path": "rapports/annuel.txt", "max_length": 500}
+```
 |>
 |>
 """
@@ -455,6 +513,19 @@ Ne partagez jamais vos clés API avec d'autres personnes.
 # Initialisation de l'application Taipy et Flask
 app = Flask(__name__)
 
+def limit_response(error: Exception):
+    """
+    Construit la réponse d'une exécution rejetée (429/503) ou expirée (504)
+    
+    Args:
+        error: L'exception Rejected ou DeadlineExceeded
+    """
+    response = jsonify({"error": str(error)})
+    response.status_code = error.status_code
+    if isinstance(error, Rejected):
+        response.headers["Retry-After"] = str(error.retry_after)
+    return response
+
 @app.route('/mcp/<name>', methods=['POST'])
 def api_execute_mcp(name):
     """
@@ -480,9 +551,151 @@ def api_execute_mcp(name):
     try:
         result = execute_mcp(name, input_data)
         return jsonify(result)
+    except SchemaError as e:
+        return jsonify({"error": str(e), "details": e.errors}), 400
+    except (Rejected, DeadlineExceeded) as e:
+        return limit_response(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/mcp/<name>/batch', methods=['POST'])
+def api_execute_mcp_batch(name):
+    """
+    Endpoint API pour exécuter un MCP sur un tableau d'entrées
+    
+    Args:
+        name: Le nom du MCP à exécuter
+    """
+    # Vérifier si le MCP existe
+    mcp = get_mcp(name)
+    if not mcp:
+        return jsonify({"error": f"MCP '{name}' non trouvé"}), 404
+    
+    # Récupérer le tableau d'entrées
+    try:
+        inputs = request.json
+    except:
+        return jsonify({"error": "Données d'entrée non valides"}), 400
+    if not isinstance(inputs, list):
+        return jsonify({"error": "Le corps de la requête doit être un tableau JSON d'entrées"}), 400
+    if len(inputs) > BATCH_MAX_ITEMS:
+        return jsonify({"error": f"Le lot dépasse la taille maximale de {BATCH_MAX_ITEMS} éléments"}), 413
+    
+    # Exécuter le MCP sur chaque entrée (les erreurs sont retournées élément par élément)
+    try:
+        results = execute_mcp_batch(name, inputs)
+        return jsonify(results)
+    except (Rejected, DeadlineExceeded) as e:
+        return limit_response(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/mcp/<name>/stream', methods=['POST'])
+def api_execute_mcp_stream(name):
+    """
+    Endpoint API pour exécuter un MCP sur un flux NDJSON
+    
+    Chaque ligne du corps est une entrée JSON ; les résultats sont renvoyés
+    en NDJSON chunké, dans l'ordre, au fur et à mesure du traitement.
+    
+    Args:
+        name: Le nom du MCP à exécuter
+    """
+    # Vérifier si le MCP existe
+    mcp = get_mcp(name)
+    if not mcp:
+        return jsonify({"error": f"MCP '{name}' non trouvé"}), 404
+    
+    # Taille de la fenêtre de traitement
+    try:
+        window = int(request.args.get("window", STREAM_WINDOW))
+        if window <= 0:
+            raise ValueError()
+    except ValueError:
+        return jsonify({"error": "La fenêtre doit être un entier positif"}), 400
+    window = min(window, STREAM_MAX_WINDOW)
+    
+    def generate():
+        inputs = parse_ndjson_lines(request.stream)
+        for result in execute_mcp_stream(name, inputs, window):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+@app.route('/mcp/<name>/chunked', methods=['POST'])
+def api_execute_mcp_chunked(name):
+    """
+    Endpoint API pour résumer un long document par morceaux (map-reduce)
+    
+    Le document est le corps de la requête (texte brut, lu en flux), ou un fichier
+    du dossier de données désigné par un corps JSON {"path": ..., ...}. Les autres
+    paramètres du MCP sont passés dans le corps JSON ou dans la chaîne de requête.
+    
+    Args:
+        name: Le nom du MCP à exécuter
+    """
+    # Vérifier si le MCP existe
+    mcp = get_mcp(name)
+    if not mcp:
+        return jsonify({"error": f"MCP '{name}' non trouvé"}), 404
+    
+    # Taille des morceaux et nombre de morceaux traités simultanément
+    try:
+        chunk_size = int(request.args.get("chunk_size", CHUNK_SIZE))
+        window = int(request.args.get("window", CHUNK_WINDOW))
+        if chunk_size <= 0 or window <= 0:
+            raise ValueError()
+    except ValueError:
+        return jsonify({"error": "chunk_size et window doivent être des entiers positifs"}), 400
+    chunk_size = min(chunk_size, CHUNK_MAX_SIZE)
+    window = min(window, STREAM_MAX_WINDOW)
+    params = {key: value for key, value in request.args.items() if key not in ("chunk_size", "window")}
+    
+    try:
+        if request.is_json:
+            body = request.get_json(silent=True)
+            if not isinstance(body, dict) or not isinstance(body.get("path"), str):
+                return jsonify({"error": "Le corps JSON doit contenir le chemin du fichier (path)"}), 400
+            params.update({key: value for key, value in body.items() if key != "path"})
+            pieces = iter_data_file(body["path"])
+        else:
+            pieces = decode_blocks(iter(lambda: request.stream.read(READ_BLOCK_SIZE), b""))
+        result = execute_mcp_map_reduce(name, iter_chunks(pieces, chunk_size), params, chunk_size, window)
+        return jsonify(result)
+    except SchemaError as e:
+        return jsonify({"error": str(e), "details": e.errors}), 400
+    except (Rejected, DeadlineExceeded) as e:
+        return limit_response(e)
+    except FileNotFoundError as e:
+        return jsonify({"error": str(e)}), 404
+    except PermissionError as e:
+        return jsonify({"error": str(e)}), 403
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), getattr(e, "status_code", 500)
+
+@app.route('/cache/stats', methods=['GET'])
+def api_cache_stats():
+    """
+    Endpoint API exposant les compteurs du cache des MCPs (succès, échecs, évictions)
+    """
+    return jsonify(get_cache_stats())
+
+@app.route('/mcps/imports', methods=['GET'])
+def api_import_stats():
+    """
+    Endpoint API exposant la durée de découverte des MCPs et la durée d'import de chaque module
+    """
+    return jsonify(get_import_stats())
+
+@app.route('/mcps/limits', methods=['GET'])
+def api_limit_stats():
+    """
+    Endpoint API exposant les délais et l'occupation des limites de concurrence de chaque MCP
+    """
+    return jsonify(get_limit_stats())
+
 # Création d'une classe pour le style CSS
 css = """
 .monospace {
@@ -521,4 +734,5 @@ def run_app():
     )
 
 if __name__ == "__main__":
+    start_services()
     run_app()
\ No newline at end of file
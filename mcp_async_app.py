@@ -0,0 +1,315 @@
+"""
+API REST asynchrone pour les MCPs (Model Context Protocol)
+Expose les mêmes endpoints que l'API Flask de mcp_app.py sur une boucle
+d'événements aiohttp : un seul processus peut garder des centaines de
+requêtes en attente des API distantes sans monopoliser un thread chacune.
+"""
+
+import json
+import os
+from typing import Any, AsyncIterable, AsyncIterator, Optional
+
+from aiohttp import web
+
+# Importer les MCPs
+from mcps import get_mcp, execute_mcp_async, execute_mcp_batch_async, execute_mcp_map_reduce_async, execute_mcp_stream_async, get_cache_stats, get_import_stats, get_limit_stats, start_services
+from utils.limits import DeadlineExceeded, Rejected
+from utils.schema import SchemaError
+from utils.data_files import READ_BLOCK_SIZE, adecode_blocks, aiter_data_file
+from utils.textrank import aiter_chunks
+
+# Nombre maximal d'éléments acceptés par l'endpoint de traitement par lots
+BATCH_MAX_ITEMS = int(os.environ.get("MCP_BATCH_MAX_ITEMS", 1000))
+
+# Fenêtre de traitement du mode flux NDJSON (entrées en cours simultanément)
+STREAM_WINDOW = int(os.environ.get("MCP_STREAM_WINDOW", 32))
+STREAM_MAX_WINDOW = int(os.environ.get("MCP_STREAM_MAX_WINDOW", 256))
+
+# Taille maximale d'une ligne du flux NDJSON (octets) : au-delà, la ligne est ignorée et signalée en erreur
+STREAM_MAX_LINE = int(os.environ.get("MCP_STREAM_MAX_LINE", 16 * 1024 * 1024))
+
+# Traitement par morceaux des longs documents : taille des morceaux (caractères) et morceaux traités simultanément
+CHUNK_SIZE = int(os.environ.get("MCP_CHUNK_SIZE", 64 * 1024))
+CHUNK_MAX_SIZE = int(os.environ.get("MCP_CHUNK_MAX_SIZE", 1024 * 1024))
+CHUNK_WINDOW = int(os.environ.get("MCP_CHUNK_WINDOW", os.cpu_count() or 4))
+
+async def split_lines(blocks: AsyncIterable[bytes], max_length: int = STREAM_MAX_LINE) -> AsyncIterator[Optional[bytes]]:
+    """
+    Découpe un flux d'octets en lignes, sans la limite de longueur de ligne du lecteur aiohttp
+
+    Args:
+        blocks: Les blocs bruts du flux
+        max_length: La longueur maximale d'une ligne (octets)
+
+    Returns:
+        Un itérateur asynchrone sur les lignes (None pour une ligne trop longue, dont
+        le contenu n'est pas gardé en mémoire)
+    """
+    buffer = bytearray()
+    oversize = False
+    async for block in blocks:
+        start = 0
+        while True:
+            end = block.find(b"\n", start)
+            if end < 0:
+                break
+            if oversize or len(buffer) + end - start > max_length:
+                yield None
+            else:
+                buffer += block[start:end]
+                yield bytes(buffer)
+            buffer.clear()
+            oversize = False
+            start = end + 1
+        if not oversize:
+            buffer += block[start:]
+            if len(buffer) > max_length:
+                oversize = True
+                buffer.clear()
+    if oversize:
+        yield None
+    elif buffer:
+        yield bytes(buffer)
+
+async def parse_ndjson_lines(lines: AsyncIterable[Optional[bytes]]) -> AsyncIterator[Any]:
+    """
+    Décode un flux NDJSON ligne par ligne
+
+    Args:
+        lines: Les lignes brutes du flux (None pour une ligne trop longue)
+
+    Returns:
+        Un itérateur asynchrone sur les objets décodés (None pour une ligne non valide ou trop longue)
+    """
+    async for line in lines:
+        if line is None:
+            yield None
+            continue
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+def limit_response(error: Exception) -> web.Response:
+    """
+    Construit la réponse d'une exécution rejetée (429/503) ou expirée (504)
+
+    Args:
+        error: L'exception Rejected ou DeadlineExceeded
+    """
+    headers = {"Retry-After": str(error.retry_after)} if isinstance(error, Rejected) else None
+    return web.json_response({"error": str(error)}, status=error.status_code, headers=headers)
+
+async def api_execute_mcp(request: web.Request) -> web.Response:
+    """
+    Endpoint API pour exécuter un MCP
+
+    Args:
+        request: La requête HTTP entrante
+    """
+    name = request.match_info["name"]
+
+    # Vérifier si le MCP existe
+    mcp = get_mcp(name)
+    if not mcp:
+        return web.json_response({"error": f"MCP '{name}' non trouvé"}, status=404)
+
+    # Récupérer les données d'entrée
+    try:
+        input_data = await request.json()
+        if not input_data:
+            return web.json_response({"error": "Données d'entrée manquantes ou non valides"}, status=400)
+    except Exception:
+        return web.json_response({"error": "Données d'entrée non valides"}, status=400)
+
+    # Exécuter le MCP
+    try:
+        result = await execute_mcp_async(name, input_data)
+        return web.json_response(result)
+    except SchemaError as e:
+        return web.json_response({"error": str(e), "details": e.errors}, status=400)
+    except (Rejected, DeadlineExceeded) as e:
+        return limit_response(e)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+async def api_execute_mcp_batch(request: web.Request) -> web.Response:
+    """
+    Endpoint API pour exécuter un MCP sur un tableau d'entrées
+
+    Args:
+        request: La requête HTTP entrante
+    """
+    name = request.match_info["name"]
+
+    # Vérifier si le MCP existe
+    mcp = get_mcp(name)
+    if not mcp:
+        return web.json_response({"error": f"MCP '{name}' non trouvé"}, status=404)
+
+    # Récupérer le tableau d'entrées
+    try:
+        inputs = await request.json()
+    except Exception:
+        return web.json_response({"error": "Données d'entrée non valides"}, status=400)
+    if not isinstance(inputs, list):
+        return web.json_response({"error": "Le corps de la requête doit être un tableau JSON d'entrées"}, status=400)
+    if len(inputs) > BATCH_MAX_ITEMS:
+        return web.json_response({"error": f"Le lot dépasse la taille maximale de {BATCH_MAX_ITEMS} éléments"}, status=413)
+
+    # Exécuter le MCP sur chaque entrée (les erreurs sont retournées élément par élément)
+    try:
+        results = await execute_mcp_batch_async(name, inputs)
+        return web.json_response(results)
+    except (Rejected, DeadlineExceeded) as e:
+        return limit_response(e)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=500)
+
+async def api_execute_mcp_stream(request: web.Request) -> web.StreamResponse:
+    """
+    Endpoint API pour exécuter un MCP sur un flux NDJSON
+
+    Args:
+        request: La requête HTTP entrante
+    """
+    name = request.match_info["name"]
+
+    # Vérifier si le MCP existe
+    mcp = get_mcp(name)
+    if not mcp:
+        return web.json_response({"error": f"MCP '{name}' non trouvé"}, status=404)
+
+    # Taille de la fenêtre de traitement
+    try:
+        window = int(request.query.get("window", STREAM_WINDOW))
+        if window <= 0:
+            raise ValueError()
+    except ValueError:
+        return web.json_response({"error": "La fenêtre doit être un entier positif"}, status=400)
+    window = min(window, STREAM_MAX_WINDOW)
+
+    response = web.StreamResponse()
+    response.content_type = "application/x-ndjson"
+    response.enable_chunked_encoding()
+    await response.prepare(request)
+
+    # write() attend que le tampon d'envoi se vide : un client lent ralentit la lecture du flux
+    # Lignes découpées ici : le lecteur de aiohttp lève une erreur au-delà de 64 Ko, après l'envoi des en-têtes
+    lines = split_lines(request.content.iter_chunked(READ_BLOCK_SIZE))
+    async for result in execute_mcp_stream_async(name, parse_ndjson_lines(lines), window):
+        await response.write((json.dumps(result, ensure_ascii=False) + "\n").encode())
+
+    await response.write_eof()
+    return response
+
+async def api_execute_mcp_chunked(request: web.Request) -> web.Response:
+    """
+    Endpoint API pour résumer un long document par morceaux (map-reduce)
+
+    Le document est le corps de la requête (texte brut, lu en flux), ou un fichier
+    du dossier de données désigné par un corps JSON {"path": ..., ...}.
+
+    Args:
+        request: La requête HTTP entrante
+    """
+    name = request.match_info["name"]
+
+    # Vérifier si le MCP existe
+    mcp = get_mcp(name)
+    if not mcp:
+        return web.json_response({"error": f"MCP '{name}' non trouvé"}, status=404)
+
+    # Taille des morceaux et nombre de morceaux traités simultanément
+    try:
+        chunk_size = int(request.query.get("chunk_size", CHUNK_SIZE))
+        window = int(request.query.get("window", CHUNK_WINDOW))
+        if chunk_size <= 0 or window <= 0:
+            raise ValueError()
+    except ValueError:
+        return web.json_response({"error": "chunk_size et window doivent être des entiers positifs"}, status=400)
+    chunk_size = min(chunk_size, CHUNK_MAX_SIZE)
+    window = min(window, STREAM_MAX_WINDOW)
+    params = {key: value for key, value in request.query.items() if key not in ("chunk_size", "window")}
+
+    try:
+        if request.content_type == "application/json":
+            try:
+                body = await request.json()
+            except ValueError:
+                body = None
+            if not isinstance(body, dict) or not isinstance(body.get("path"), str):
+                return web.json_response({"error": "Le corps JSON doit contenir le chemin du fichier (path)"}, status=400)
+            params.update({key: value for key, value in body.items() if key != "path"})
+            pieces = aiter_data_file(body["path"])
+        else:
+            pieces = adecode_blocks(request.content.iter_chunked(READ_BLOCK_SIZE))
+        result = await execute_mcp_map_reduce_async(name, aiter_chunks(pieces, chunk_size), params, chunk_size, window)
+        return web.json_response(result)
+    except SchemaError as e:
+        return web.json_response({"error": str(e), "details": e.errors}, status=400)
+    except (Rejected, DeadlineExceeded) as e:
+        return limit_response(e)
+    except FileNotFoundError as e:
+        return web.json_response({"error": str(e)}, status=404)
+    except PermissionError as e:
+        return web.json_response({"error": str(e)}, status=403)
+    except ValueError as e:
+        return web.json_response({"error": str(e)}, status=400)
+    except Exception as e:
+        return web.json_response({"error": str(e)}, status=getattr(e, "status_code", 500))
+
+async def api_cache_stats(request: web.Request) -> web.Response:
+    """
+    Endpoint API exposant les compteurs du cache des MCPs
+
+    Args:
+        request: La requête HTTP entrante
+    """
+    return web.json_response(get_cache_stats())
+
+async def api_import_stats(request: web.Request) -> web.Response:
+    """
+    Endpoint API exposant la durée de découverte des MCPs et la durée d'import de chaque module
+
+    Args:
+        request: La requête HTTP entrante
+    """
+    return web.json_response(get_import_stats())
+
+async def api_limit_stats(request: web.Request) -> web.Response:
+    """
+    Endpoint API exposant les délais et l'occupation des limites de concurrence de chaque MCP
+
+    Args:
+        request: La requête HTTP entrante
+    """
+    return web.json_response(get_limit_stats())
+
+def create_app() -> web.Application:
+    """
+    Crée l'application aiohttp
+
+    Returns:
+        L'application configurée
+    """
+    app = web.Application()
+    app.router.add_post("/mcp/{name}", api_execute_mcp)
+    app.router.add_post("/mcp/{name}/batch", api_execute_mcp_batch)
+    app.router.add_post("/mcp/{name}/stream", api_execute_mcp_stream)
+    app.router.add_post("/mcp/{name}/chunked", api_execute_mcp_chunked)
+    app.router.add_get("/cache/stats", api_cache_stats)
+    app.router.add_get("/mcps/imports", api_import_stats)
+    app.router.add_get("/mcps/limits", api_limit_stats)
+    return app
+
+if __name__ == "__main__":
+    # Configuration du serveur
+    host = os.environ.get("HOST", "127.0.0.1")
+    port = int(os.environ.get("ASYNC_PORT", 5002))
+
+    start_services()
+    web.run_app(create_app(), host=host, port=port)
@@ -2,9 +2,24 @@
 Module d'initialisation pour les MCPs (Model Context Protocol)
 """
 import os
+import ast
+import sys
+import json
+import time
+import hashlib
+import asyncio
+import functools
 import importlib
+import importlib.machinery
+import importlib.util
 import inspect
-from typing import Dict, List, Any, Callable, Optional
+import threading
+import contextvars
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, List, Any, Callable, Iterable, Iterator, AsyncIterable, AsyncIterator, Optional
 
 # Importer le gestionnaire de configuration
 try:
@@ -17,46 +32,524 @@ except ImportError:
     
     config_manager = ConfigManagerStub()
 
-# Liste pour stocker les MCPs chargés
+# Importer le client HTTP asynchrone partagé (connexions persistantes vers les fournisseurs)
+try:
+    from utils.http_client import async_http_client
+except ImportError:
+    # Sans le client partagé, se rabattre sur requests, exécuté hors de la boucle d'événements
+    class AsyncHTTPClientStub:
+        async def request(self, method: str, url: str, **kwargs: Any) -> Any:
+            import requests
+            # Le délai de l'exécution courante suit l'appel dans l'exécuteur et borne son timeout
+            kwargs.setdefault("timeout", remaining_time())
+            call = functools.partial(contextvars.copy_context().run, requests.request, method, url, **kwargs)
+            return await asyncio.get_running_loop().run_in_executor(None, call)
+
+        async def post(self, url: str, **kwargs: Any) -> Any:
+            return await self.request("POST", url, **kwargs)
+
+        async def get(self, url: str, **kwargs: Any) -> Any:
+            return await self.request("GET", url, **kwargs)
+    
+    async_http_client = AsyncHTTPClientStub()
+
+# Runtime asynchrone : boucle d'arrière-plan et exécuteur borné pour les MCPs synchrones
+from utils.async_runtime import (
+    get_executor, get_loop, get_process_pool, in_executor, process_pool_size, reset_process_pool, run_coroutine
+)
+
+# Délais d'exécution et limites de concurrence
+from utils.limits import AdmissionLimit, Bulkhead, DeadlineExceeded, Rejected, deadline_scope, get_deadline, remaining_time, run_with_deadline
+
+# Schémas d'entrée compilés en fonctions de validation
+from utils.schema import SchemaError, compile_schema
+
+# Cache des réponses pour les MCPs déterministes (activé via metadata["cache"])
+from utils.cache import make_cache_key, response_cache
+
+# Désactivation globale du cache (MCP_CACHE_ENABLED=0)
+CACHE_ENABLED = os.environ.get("MCP_CACHE_ENABLED", "1").lower() not in ("0", "false", "no")
+
+# Liste pour stocker les MCPs découverts (les modules sont importés à leur première exécution)
 mcps = {}
 
-def load_mcps():
+# Compteurs de cache par MCP
+cache_stats: Dict[str, Dict[str, int]] = {}
+
+# Dossier des MCPs et manifeste des MCPs découverts (métadonnées par fichier, sans import)
+MCPS_DIR = os.path.dirname(os.path.abspath(__file__))
+MANIFEST_PATH = os.environ.get("MCP_MANIFEST_PATH", os.path.join(MCPS_DIR, "__pycache__", "mcp_manifest.json"))
+
+# Importer tous les MCPs dès leur découverte, en parallèle (MCP_PRELOAD=1)
+PRELOAD = os.environ.get("MCP_PRELOAD", "0").lower() in ("1", "true", "yes")
+
+# Classes d'exécution déclarées par metadata["execution"] :
+# - "inline" : dans le thread appelant (par défaut)
+# - "thread" : dans l'exécuteur borné partagé
+# - "process" : dans le pool de processus (MCPs gourmands en CPU, hors du GIL)
+EXECUTION_CLASSES = ("inline", "thread", "process")
+
+# Délai d'exécution par défaut d'un MCP (metadata["timeout"]) et d'un run_batch (metadata["batch_timeout"]), en secondes
+DEFAULT_TIMEOUT = float(os.environ.get("MCP_DEFAULT_TIMEOUT", 30))
+DEFAULT_BATCH_TIMEOUT = float(os.environ.get("MCP_DEFAULT_BATCH_TIMEOUT", 300))
+
+# Nombre maximal de requêtes en attente d'une place par MCP limité (metadata["max_queue"]) : au-delà, rejet 429
+DEFAULT_MAX_QUEUE = int(os.environ.get("MCP_MAX_QUEUE", 32))
+
+# Nombre maximal d'exécutions en cours ou en attente, tous MCPs confondus (0 : pas de limite) : au-delà, rejet 503
+admission = AdmissionLimit(int(os.environ.get("MCP_MAX_IN_FLIGHT", 0)))
+
+# Préchauffer le pool de processus dès la découverte d'un MCP "process" (MCP_PROCESS_WARM=0 pour attendre la première exécution)
+PROCESS_WARM = os.environ.get("MCP_PROCESS_WARM", "1").lower() not in ("0", "false", "no")
+
+# Durées de découverte et d'import des modules
+import_stats: Dict[str, Dict[str, Any]] = {}
+discovery_stats: Dict[str, Any] = {}
+
+# Positionné une fois la première découverte terminée
+_discovered = threading.Event()
+
+# Un verrou d'import par MCP : les exécutions concurrentes attendent le premier import,
+# tandis que des MCPs différents peuvent être importés en parallèle
+_import_locks: Dict[str, threading.Lock] = {}
+_import_locks_lock = threading.Lock()
+
+def _read_manifest() -> Dict[str, Any]:
+    """
+    Lit le manifeste des MCPs découverts lors d'un démarrage précédent
+    
+    Returns:
+        Les entrées du manifeste par nom de fichier (vide si absent ou illisible)
+    """
+    try:
+        with open(MANIFEST_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _write_manifest(manifest: Dict[str, Any]) -> None:
+    """
+    Enregistre le manifeste des MCPs (une erreur d'écriture n'empêche pas le démarrage)
+    
+    Args:
+        manifest: Les entrées du manifeste par nom de fichier
+    """
+    tmp_path = f"{MANIFEST_PATH}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False)
+        os.replace(tmp_path, MANIFEST_PATH)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"AVERTISSEMENT: impossible d'écrire le manifeste des MCPs: {str(e)}")
+
+def _scan_source(path: str) -> Dict[str, Any]:
+    """
+    Lit les métadonnées d'un MCP dans son code source, sans l'importer
+    
+    Le dictionnaire `metadata` doit être un littéral au niveau du module ; sinon
+    le module est importé pour le lire.
+    
+    Args:
+        path: Le chemin du fichier du MCP
+        
+    Returns:
+        L'entrée du manifeste : {"metadata": ..., "source_hash": ...} ou {"error": ...}
+    """
+    try:
+        with open(path, 'rb') as f:
+            source = f.read()
+        source_hash = hashlib.sha256(source).hexdigest()
+        tree = ast.parse(source, filename=path)
+    except OSError as e:
+        return {"error": str(e)}
+    except (SyntaxError, ValueError) as e:
+        return {"error": str(e), "source_hash": source_hash}
+    
+    metadata = None
+    has_run = False
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "run":
+            has_run = True
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if any(isinstance(target, ast.Name) and target.id == "metadata" for target in targets):
+                try:
+                    metadata = ast.literal_eval(node.value)
+                except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                    # Métadonnées calculées : elles seront lues à l'import
+                    return {"dynamic": True, "source_hash": source_hash}
+    
+    if not has_run or metadata is None:
+        return {"error": "le module ne contient pas les attributs requis 'run' et 'metadata'", "source_hash": source_hash}
+    if not isinstance(metadata, dict):
+        return {"error": "le module a les attributs requis mais ils ne sont pas du bon type", "source_hash": source_hash}
+    return {"metadata": metadata, "source_hash": source_hash}
+
+def _execution_settings(name: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Lit la classe d'exécution, les délais et les limites de concurrence d'un MCP dans ses métadonnées
+    
+    Args:
+        name: Le nom du MCP
+        metadata: Les métadonnées du MCP ("execution", "timeout", "batch_timeout",
+            "max_concurrency" et "max_queue")
+        
+    Returns:
+        Les champs 'execution', 'timeout', 'batch_timeout' et 'bulkhead' de l'entrée du registre
+    """
+    execution = metadata.get("execution", "inline")
+    if execution not in EXECUTION_CLASSES:
+        print(f"AVERTISSEMENT: classe d'exécution '{execution}' inconnue pour {name}, exécution inline")
+        execution = "inline"
+    return {
+        'execution': execution,
+        'timeout': metadata.get("timeout", DEFAULT_TIMEOUT),
+        'batch_timeout': metadata.get("batch_timeout", DEFAULT_BATCH_TIMEOUT),
+        # Exécutions simultanées de ce MCP (sans limite propre si max_concurrency est absent)
+        'bulkhead': Bulkhead(name, metadata.get("max_concurrency"), metadata.get("max_queue", DEFAULT_MAX_QUEUE))
+    }
+
+def _input_validator(name: str, metadata: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compile le schéma d'entrée d'un MCP (metadata["input_schema"])
+    
+    Args:
+        name: Le nom du MCP
+        metadata: Les métadonnées du MCP
+        
+    Returns:
+        Le champ 'validate' de l'entrée du registre (None sans schéma ou si le schéma n'est pas valide)
+    """
+    schema = metadata.get("input_schema")
+    if not schema:
+        return {'validate': None}
+    try:
+        return {'validate': compile_schema(schema)}
+    except ValueError as e:
+        print(f"AVERTISSEMENT: schéma d'entrée de {name} ignoré: {str(e)}")
+        return {'validate': None}
+
+def _new_entry(module_name: str, path: str, metadata: Dict[str, Any], source_hash: str) -> Dict[str, Any]:
     """
-    Charge dynamiquement tous les MCPs du dossier mcps
+    Crée l'entrée du registre d'un MCP découvert mais pas encore importé
+    
+    Args:
+        module_name: Le nom du module
+        path: Le chemin du fichier
+        metadata: Les métadonnées du MCP
+        source_hash: L'empreinte SHA-256 du code source
+        
+    Returns:
+        L'entrée du registre
     """
-    # Réinitialiser la liste des MCPs
-    mcps.clear()
+    return {
+        'metadata': metadata,
+        'module': f'mcps.{module_name}',
+        'path': path,
+        'source_hash': source_hash,
+        'loaded': False,
+        **_execution_settings(module_name, metadata),
+        **_input_validator(module_name, metadata)
+    }
+
+def _reimport_module(module_name: str) -> Any:
+    """
+    Réexécute le code d'un module dans un nouvel objet module
+    
+    Contrairement à importlib.reload, le module en service n'est pas modifié : les
+    exécutions en cours gardent l'ancienne version jusqu'au bout, et un code qui
+    échoue à l'import laisse l'ancien module en place. Le nouveau module ne remplace
+    l'ancien dans sys.modules (et dans son package) qu'une fois entièrement exécuté.
     
-    # Obtenir le chemin du dossier des MCPs
-    mcps_dir = os.path.dirname(os.path.abspath(__file__))
+    Args:
+        module_name: Le nom complet du module (ex: "mcps.text_translator")
+        
+    Returns:
+        Le nouveau module
+        
+    Raises:
+        ImportError: Si le module est introuvable
+        Exception: L'erreur levée par le code du module
+    """
+    parent_name, _, child_name = module_name.rpartition('.')
+    parent = sys.modules.get(parent_name) if parent_name else None
+    spec = importlib.machinery.PathFinder.find_spec(module_name, getattr(parent, '__path__', None))
+    if spec is None or spec.loader is None:
+        raise ImportError(f"module {module_name} introuvable")
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    sys.modules[module_name] = module
+    if parent is not None:
+        setattr(parent, child_name, module)
+    return module
+
+def _import_entry(name: str, mcp: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Importe le module d'un MCP et complète son entrée du registre
     
-    # Parcourir tous les fichiers Python dans le dossier
-    for filename in os.listdir(mcps_dir):
+    Args:
+        name: Le nom du MCP
+        mcp: L'entrée du registre
+        
+    Returns:
+        L'entrée complétée
+        
+    Raises:
+        ImportError: Si le module ne peut pas être importé ou n'est pas un MCP valide
+    """
+    with _import_locks_lock:
+        lock = _import_locks.setdefault(name, threading.Lock())
+    with lock:
+        if mcp['loaded']:
+            return mcp
+        start = time.perf_counter()
+        try:
+            module = sys.modules.get(mcp['module'])
+            if module is not None and getattr(module, '__mcp_source_hash__', None) != mcp['source_hash']:
+                # Code modifié depuis l'import précédent : réexécuter le module à côté de l'ancien
+                module = _reimport_module(mcp['module'])
+            else:
+                module = importlib.import_module(mcp['module'])
+            module.__mcp_source_hash__ = mcp['source_hash']
+        except Exception as e:
+            import_stats[name] = {"import_time": time.perf_counter() - start, "imported_at": time.time(), "error": str(e)}
+            print(f"ERREUR lors du chargement du MCP {name}: {str(e)}")
+            raise ImportError(f"MCP '{name}' non chargé: {str(e)}") from e
+        elapsed = time.perf_counter() - start
+        
+        if not (callable(getattr(module, 'run', None)) and isinstance(getattr(module, 'metadata', None), dict)):
+            import_stats[name] = {"import_time": elapsed, "imported_at": time.time(), "error": "attributs requis manquants"}
+            raise ImportError(f"MCP '{name}' non valide: attributs requis 'run' et 'metadata' manquants")
+        
+        discovered_metadata = mcp['metadata']
+        mcp.update({
+            'run': module.run,
+            'metadata': module.metadata,
+            # Un MCP peut déclarer "async def run" pour le chemin asynchrone
+            'is_async': inspect.iscoroutinefunction(module.run),
+            # Traitement par lots natif optionnel : run_batch(inputs) -> résultats
+            'run_batch': getattr(module, 'run_batch', None) if callable(getattr(module, 'run_batch', None)) else None,
+            # Filtre optionnel des résultats à mettre en cache : is_cacheable(result) -> bool
+            'is_cacheable': getattr(module, 'is_cacheable', None) if callable(getattr(module, 'is_cacheable', None)) else None,
+            'loaded': True
+        })
+        if module.metadata != discovered_metadata:
+            # Métadonnées calculées à l'import : relire la classe d'exécution
+            mcp.update(_execution_settings(name, module.metadata))
+            mcp.update(_input_validator(name, module.metadata))
+        import_stats[name] = {"import_time": elapsed, "imported_at": time.time(), "error": None}
+        print(f"MCP importé: {name} ({elapsed * 1000:.1f} ms)")
+        return mcp
+
+def _get_loaded_mcp(name: str) -> Dict[str, Any]:
+    """
+    Récupère un MCP prêt à être exécuté, en important son module à la première utilisation
+    
+    Args:
+        name: Le nom du MCP
+        
+    Returns:
+        L'entrée complète du registre
+        
+    Raises:
+        ValueError: Si le MCP n'existe pas ou ne peut pas être importé
+    """
+    mcp = get_mcp(name)
+    if mcp is None:
+        raise ValueError(f"MCP '{name}' non trouvé")
+    if not mcp['loaded']:
+        try:
+            _import_entry(name, mcp)
+        except ImportError as e:
+            raise ValueError(str(e)) from e
+    return mcp
+
+def load_mcps():
+    """
+    Découvre les MCPs du dossier mcps et met le registre à jour de manière incrémentale
+    
+    Les métadonnées sont lues dans le code source (ou reprises du manifeste si le
+    fichier n'a pas changé) ; chaque module n'est importé qu'à sa première exécution.
+    Un MCP dont le code est inchangé garde son entrée (et son module importé) ; un MCP
+    modifié déjà importé est réexécuté dans un nouveau module, puis son entrée est
+    remplacée d'un bloc : une exécution en cours ne voit jamais de registre incomplet.
+    """
+    start = time.perf_counter()
+    previous_manifest = _read_manifest()
+    manifest = dict(previous_manifest)
+    
+    # Fichiers à analyser : absents du manifeste ou modifiés depuis
+    files = {}
+    for filename in sorted(os.listdir(MCPS_DIR)):
         if filename.endswith('.py') and filename != '__init__.py':
-            module_name = filename[:-3]  # Enlever l'extension .py
-            
+            path = os.path.join(MCPS_DIR, filename)
             try:
-                # Importer le module dynamiquement
-                module = importlib.import_module(f'mcps.{module_name}')
-                
-                # Vérifier si le module a les attributs requis
-                if hasattr(module, 'run') and hasattr(module, 'metadata'):
-                    if callable(module.run) and isinstance(module.metadata, dict):
-                        # Ajouter le MCP à la liste
-                        mcps[module_name] = {
-                            'run': module.run,
-                            'metadata': module.metadata
-                        }
-                        print(f"MCP chargé: {module_name}")
-                    else:
-                        print(f"AVERTISSEMENT: {module_name} a les attributs requis mais ils ne sont pas du bon type")
-                else:
-                    print(f"AVERTISSEMENT: {module_name} ne contient pas les attributs requis 'run' et 'metadata'")
-            except Exception as e:
-                print(f"ERREUR lors du chargement du MCP {module_name}: {str(e)}")
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files[filename] = (path, stat.st_mtime_ns, stat.st_size)
+    
+    stale = [
+        filename for filename, (path, mtime_ns, size) in files.items()
+        if (manifest.get(filename, {}).get("mtime_ns"), manifest.get(filename, {}).get("size")) != (mtime_ns, size)
+        or "source_hash" not in manifest[filename]
+    ]
+    # Les fichiers modifiés sont analysés en parallèle
+    for filename, entry in zip(stale, get_executor().map(lambda f: _scan_source(files[f][0]), stale)):
+        entry["mtime_ns"], entry["size"] = files[filename][1], files[filename][2]
+        manifest[filename] = entry
+    
+    changed = []
+    for filename, (path, _, _) in files.items():
+        module_name = filename[:-3]  # Enlever l'extension .py
+        entry = manifest[filename]
+        current = mcps.get(module_name)
+        if current is not None and current['source_hash'] == entry.get("source_hash"):
+            continue
+        if "error" in entry:
+            # Un MCP en service garde sa version précédente
+            print(f"AVERTISSEMENT: {module_name} ignoré: {entry['error']}")
+            continue
+        mcp = _new_entry(module_name, path, entry.get("metadata", {}), entry.get("source_hash"))
+        if entry.get("dynamic") or (current is not None and current['loaded']):
+            # Métadonnées non littérales, ou module en service : (re)charger tout de suite
+            try:
+                _import_entry(module_name, mcp)
+            except ImportError:
+                continue
+        # Remplacement atomique de l'entrée : les exécutions en cours gardent l'ancienne
+        mcps[module_name] = mcp
+        changed.append(module_name)
+    
+    removed = [name for name in list(mcps) if f"{name}.py" not in files]
+    for name in removed:
+        mcps.pop(name, None)
+    
+    # Ne garder dans le manifeste que les fichiers existants
+    manifest = {filename: manifest[filename] for filename in files}
+    if manifest != previous_manifest:
+        _write_manifest(manifest)
+    
+    discovery_stats.update({
+        "discovery_time": time.perf_counter() - start,
+        "discovered": len(mcps),
+        "scanned": len(stale),
+        "changed": changed,
+        "removed": removed,
+        "discovered_at": time.time()
+    })
+    if changed or removed:
+        print(f"MCPs mis à jour: {', '.join(changed) or 'aucun'}" + (f" ; retirés: {', '.join(removed)}" if removed else ""))
+    
+    if PRELOAD:
+        preload_mcps()
     
+    _discovered.set()
     return mcps
 
+def _directory_snapshot() -> Dict[str, Any]:
+    """
+    Empreinte du dossier des MCPs (date et taille de chaque fichier)
+    
+    Returns:
+        Le nom de chaque fichier Python associé à sa date et sa taille
+    """
+    snapshot = {}
+    for filename in os.listdir(MCPS_DIR):
+        if filename.endswith('.py') and filename != '__init__.py':
+            try:
+                stat = os.stat(os.path.join(MCPS_DIR, filename))
+            except OSError:
+                continue
+            snapshot[filename] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+# Surveillance du dossier des MCPs (rechargement à chaud)
+_watcher: Optional[threading.Thread] = None
+_watcher_stop = threading.Event()
+
+def start_watcher(interval: float = 2.0) -> None:
+    """
+    Surveille le dossier des MCPs dans un thread d'arrière-plan et recharge
+    les modules modifiés, ajoutés ou supprimés
+    
+    Args:
+        interval: Intervalle entre deux vérifications (secondes)
+    """
+    global _watcher
+    if _watcher is not None and _watcher.is_alive():
+        return
+    _watcher_stop.clear()
+    
+    def watch():
+        snapshot = _directory_snapshot()
+        while not _watcher_stop.wait(interval):
+            current = _directory_snapshot()
+            if current != snapshot:
+                snapshot = current
+                try:
+                    load_mcps()
+                except Exception as e:
+                    print(f"ERREUR lors du rechargement des MCPs: {str(e)}")
+    
+    _watcher = threading.Thread(target=watch, name="mcp-watcher", daemon=True)
+    _watcher.start()
+
+def stop_watcher() -> None:
+    """Arrête la surveillance du dossier des MCPs."""
+    _watcher_stop.set()
+
+def preload_mcps(names: Optional[List[str]] = None) -> None:
+    """
+    Importe en parallèle les modules de MCPs pas encore importés
+    
+    Args:
+        names: Les MCPs à importer (par défaut, tous)
+    """
+    pending = [(name, mcps[name]) for name in (names or list(mcps)) if name in mcps and not mcps[name]['loaded']]
+    
+    def load(item):
+        try:
+            _import_entry(*item)
+        except ImportError:
+            pass
+    
+    list(get_executor().map(load, pending))
+
+def get_import_stats() -> Dict[str, Any]:
+    """
+    Récupère les durées de découverte et d'import des MCPs
+    
+    Returns:
+        La découverte (durée, nombre de fichiers analysés) et, par MCP, l'état, la classe
+        d'exécution et la durée d'import
+    """
+    return {
+        "discovery": dict(discovery_stats),
+        "mcps": {
+            name: {
+                "loaded": mcp['loaded'],
+                "execution": mcp['execution'],
+                "timeout": mcp['timeout'],
+                **import_stats.get(name, {})
+            }
+            for name, mcp in list(mcps.items())
+        }
+    }
+
+def get_limit_stats() -> Dict[str, Any]:
+    """
+    Récupère l'occupation des limites de concurrence des MCPs
+    
+    Returns:
+        Les exécutions en cours tous MCPs confondus et, par MCP, sa cloison (en cours, en attente, rejets, délais dépassés)
+    """
+    return {
+        "admission": {"max_in_flight": admission.limit, "in_flight": admission.in_flight, "rejected": admission.rejected},
+        "mcps": {name: {"timeout": mcp['timeout'], **mcp['bulkhead'].get_stats()} for name, mcp in list(mcps.items())}
+    }
+
 def get_mcp(name: str) -> Optional[Dict[str, Any]]:
     """
     Récupère un MCP par son nom
@@ -67,6 +560,8 @@ def get_mcp(name: str) -> Optional[Dict[str, Any]]:
     Returns:
         Le MCP ou None s'il n'existe pas
     """
+    if not _discovered.is_set():
+        load_mcps()
     return mcps.get(name, None)
 
 def get_all_mcps() -> Dict[str, Dict[str, Any]]:
@@ -76,8 +571,313 @@ def get_all_mcps() -> Dict[str, Dict[str, Any]]:
     Returns:
         Un dictionnaire de tous les MCPs
     """
+    if not _discovered.is_set():
+        load_mcps()
     return mcps
 
+def _cache_settings(mcp: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Récupère la configuration de cache d'un MCP
+    
+    Le cache est activé par metadata["cache"] = True ou {"enabled": True, "ttl": secondes}.
+    
+    Args:
+        mcp: Le MCP
+        
+    Returns:
+        La configuration de cache, ou None si le cache est désactivé pour ce MCP
+    """
+    settings = mcp['metadata'].get("cache", False)
+    if not CACHE_ENABLED or not settings:
+        return None
+    if settings is True:
+        return {}
+    if isinstance(settings, dict) and settings.get("enabled", True):
+        return settings
+    return None
+
+def _cache_lookup(name: str, mcp: Dict[str, Any], input_data: Dict[str, Any]):
+    """
+    Cherche le résultat d'un MCP dans le cache
+    
+    Args:
+        name: Le nom du MCP
+        mcp: Le MCP
+        input_data: Les données d'entrée
+        
+    Returns:
+        Le triplet (clé de cache ou None si le cache est désactivé, trouvé, résultat)
+    """
+    if _cache_settings(mcp) is None:
+        return None, False, None
+    # L'empreinte du code invalide le cache quand un MCP est rechargé sans changer de version
+    key = make_cache_key(f"mcp:{name}", f"{mcp['metadata'].get('version', '')}:{mcp['source_hash']}", input_data)
+    found, result = response_cache.get(key)
+    counters = cache_stats.setdefault(name, {"hits": 0, "misses": 0})
+    counters["hits" if found else "misses"] += 1
+    # Copie superficielle : un appelant qui modifie le résultat ne corrompt pas le cache
+    return key, found, dict(result) if found else None
+
+def _cache_store(name: str, mcp: Dict[str, Any], key: Optional[str], result: Any) -> None:
+    """
+    Enregistre le résultat d'un MCP dans le cache (les erreurs ne sont jamais mises en cache)
+    
+    Args:
+        name: Le nom du MCP
+        mcp: Le MCP
+        key: La clé de cache retournée par _cache_lookup
+        result: Le résultat à enregistrer
+    """
+    if key is None or not isinstance(result, dict) or "error" in result:
+        return
+    if mcp['is_cacheable'] and not mcp['is_cacheable'](result):
+        return
+    response_cache.set(key, result, _cache_settings(mcp).get("ttl"))
+
+def get_cache_stats() -> Dict[str, Any]:
+    """
+    Récupère les compteurs du cache des MCPs
+    
+    Returns:
+        Les compteurs globaux du cache et les succès/échecs par MCP
+    """
+    return {
+        "enabled": CACHE_ENABLED,
+        "cache": response_cache.get_stats(),
+        "mcps": {name: dict(counters) for name, counters in cache_stats.items()}
+    }
+
+def _init_process_worker(module_names: List[str]) -> None:
+    """
+    Initialise un processus du pool en important les modules des MCPs "process"
+    
+    Args:
+        module_names: Les modules à importer
+    """
+    for module_name in module_names:
+        try:
+            importlib.import_module(module_name)
+        except Exception as e:
+            print(f"ERREUR lors du préchargement de {module_name} dans le processus {os.getpid()}: {str(e)}")
+
+def _call_in_worker(module_name: str, source_hash: str, func_name: str, arg: Any, timeout: Optional[float] = None) -> Any:
+    """
+    Exécute une fonction d'un MCP dans un processus du pool
+    
+    Args:
+        module_name: Le module du MCP
+        source_hash: L'empreinte du code attendue (le module est rechargé s'il a changé)
+        func_name: "run" ou "run_batch"
+        arg: L'argument de la fonction
+        timeout: Le temps restant avant l'instant limite de l'appelant (propagé aux appels HTTP)
+        
+    Returns:
+        Le résultat de la fonction
+    """
+    module = sys.modules.get(module_name)
+    if module is None:
+        module = importlib.import_module(module_name)
+    elif getattr(module, '__mcp_source_hash__', source_hash) != source_hash:
+        module = _reimport_module(module_name)
+    module.__mcp_source_hash__ = source_hash
+    with deadline_scope(timeout) as deadline:
+        result = getattr(module, func_name)(arg)
+        if inspect.iscoroutine(result):
+            result = asyncio.run(run_with_deadline(result, deadline))
+    return result
+
+def _process_modules() -> List[str]:
+    """
+    Liste les modules des MCPs de classe "process"
+    
+    Returns:
+        Les noms des modules, importés au démarrage de chaque processus du pool
+    """
+    return [mcp['module'] for mcp in list(mcps.values()) if mcp['execution'] == "process"]
+
+def _submit_process(mcp: Dict[str, Any], func_name: str, arg: Any) -> Future:
+    """
+    Soumet l'exécution d'un MCP au pool de processus
+    
+    Un pool cassé (processus tué) est recréé et la soumission retentée une fois.
+    
+    Args:
+        mcp: Le MCP
+        func_name: "run" ou "run_batch"
+        arg: L'argument de la fonction
+        
+    Returns:
+        Le futur du résultat
+    """
+    for attempt in range(2):
+        try:
+            pool = get_process_pool(_init_process_worker, (_process_modules(),))
+            return pool.submit(_call_in_worker, mcp['module'], mcp['source_hash'], func_name, arg, remaining_time())
+        except BrokenProcessPool:
+            if attempt:
+                raise
+            print("AVERTISSEMENT: pool de processus des MCPs interrompu, redémarrage")
+            reset_process_pool()
+
+def _warm_process_pool() -> None:
+    """Démarre tous les processus du pool (qui importent les MCPs "process") sans attendre une exécution."""
+    try:
+        pool = get_process_pool(_init_process_worker, (_process_modules(),))
+        for future in [pool.submit(os.getpid) for _ in range(process_pool_size())]:
+            future.result()
+    except Exception as e:
+        print(f"AVERTISSEMENT: préchauffage du pool de processus impossible: {str(e)}")
+
+def _wait_future(future: Future) -> Any:
+    """
+    Attend le résultat d'un futur jusqu'à l'instant limite courant
+    
+    Args:
+        future: Le futur
+        
+    Returns:
+        Le résultat
+        
+    Raises:
+        DeadlineExceeded: Si l'instant limite est dépassé (le futur est annulé s'il n'a pas démarré)
+    """
+    try:
+        return future.result(timeout=remaining_time())
+    except FutureTimeoutError:
+        future.cancel()
+        raise DeadlineExceeded("délai d'exécution dépassé") from None
+
+def _dispatch(mcp: Dict[str, Any], func_name: str, arg: Any, background: List[Future]) -> Any:
+    """
+    Exécute une fonction d'un MCP selon sa classe d'exécution, depuis du code synchrone
+    
+    Un MCP inline s'exécute dans le thread appelant : son délai ne s'applique
+    qu'à ses appels HTTP (client partagé) et aux vérifications qu'il fait lui-même.
+    
+    Args:
+        mcp: Le MCP
+        func_name: "run" ou "run_batch"
+        arg: L'argument de la fonction
+        background: Reçoit le futur du travail confié à l'exécuteur ou au pool de processus,
+            qui peut se poursuivre après l'instant limite
+        
+    Returns:
+        Le résultat de la fonction
+    """
+    func = mcp[func_name]
+    if mcp['execution'] == "process":
+        background.append(_submit_process(mcp, func_name, arg))
+        return _wait_future(background[0])
+    if inspect.iscoroutinefunction(func):
+        # Les MCPs asynchrones s'exécutent sur la boucle partagée, annulés à l'instant limite
+        return run_coroutine(run_with_deadline(func(arg), get_deadline()))
+    if mcp['execution'] == "thread" and not in_executor():
+        background.append(get_executor().submit(contextvars.copy_context().run, func, arg))
+        return _wait_future(background[0])
+    return func(arg)
+
+async def _dispatch_async(mcp: Dict[str, Any], func_name: str, arg: Any, background: List[Future]) -> Any:
+    """
+    Exécute une fonction d'un MCP selon sa classe d'exécution, depuis une boucle d'événements
+    
+    Args:
+        mcp: Le MCP
+        func_name: "run" ou "run_batch"
+        arg: L'argument de la fonction
+        background: Reçoit le futur du travail confié à l'exécuteur ou au pool de processus,
+            qui peut se poursuivre après l'instant limite
+        
+    Returns:
+        Le résultat de la fonction
+    """
+    func = mcp[func_name]
+    if mcp['execution'] == "process":
+        background.append(_submit_process(mcp, func_name, arg))
+        return await asyncio.wrap_future(background[0])
+    if inspect.iscoroutinefunction(func):
+        return await func(arg)
+    # Contexte de l'appelant (délai d'exécution) transmis à la fonction, comme run_sync
+    background.append(get_executor().submit(contextvars.copy_context().run, func, arg))
+    return await asyncio.wrap_future(background[0])
+
+def _release_when_done(background: List[Future], release: Callable[[], None]) -> None:
+    """
+    Libère une place à la fin du travail confié à l'exécuteur ou au pool de processus
+    
+    Un appelant qui abandonne à l'instant limite ne libère pas la place d'un travail
+    qui continue : un MCP lent ne peut pas occuper davantage d'exécuteurs que sa limite.
+    
+    Args:
+        background: Le futur du travail (vide si la fonction s'est exécutée dans l'appelant)
+        release: La fonction qui libère la place
+    """
+    if background:
+        # Appelée tout de suite si le futur est terminé (ou annulé avant de démarrer)
+        background[0].add_done_callback(lambda _: release())
+    else:
+        release()
+
+def _invoke(mcp: Dict[str, Any], func_name: str, arg: Any, timeout: Optional[float]) -> Any:
+    """
+    Exécute une fonction d'un MCP sous son délai et ses limites de concurrence
+    
+    Args:
+        mcp: Le MCP
+        func_name: "run" ou "run_batch"
+        arg: L'argument de la fonction
+        timeout: Le délai d'exécution en secondes, attente d'une place comprise
+        
+    Returns:
+        Le résultat de la fonction
+        
+    Raises:
+        Rejected: Si le service ou le MCP est saturé
+        DeadlineExceeded: Si le délai est dépassé
+    """
+    admission.enter()
+    background: List[Future] = []
+    try:
+        with deadline_scope(timeout):
+            mcp['bulkhead'].acquire()
+            try:
+                return _dispatch(mcp, func_name, arg, background)
+            finally:
+                _release_when_done(background, mcp['bulkhead'].release)
+    finally:
+        _release_when_done(background, admission.leave)
+
+async def _invoke_async(mcp: Dict[str, Any], func_name: str, arg: Any, timeout: Optional[float]) -> Any:
+    """
+    Exécute une fonction d'un MCP sous son délai et ses limites de concurrence, depuis une boucle d'événements
+    
+    À l'instant limite, l'exécution est annulée (la coroutine d'un MCP asynchrone,
+    ou le travail pas encore démarré dans l'exécuteur ou le pool de processus).
+    
+    Args:
+        mcp: Le MCP
+        func_name: "run" ou "run_batch"
+        arg: L'argument de la fonction
+        timeout: Le délai d'exécution en secondes, attente d'une place comprise
+        
+    Returns:
+        Le résultat de la fonction
+        
+    Raises:
+        Rejected: Si le service ou le MCP est saturé
+        DeadlineExceeded: Si le délai est dépassé
+    """
+    admission.enter()
+    background: List[Future] = []
+    try:
+        with deadline_scope(timeout) as deadline:
+            await mcp['bulkhead'].acquire_async()
+            try:
+                return await run_with_deadline(_dispatch_async(mcp, func_name, arg, background), deadline)
+            finally:
+                _release_when_done(background, mcp['bulkhead'].release)
+    finally:
+        _release_when_done(background, admission.leave)
+
 def execute_mcp(name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Exécute un MCP avec les données d'entrée fournies
@@ -91,16 +891,566 @@ def execute_mcp(name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
     
     Raises:
         ValueError: Si le MCP n'existe pas
+        Rejected: Si le service ou le MCP est saturé (429/503)
+        DeadlineExceeded: Si le délai d'exécution du MCP est dépassé (504)
+        SchemaError: Si l'entrée n'est pas conforme au schéma du MCP (400)
     """
-    mcp = get_mcp(name)
-    if mcp is None:
-        raise ValueError(f"MCP '{name}' non trouvé")
+    mcp = _get_loaded_mcp(name)
+    
+    # Entrée validée et convertie avant toute exécution (et avant le calcul de la clé de cache)
+    if mcp['validate'] is not None:
+        input_data = mcp['validate'](input_data)
+    
+    key, found, cached = _cache_lookup(name, mcp, input_data)
+    if found:
+        return cached
     
     try:
-        result = mcp['run'](input_data)
-        return result
+        result = _invoke(mcp, 'run', input_data, mcp['timeout'])
+    except (Rejected, DeadlineExceeded):
+        raise
     except Exception as e:
         return {"error": str(e)}
+    
+    _cache_store(name, mcp, key, result)
+    return result
+
+async def execute_mcp_async(name: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Exécute un MCP depuis une boucle d'événements
+    
+    Les MCPs asynchrones sont attendus directement ; les MCPs synchrones
+    s'exécutent dans l'exécuteur borné pour ne pas bloquer la boucle.
+    
+    Args:
+        name: Le nom du MCP à exécuter
+        input_data: Les données d'entrée pour le MCP
+        
+    Returns:
+        Le résultat de l'exécution du MCP
+    
+    Raises:
+        ValueError: Si le MCP n'existe pas
+        Rejected: Si le service ou le MCP est saturé (429/503)
+        DeadlineExceeded: Si le délai d'exécution du MCP est dépassé (504)
+        SchemaError: Si l'entrée n'est pas conforme au schéma du MCP (400)
+    """
+    mcp = _get_loaded_mcp(name)
+    
+    # Entrée validée et convertie avant toute exécution (et avant le calcul de la clé de cache)
+    if mcp['validate'] is not None:
+        input_data = mcp['validate'](input_data)
+    
+    key, found, cached = _cache_lookup(name, mcp, input_data)
+    if found:
+        return cached
+    
+    try:
+        result = await _invoke_async(mcp, 'run', input_data, mcp['timeout'])
+    except (Rejected, DeadlineExceeded):
+        raise
+    except Exception as e:
+        return {"error": str(e)}
+    
+    _cache_store(name, mcp, key, result)
+    return result
+
+def _execute_item(name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Exécute un MCP sur un élément d'un lot ou d'un flux (un rejet ou un délai dépassé devient une erreur à sa position)
+    
+    Args:
+        name: Le nom du MCP
+        item: Les données d'entrée de l'élément
+        
+    Returns:
+        Le résultat de l'élément
+    """
+    try:
+        return execute_mcp(name, item)
+    except (Rejected, DeadlineExceeded, SchemaError) as e:
+        return {"error": str(e), "status": e.status_code}
+
+async def _execute_item_async(name: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Exécute un MCP sur un élément d'un lot ou d'un flux depuis une boucle d'événements
+    
+    Args:
+        name: Le nom du MCP
+        item: Les données d'entrée de l'élément
+        
+    Returns:
+        Le résultat de l'élément
+    """
+    try:
+        return await execute_mcp_async(name, item)
+    except (Rejected, DeadlineExceeded, SchemaError) as e:
+        return {"error": str(e), "status": e.status_code}
+
+def _split_batch(mcp: Dict[str, Any], inputs: List[Any]):
+    """
+    Sépare les éléments valides d'un lot (objets JSON non vides, conformes au schéma du MCP) des autres
+    
+    Args:
+        mcp: Le MCP
+        inputs: La liste des données d'entrée
+        
+    Returns:
+        Le triplet (résultats pré-remplis d'erreurs, index valides, entrées valides et converties)
+    """
+    results: List[Optional[Dict[str, Any]]] = []
+    valid_indexes, valid_inputs = [], []
+    for index, item in enumerate(inputs):
+        if not isinstance(item, dict) or not item:
+            results.append({"error": "Données d'entrée manquantes ou non valides"})
+            continue
+        if mcp['validate'] is not None:
+            try:
+                item = mcp['validate'](item)
+            except SchemaError as e:
+                results.append({"error": str(e), "status": e.status_code})
+                continue
+        results.append(None)
+        valid_indexes.append(index)
+        valid_inputs.append(item)
+    return results, valid_indexes, valid_inputs
+
+def _check_batch_results(name: str, batch_results: Any, expected: int) -> Optional[List[Dict[str, Any]]]:
+    """
+    Vérifie que run_batch a retourné un résultat par entrée
+    
+    Args:
+        name: Le nom du MCP
+        batch_results: Les résultats retournés par run_batch
+        expected: Le nombre d'entrées transmises
+        
+    Returns:
+        Les résultats, ou None s'ils ne correspondent pas aux entrées
+    """
+    if not isinstance(batch_results, list) or len(batch_results) != expected:
+        print(f"AVERTISSEMENT: run_batch de {name} n'a pas retourné un résultat par entrée")
+        return None
+    return batch_results
+
+def _resolve_batch_from_cache(name: str, mcp: Dict[str, Any], results: List[Any], valid_indexes: List[int], valid_inputs: List[Dict[str, Any]]):
+    """
+    Remplit les résultats d'un lot déjà présents dans le cache
+    
+    Args:
+        name: Le nom du MCP
+        mcp: Le MCP
+        results: Les résultats du lot, complétés sur place
+        valid_indexes: Les index des entrées valides
+        valid_inputs: Les entrées valides
+        
+    Returns:
+        Le triplet (clés de cache, index restants, entrées restantes) des entrées à calculer
+    """
+    keys, remaining_indexes, remaining_inputs = [], [], []
+    for index, item in zip(valid_indexes, valid_inputs):
+        key, found, cached = _cache_lookup(name, mcp, item)
+        if found:
+            results[index] = cached
+        else:
+            keys.append(key)
+            remaining_indexes.append(index)
+            remaining_inputs.append(item)
+    return keys, remaining_indexes, remaining_inputs
+
+def execute_mcp_batch(name: str, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Exécute un MCP sur une liste d'entrées
+    
+    Utilise la fonction run_batch du MCP si elle existe, sinon répartit les
+    entrées sur l'exécuteur partagé. Une erreur sur un élément produit un
+    résultat {"error": ...} à sa position sans faire échouer le lot.
+    
+    Args:
+        name: Le nom du MCP à exécuter
+        inputs: La liste des données d'entrée
+        
+    Returns:
+        La liste des résultats, dans l'ordre des entrées
+    
+    Raises:
+        ValueError: Si le MCP n'existe pas
+        Rejected: Si le service ou le MCP est saturé pour le traitement par lot natif
+        DeadlineExceeded: Si le délai du traitement par lot natif est dépassé
+    """
+    mcp = _get_loaded_mcp(name)
+    
+    # Les MCPs asynchrones sont traités en un seul passage sur la boucle partagée
+    # (sauf dans le pool de processus, où ils ont leur propre boucle)
+    if mcp['execution'] != "process" and (mcp['is_async'] or inspect.iscoroutinefunction(mcp['run_batch'])):
+        return run_coroutine(execute_mcp_batch_async(name, inputs))
+    
+    results, valid_indexes, valid_inputs = _split_batch(mcp, inputs)
+    
+    batch_results = None
+    if mcp['run_batch'] and valid_inputs:
+        # Seules les entrées absentes du cache sont transmises au traitement par lot natif
+        keys, valid_indexes, valid_inputs = _resolve_batch_from_cache(name, mcp, results, valid_indexes, valid_inputs)
+        try:
+            batch_results = _check_batch_results(
+                name, _invoke(mcp, 'run_batch', valid_inputs, mcp['batch_timeout']), len(valid_inputs)
+            ) if valid_inputs else []
+        except (Rejected, DeadlineExceeded):
+            # Saturation ou délai dépassé : le lot entier est refusé, sans repli élément par élément
+            raise
+        except Exception as e:
+            # Un échec global du lot natif se replie sur l'exécution élément par élément
+            print(f"ERREUR lors de l'exécution par lot du MCP {name}: {str(e)}")
+        if batch_results is not None:
+            for key, result in zip(keys, batch_results):
+                _cache_store(name, mcp, key, result)
+    
+    if batch_results is None:
+        batch_results = list(get_executor().map(lambda item: _execute_item(name, item), valid_inputs))
+    
+    for index, result in zip(valid_indexes, batch_results):
+        results[index] = result
+    return results
+
+async def execute_mcp_batch_async(name: str, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Exécute un MCP sur une liste d'entrées depuis une boucle d'événements
+    
+    Même contrat que execute_mcp_batch : run_batch natif si disponible,
+    sinon une exécution concurrente par élément.
+    
+    Args:
+        name: Le nom du MCP à exécuter
+        inputs: La liste des données d'entrée
+        
+    Returns:
+        La liste des résultats, dans l'ordre des entrées
+    
+    Raises:
+        ValueError: Si le MCP n'existe pas
+        Rejected: Si le service ou le MCP est saturé pour le traitement par lot natif
+        DeadlineExceeded: Si le délai du traitement par lot natif est dépassé
+    """
+    mcp = _get_loaded_mcp(name)
+    
+    results, valid_indexes, valid_inputs = _split_batch(mcp, inputs)
+    
+    batch_results = None
+    if mcp['run_batch'] and valid_inputs:
+        keys, valid_indexes, valid_inputs = _resolve_batch_from_cache(name, mcp, results, valid_indexes, valid_inputs)
+        try:
+            if not valid_inputs:
+                batch_results = []
+            else:
+                batch_results = _check_batch_results(
+                    name, await _invoke_async(mcp, 'run_batch', valid_inputs, mcp['batch_timeout']), len(valid_inputs)
+                )
+        except (Rejected, DeadlineExceeded):
+            raise
+        except Exception as e:
+            print(f"ERREUR lors de l'exécution par lot du MCP {name}: {str(e)}")
+        if batch_results is not None:
+            for key, result in zip(keys, batch_results):
+                _cache_store(name, mcp, key, result)
+    
+    if batch_results is None:
+        # Pas plus d'éléments en vol que de places dans la cloison du MCP : le lot ne remplit pas sa file d'attente
+        limit = asyncio.Semaphore(mcp['bulkhead'].max_concurrency or max(len(valid_inputs), 1))
+        
+        async def process(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with limit:
+                return await _execute_item_async(name, item)
+        
+        batch_results = await asyncio.gather(*[process(item) for item in valid_inputs])
+    
+    for index, result in zip(valid_indexes, batch_results):
+        results[index] = result
+    return results
+
+def _invalid_stream_item() -> Dict[str, Any]:
+    """
+    Construit le résultat d'un élément de flux non valide
+    
+    Returns:
+        Le dictionnaire d'erreur
+    """
+    return {"error": "Données d'entrée manquantes ou non valides"}
+
+def execute_mcp_stream(name: str, inputs: Iterable[Any], window: int = 32) -> Iterator[Dict[str, Any]]:
+    """
+    Exécute un MCP sur un flux d'entrées avec une fenêtre bornée
+    
+    Au plus `window` entrées sont en cours de traitement : l'entrée suivante
+    n'est lue qu'une fois le plus ancien résultat produit, ce qui borne la
+    mémoire et propage la contre-pression jusqu'au producteur du flux.
+    Les résultats sont produits dans l'ordre des entrées.
+    
+    Args:
+        name: Le nom du MCP à exécuter
+        inputs: Les données d'entrée, consommées au fur et à mesure
+        window: Le nombre maximal d'entrées traitées simultanément
+        
+    Returns:
+        Un itérateur sur les résultats
+    
+    Raises:
+        ValueError: Si le MCP n'existe pas
+    """
+    mcp = _get_loaded_mcp(name)
+    
+    def submit(item: Any) -> Future:
+        if not isinstance(item, dict) or not item:
+            future = Future()
+            future.set_result(_invalid_stream_item())
+            return future
+        if mcp['is_async'] and mcp['execution'] != "process":
+            return asyncio.run_coroutine_threadsafe(_execute_item_async(name, item), get_loop())
+        return get_executor().submit(_execute_item, name, item)
+    
+    in_flight = deque()
+    try:
+        for item in inputs:
+            in_flight.append(submit(item))
+            if len(in_flight) >= window:
+                yield in_flight.popleft().result()
+        while in_flight:
+            yield in_flight.popleft().result()
+    finally:
+        # Flux interrompu (client déconnecté) : abandonner le travail non démarré
+        for future in in_flight:
+            future.cancel()
+
+async def execute_mcp_stream_async(name: str, inputs: AsyncIterable[Any], window: int = 32) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Exécute un MCP sur un flux asynchrone d'entrées avec une fenêtre bornée
+    
+    Même contrat que execute_mcp_stream, depuis une boucle d'événements.
+    
+    Args:
+        name: Le nom du MCP à exécuter
+        inputs: Les données d'entrée, consommées au fur et à mesure
+        window: Le nombre maximal d'entrées traitées simultanément
+        
+    Returns:
+        Un itérateur asynchrone sur les résultats
+    
+    Raises:
+        ValueError: Si le MCP n'existe pas
+    """
+    _get_loaded_mcp(name)
+    
+    async def process(item: Any) -> Dict[str, Any]:
+        if not isinstance(item, dict) or not item:
+            return _invalid_stream_item()
+        return await _execute_item_async(name, item)
+    
+    in_flight = deque()
+    try:
+        async for item in inputs:
+            in_flight.append(asyncio.ensure_future(process(item)))
+            if len(in_flight) >= window:
+                yield await in_flight.popleft()
+        while in_flight:
+            yield await in_flight.popleft()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+class _ReduceTree:
+    """
+    Regroupement hiérarchique des résultats d'un traitement par morceaux : les résultats
+    d'un niveau sont concaténés jusqu'à environ `chunk_size` caractères, puis réduits en un
+    résultat du niveau supérieur. La mémoire reste bornée par la taille d'un morceau par niveau.
+    """
+    
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.levels: List[List[str]] = []
+        self.sizes: List[int] = []
+    
+    def add(self, level: int, text: str) -> Optional[tuple]:
+        """
+        Ajoute un résultat à un niveau
+        
+        Returns:
+            Le couple (niveau supérieur, texte à réduire) si le niveau est plein, sinon None
+        """
+        if level == len(self.levels):
+            self.levels.append([])
+            self.sizes.append(0)
+        self.levels[level].append(text)
+        self.sizes[level] += len(text) + 1
+        if self.sizes[level] < self.chunk_size or len(self.levels[level]) < 2:
+            return None
+        combined = " ".join(self.levels[level])
+        self.levels[level], self.sizes[level] = [], 0
+        return level + 1, combined
+    
+    def remaining(self) -> List[str]:
+        """Les résultats non réduits, dans l'ordre du document (les niveaux supérieurs couvrent le début)."""
+        return [text for level in reversed(self.levels) for text in level]
+
+def _map_reduce_settings(name: str, mcp: Dict[str, Any], params: Dict[str, Any]) -> tuple:
+    """
+    Lit les champs d'entrée et de sortie du traitement par morceaux d'un MCP et valide ses paramètres
+    
+    Args:
+        name: Le nom du MCP
+        mcp: Le MCP
+        params: Les paramètres communs à tous les appels (sans le texte)
+        
+    Returns:
+        Le couple (champ du texte en entrée, champ du résultat)
+    
+    Raises:
+        ValueError: Si le MCP ne déclare pas metadata["map_reduce"]
+        SchemaError: Si les paramètres ne sont pas conformes au schéma du MCP
+    """
+    settings = mcp['metadata'].get("map_reduce")
+    if not isinstance(settings, dict):
+        raise ValueError(f"Le MCP '{name}' ne prend pas en charge le traitement par morceaux")
+    input_field, output_field = settings.get("input", "text"), settings.get("output", "summary")
+    if mcp['validate'] is not None:
+        mcp['validate']({**params, input_field: " "})
+    return input_field, output_field
+
+def _reduce_output(name: str, result: Dict[str, Any], output_field: str, step: str) -> str:
+    """
+    Extrait le texte produit par une étape du traitement par morceaux
+    
+    Raises:
+        RuntimeError: Si l'étape a échoué (l'attribut status porte le code HTTP)
+    """
+    if "error" in result or not isinstance(result.get(output_field), str):
+        error = RuntimeError(f"{step} : {result.get('error', f'champ {output_field} absent du résultat de {name}')}")
+        error.status_code = result.get("status", 500)
+        raise error
+    return result[output_field]
+
+def execute_mcp_map_reduce(name: str, chunks: Iterable[str], params: Dict[str, Any], chunk_size: int, window: int = 4) -> Dict[str, Any]:
+    """
+    Exécute un MCP de réduction de texte (un résumeur) sur un document découpé en morceaux
+    
+    Étape map : chaque morceau est traité dès qu'il est lu, au plus `window` à la fois
+    (execute_mcp_stream, en parallèle dans le pool du MCP). Étape reduce : les résultats
+    sont regroupés par paquets d'environ `chunk_size` caractères et traités à nouveau,
+    niveau par niveau, puis le dernier appel produit le résultat final. La mémoire est
+    bornée par (window + niveaux) x chunk_size, quelle que soit la taille du document.
+    
+    Args:
+        name: Le nom du MCP (qui déclare metadata["map_reduce"] = {"input": ..., "output": ...})
+        chunks: Les morceaux du document, consommés au fur et à mesure
+        params: Les paramètres communs à tous les appels (sans le texte)
+        chunk_size: La taille des paquets de la réduction (celle des morceaux)
+        window: Le nombre maximal de morceaux traités simultanément
+        
+    Returns:
+        Le résultat du dernier appel, complété de "map_reduce" (morceaux, caractères lus, appels de réduction)
+    
+    Raises:
+        ValueError: Si le MCP n'existe pas ou ne déclare pas metadata["map_reduce"]
+        SchemaError: Si les paramètres ne sont pas conformes au schéma du MCP
+        Rejected: Si le service ou le MCP est saturé lors d'une réduction
+        DeadlineExceeded: Si le délai d'une réduction est dépassé
+        RuntimeError: Si un morceau ou une réduction échoue (l'attribut status_code porte le code HTTP)
+    """
+    mcp = _get_loaded_mcp(name)
+    input_field, output_field = _map_reduce_settings(name, mcp, params)
+    stats = {"chunks": 0, "input_length": 0, "reduce_calls": 0}
+    
+    def inputs() -> Iterator[Dict[str, Any]]:
+        for chunk in chunks:
+            stats["input_length"] += len(chunk)
+            yield {**params, input_field: chunk}
+    
+    def reduce(text: str) -> Dict[str, Any]:
+        stats["reduce_calls"] += 1
+        return execute_mcp(name, {**params, input_field: text})
+    
+    tree = _ReduceTree(chunk_size)
+    result = None
+    for result in execute_mcp_stream(name, inputs(), window):
+        stats["chunks"] += 1
+        pending = tree.add(0, _reduce_output(name, result, output_field, f"morceau {stats['chunks']}"))
+        while pending:
+            level, text = pending
+            result = reduce(text)
+            pending = tree.add(level, _reduce_output(name, result, output_field, f"réduction de niveau {level}"))
+    
+    # Un seul texte restant : c'est le dernier résultat produit
+    remaining = tree.remaining()
+    if not remaining:
+        raise ValueError("Le document est vide")
+    if len(remaining) > 1:
+        result = reduce(" ".join(remaining))
+        _reduce_output(name, result, output_field, "réduction finale")
+    return {**result, "map_reduce": stats}
+
+async def execute_mcp_map_reduce_async(name: str, chunks: AsyncIterable[str], params: Dict[str, Any], chunk_size: int, window: int = 4) -> Dict[str, Any]:
+    """
+    Exécute un MCP de réduction de texte sur un document découpé en morceaux, depuis une boucle d'événements
+    
+    Même contrat que execute_mcp_map_reduce.
+    
+    Args:
+        name: Le nom du MCP (qui déclare metadata["map_reduce"])
+        chunks: Les morceaux du document, consommés au fur et à mesure
+        params: Les paramètres communs à tous les appels (sans le texte)
+        chunk_size: La taille des paquets de la réduction (celle des morceaux)
+        window: Le nombre maximal de morceaux traités simultanément
+        
+    Returns:
+        Le résultat du dernier appel, complété de "map_reduce"
+    """
+    mcp = _get_loaded_mcp(name)
+    input_field, output_field = _map_reduce_settings(name, mcp, params)
+    stats = {"chunks": 0, "input_length": 0, "reduce_calls": 0}
+    
+    async def inputs() -> AsyncIterator[Dict[str, Any]]:
+        async for chunk in chunks:
+            stats["input_length"] += len(chunk)
+            yield {**params, input_field: chunk}
+    
+    async def reduce(text: str) -> Dict[str, Any]:
+        stats["reduce_calls"] += 1
+        return await execute_mcp_async(name, {**params, input_field: text})
+    
+    tree = _ReduceTree(chunk_size)
+    result = None
+    async for result in execute_mcp_stream_async(name, inputs(), window):
+        stats["chunks"] += 1
+        pending = tree.add(0, _reduce_output(name, result, output_field, f"morceau {stats['chunks']}"))
+        while pending:
+            level, text = pending
+            result = await reduce(text)
+            pending = tree.add(level, _reduce_output(name, result, output_field, f"réduction de niveau {level}"))
+    
+    # Un seul texte restant : c'est le dernier résultat produit
+    remaining = tree.remaining()
+    if not remaining:
+        raise ValueError("Le document est vide")
+    if len(remaining) > 1:
+        result = await reduce(" ".join(remaining))
+        _reduce_output(name, result, output_field, "réduction finale")
+    return {**result, "map_reduce": stats}
+
+def start_services() -> None:
+    """
+    Démarre les services d'arrière-plan des MCPs, à appeler depuis le point d'entrée d'une application
+    
+    - la surveillance du dossier des MCPs si MCP_WATCH_INTERVAL est défini (secondes, 0 pour la désactiver) ;
+    - le préchauffage du pool de processus si des MCPs "process" sont découverts (MCP_PROCESS_WARM).
+    
+    Rien de tout cela n'est démarré à l'import du module : les processus du pool importent
+    ce module eux aussi et ne doivent ni surveiller le dossier ni créer leur propre pool.
+    """
+    watch_interval = float(os.environ.get("MCP_WATCH_INTERVAL", 0))
+    if watch_interval > 0:
+        start_watcher(watch_interval)
+    if PROCESS_WARM and _process_modules():
+        threading.Thread(target=_warm_process_pool, name="mcp-process-warm", daemon=True).start()
 
-# Charger les MCPs au démarrage
-load_mcps()
\ No newline at end of file
+# Charger les MCPs au démarrage, sauf dans un processus enfant (un processus du pool
+# importe ce module pour exécuter un MCP sans avoir besoin du registre) : la découverte
+# y est faite à la première consultation du registre
+if multiprocessing.current_process().name == "MainProcess":
+    load_mcps()
\ No newline at end of file
@@ -1,15 +1,25 @@
 """
 MCP pour analyser le sentiment d'un texte
 """
-from typing import Dict, Any
+import os
+from typing import Dict, Any, List
+
+from utils.lexicon import Lexicon, lexicon_paths
+
+# Lexique fourni avec le MCP, complété par les fichiers de SENTIMENT_LEXICONS (chemins séparés par os.pathsep)
+LEXICON_FILES = [os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons", "sentiment.tsv")]
+
+# Lexique construit une fois par processus, à l'import du module
+lexicon = Lexicon.from_files(lexicon_paths(LEXICON_FILES, "SENTIMENT_LEXICONS"))
 
 metadata = {
     "name": "Analyseur de sentiment",
     "description": "Analyse le sentiment d'un texte et retourne sa polarité",
-    "version": "1.0.0",
+    "version": "1.1.0",
     "author": "Fûinjutsu",
+    "cache": {"enabled": True, "ttl": 3600},
     "input_schema": {
-        "text": "str - Le texte à analyser"
+        "text": {"type": "str", "description": "Le texte à analyser", "required": True, "min_length": 1}
     },
     "output_schema": {
         "sentiment": "str - Le sentiment détecté (positif, négatif, neutre)",
@@ -37,23 +47,50 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
             "error": "Le texte à analyser ne peut pas être vide"
         }
     
-    # Liste de mots-clés positifs et négatifs pour une analyse simplifiée
-    positive_words = ["good", "great", "excellent", "wonderful", "happy", "love", "best", "bien", "bon", "excellent", "merveilleux", "heureux", "aime", "meilleur"]
-    negative_words = ["bad", "terrible", "awful", "horrible", "sad", "hate", "worst", "mauvais", "terrible", "affreux", "horrible", "triste", "déteste", "pire"]
+    # Termes du lexique trouvés dans le texte, en une passe sur ses mots
+    return _analysis(lexicon.score(text))
+
+def run_batch(inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Analyse le sentiment d'un lot de textes
+    
+    Les textes sont découpés en une fois et leurs scores calculés avec NumPy
+    (Lexicon.score_batch) ; chaque résultat est identique à celui de run().
+    
+    Args:
+        inputs: Les données d'entrée, une par texte
+        
+    Returns:
+        Les résultats, dans l'ordre des entrées
+    """
+    texts = [input_data.get("text", "") for input_data in inputs]
+    return [
+        _analysis(weights) if text else {"error": "Le texte à analyser ne peut pas être vide"}
+        for text, weights in zip(texts, lexicon.score_batch(texts))
+    ]
+
+def _analysis(weights: Dict[str, float]) -> Dict[str, Any]:
+    """
+    Construit le résultat de l'analyse à partir des poids des termes trouvés
     
-    # Compter les occurrences de mots positifs et négatifs
-    text_lower = text.lower()
-    positive_count = sum(1 for word in positive_words if word in text_lower)
-    negative_count = sum(1 for word in negative_words if word in text_lower)
+    Args:
+        weights: Les poids et occurrences retournés par le lexique
+        
+    Returns:
+        Le sentiment, le score et l'explication
+    """
+    positive_count = weights["positive_count"]
+    negative_count = weights["negative_count"]
+    balance = weights["positive"] - weights["negative"]
     
     # Déterminer le sentiment
-    if positive_count > negative_count:
+    if balance > 0:
         sentiment = "positif"
-        score = min(1.0, (positive_count - negative_count) / 5)
+        score = min(1.0, balance / 5)
         explanation = f"Le texte contient {positive_count} mot(s) positif(s) et {negative_count} mot(s) négatif(s)."
-    elif negative_count > positive_count:
+    elif balance < 0:
         sentiment = "négatif"
-        score = max(-1.0, (positive_count - negative_count) / 5)
+        score = max(-1.0, balance / 5)
         explanation = f"Le texte contient {negative_count} mot(s) négatif(s) et {positive_count} mot(s) positif(s)."
     else:
         sentiment = "neutre"
@@ -64,4 +101,4 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
         "sentiment": sentiment,
         "score": score,
         "explanation": explanation
-    }
\ No newline at end of file
+    }
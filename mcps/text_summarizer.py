@@ -3,14 +3,23 @@ MCP pour résumer un texte
 """
 from typing import Dict, Any
 
+from utils.textrank import MODES, summarize
+
 metadata = {
     "name": "Résumeur de texte",
     "description": "Génère un résumé court d'un texte plus long",
-    "version": "1.0.0",
+    "version": "1.1.0",
     "author": "Fûinjutsu",
+    "cache": {"enabled": True, "ttl": 3600},
+    # Le classement TextRank d'un long document occupe le CPU : hors du GIL
+    "execution": "process",
+    # Traitement par morceaux des longs documents (POST /mcp/text_summarizer/chunked) :
+    # chaque morceau est résumé, puis les résumés sont résumés à leur tour
+    "map_reduce": {"input": "text", "output": "summary"},
     "input_schema": {
-        "text": "str - Le texte à résumer",
-        "max_length": "int - Longueur maximale du résumé en caractères (par défaut: 200)"
+        "text": {"type": "str", "description": "Le texte à résumer", "required": True, "min_length": 1},
+        "max_length": {"type": "int", "description": "Longueur maximale du résumé en caractères", "default": 200, "min": 1},
+        "mode": {"type": "str", "description": "Sélection des phrases : premières phrases (lead) ou phrases les plus centrales (textrank)", "default": "textrank", "enum": ["lead", "textrank"]}
     },
     "output_schema": {
         "summary": "str - Le résumé généré",
@@ -20,6 +29,9 @@ metadata = {
     }
 }
 
+# Les métadonnées restent un littéral (lues sans import à la découverte) : vérifier l'énumération
+assert metadata["input_schema"]["mode"]["enum"] == list(MODES)
+
 def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Résume un texte
@@ -30,9 +42,10 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
     Returns:
         Dictionnaire contenant le résultat du résumé
     """
-    # Extraire les données d'entrée
+    # Extraire les données d'entrée (types et bornes vérifiés par le schéma d'entrée avant l'appel)
     text = input_data.get("text", "")
     max_length = input_data.get("max_length", 200)
+    mode = input_data.get("mode", "textrank")
     
     # Vérifier que le texte n'est pas vide
     if not text:
@@ -40,18 +53,6 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
             "error": "Le texte à résumer ne peut pas être vide"
         }
     
-    # Vérifier que max_length est un entier positif
-    try:
-        max_length = int(max_length)
-        if max_length <= 0:
-            return {
-                "error": "La longueur maximale doit être un entier positif"
-            }
-    except ValueError:
-        return {
-            "error": "La longueur maximale doit être un entier positif"
-        }
-    
     # Longueur du texte original
     original_length = len(text)
     
@@ -64,15 +65,8 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
             "reduction_percent": 0.0
         }
     
-    # Méthode simple de résumé : extraction des premières phrases
-    sentences = text.split('.')
-    summary = ""
-    
-    for sentence in sentences:
-        if len(summary) + len(sentence) + 1 <= max_length:
-            summary += sentence + "."
-        else:
-            break
+    # Résumé extractif : phrases choisies selon le mode, dans la limite de longueur
+    summary = summarize(text, max_length, mode)
     
     # Calculer les statistiques
     summary_length = len(summary)
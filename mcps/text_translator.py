@@ -1,35 +1,118 @@
 """
 MCP pour traduire du texte
 """
-import requests
-from typing import Dict, Any, Optional
+import asyncio
+import os
+import threading
+import weakref
+from typing import Dict, Any, List, Optional
 
 # Importer le gestionnaire de configuration pour accéder aux clés API
-from mcps import config_manager
+# et le client HTTP asynchrone partagé pour réutiliser les connexions
+from mcps import config_manager, async_http_client, DeadlineExceeded
+
+# Regroupement des traductions simultanées en un appel à l'API d'inférence
+from utils.coalesce import MicroBatcher
+
+# Détection hors ligne de la langue source (profils de n-grammes fournis avec le MCP)
+from utils.langid import LanguageIdentifier
+
+# Profils des langues reconnues en mode "auto", et langue supposée quand aucune n'est reconnue
+LANGID_PROFILES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons", "langid", "profiles.json")
+DEFAULT_SOURCE_LANG = "en"
+
+# Durée de collecte d'un lot de traductions (millisecondes) et taille maximale d'un lot
+BATCH_WINDOW_MS = float(os.environ.get("TRANSLATE_BATCH_WINDOW_MS", 10))
+BATCH_MAX_ITEMS = int(os.environ.get("TRANSLATE_BATCH_MAX_ITEMS", 32))
+
+# Erreurs de l'API pour lesquelles un lot est coupé en deux et renvoyé, pour isoler les textes en cause
+SPLIT_ON_STATUS = (400, 413, 422)
+
+# Regroupeurs par boucle d'événements, puis par modèle et clé API
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, MicroBatcher]]" = weakref.WeakKeyDictionary()
+
+# Identifiant de langue, chargé à la première détection
+_language_identifier: Optional[LanguageIdentifier] = None
+_language_identifier_lock = threading.Lock()
 
 metadata = {
     "name": "Traducteur de texte",
     "description": "Traduit un texte d'une langue à une autre en utilisant un modèle",
-    "version": "1.0.0",
+    "version": "1.2.1",
     "author": "Fûinjutsu",
+    "cache": {"enabled": True, "ttl": 86400},
+    # Un service distant lent ne doit pas monopoliser les workers ; les traductions
+    # simultanées sont regroupées en lots, d'où une concurrence plus large que les appels distants
+    "timeout": 15,
+    "max_concurrency": 64,
     "input_schema": {
-        "text": "str - Le texte à traduire",
-        "source_lang": "str - La langue source (par défaut: auto)",
-        "target_lang": "str - La langue cible (par défaut: fr)",
-        "service": "str - Service à utiliser: huggingface, google, simulation (par défaut: huggingface)"
+        "text": {"type": "str", "description": "Le texte à traduire", "required": True, "min_length": 1},
+        "source_lang": {"type": "str", "description": "La langue source (code ISO 639-1, ou auto)", "default": "auto"},
+        "target_lang": {"type": "str", "description": "La langue cible (code ISO 639-1)", "default": "fr"},
+        "service": {
+            "type": "str",
+            "description": "Service à utiliser",
+            "default": "huggingface",
+            "enum": ["huggingface", "google", "simulation"]
+        }
     },
     "output_schema": {
         "translated_text": "str - Le texte traduit",
         "source_lang": "str - La langue source détectée",
         "target_lang": "str - La langue cible utilisée",
-        "service": "str - Service utilisé pour la traduction"
+        "service": "str - Service utilisé pour la traduction (\"none\" si le texte est déjà dans la langue cible)"
     }
 }
 
-def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
+def get_language_identifier() -> LanguageIdentifier:
+    """
+    Récupère l'identifiant de langue (profils chargés une fois par processus)
+    
+    Returns:
+        L'identifiant de langue
+    """
+    global _language_identifier
+    if _language_identifier is None:
+        with _language_identifier_lock:
+            if _language_identifier is None:
+                _language_identifier = LanguageIdentifier.from_file(LANGID_PROFILES)
+    return _language_identifier
+
+def detect_source_lang(text: str) -> str:
+    """
+    Détecte la langue d'un texte à traduire
+    
+    Args:
+        text: Le texte
+        
+    Returns:
+        Le code ISO 639-1 de la langue détectée, DEFAULT_SOURCE_LANG si elle n'est pas reconnue
+    """
+    lang, _ = get_language_identifier().detect(text)
+    return lang or DEFAULT_SOURCE_LANG
+
+def is_cacheable(result: Dict[str, Any]) -> bool:
+    """
+    Indique si un résultat peut être mis en cache
+    
+    Seules les traductions obtenues auprès d'un service réel sont conservées :
+    une simulation (clé API absente ou erreur du service) ne doit pas masquer
+    une vraie traduction une fois le service disponible.
+    
+    Args:
+        result: Le résultat de la traduction
+        
+    Returns:
+        True si le résultat peut être mis en cache
+    """
+    return "simulation" not in result.get("service", "")
+
+async def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
     """
     Traduit un texte d'une langue à une autre
     
+    Fonction asynchrone : l'attente de l'API distante ne bloque aucun thread.
+    
     Args:
         input_data: Dictionnaire contenant les données d'entrée
         
@@ -48,13 +131,30 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
             "error": "Le texte à traduire ne peut pas être vide"
         }
     
+    # Langue source détectée hors ligne : elle choisit le modèle opus-mt-<source>-<cible>
+    if source_lang == "auto":
+        source_lang = detect_source_lang(text)
+    
+    # Texte déjà dans la langue cible : rien à traduire (et aucun modèle <langue>-<même langue>) ;
+    # aucun service n'est appelé, le résultat ne doit pas passer pour une traduction
+    if source_lang == target_lang:
+        return {
+            "translated_text": text,
+            "source_lang": source_lang,
+            "target_lang": target_lang,
+            "service": "none"
+        }
+    
     # Essayer d'utiliser un service d'API réel si une clé est disponible
     if service == "huggingface":
         api_key = config_manager.get_api_key("huggingface")
         if api_key:
             try:
-                result = translate_with_huggingface(text, source_lang, target_lang, api_key)
+                result = await translate_with_huggingface(text, source_lang, target_lang, api_key)
                 return result
+            except DeadlineExceeded:
+                # Délai du MCP écoulé : pas de repli sur la simulation
+                raise
             except Exception as e:
                 # En cas d'erreur, retourner à la méthode de simulation
                 print(f"Erreur lors de l'appel à l'API HuggingFace: {str(e)}")
@@ -68,16 +168,6 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
                 print(f"Erreur lors de l'appel à l'API Google: {str(e)}")
     
     # Simulation de traduction (utilisée si aucune API n'est disponible)
-    if source_lang == "auto":
-        # Simulons une détection de langue
-        if text.startswith("Hello") or text.startswith("The"):
-            source_lang = "en"
-        elif text.startswith("Bonjour") or text.startswith("Le"):
-            source_lang = "fr"
-        else:
-            source_lang = "en"  # Par défaut en anglais
-    
-    # Simulation de traduction
     if source_lang == "en" and target_lang == "fr":
         translations = {
             "Hello": "Bonjour",
@@ -105,65 +195,139 @@ def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
         "service": "simulation" if service == "simulation" else f"{service} (simulation)"
     }
 
-def translate_with_huggingface(text: str, source_lang: str, target_lang: str, api_key: str) -> Dict[str, Any]:
+class HuggingFaceError(RuntimeError):
+    """Réponse en erreur de l'API d'inférence HuggingFace."""
+
+    def __init__(self, status_code: int, text: str):
+        super().__init__(f"Erreur API ({status_code}): {text}")
+        self.status_code = status_code
+
+async def _post_translations(api_url: str, api_key: str, texts: List[str]) -> List[str]:
+    """
+    Traduit un lot de textes en un appel à l'API d'inférence
+    
+    Args:
+        api_url: L'URL du modèle
+        api_key: La clé API HuggingFace
+        texts: Les textes à traduire
+        
+    Returns:
+        Les traductions, dans l'ordre des textes (l'erreur d'un texte rejeté par l'API à sa place)
+    
+    Raises:
+        HuggingFaceError: Si l'API répond en erreur pour tout le lot
+        ValueError: Si la réponse ne contient pas une traduction par texte
+    """
+    headers = {"Authorization": f"Bearer {api_key}"}
+    response = await async_http_client.post(api_url, headers=headers, json={"inputs": texts})
+    if response.status_code != 200:
+        error = HuggingFaceError(response.status_code, response.text)
+        if response.status_code not in SPLIT_ON_STATUS or len(texts) == 1:
+            raise error
+        # Lot refusé (trop gros, ou un texte non valide) : chaque moitié est renvoyée séparément
+        middle = len(texts) // 2
+        halves = [texts[:middle], texts[middle:]]
+        results = await asyncio.gather(*(_post_translations(api_url, api_key, half) for half in halves), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException) and not isinstance(result, Exception):
+                raise result
+        return [
+            translation
+            for half, result in zip(halves, results)
+            for translation in (result if isinstance(result, list) else [result] * len(half))
+        ]
+    
+    result = response.json()
+    if not isinstance(result, list) or len(result) != len(texts):
+        raise ValueError(f"réponse inattendue : {str(result)[:200]}")
+    translations = []
+    for text, item in zip(texts, result):
+        # Selon le modèle, chaque élément est un objet ou une liste d'un objet
+        if isinstance(item, list) and item:
+            item = item[0]
+        translations.append(item.get("translation_text", text) if isinstance(item, dict) else str(item))
+    return translations
+
+def _get_batcher(api_url: str, api_key: str) -> MicroBatcher:
+    """
+    Récupère le regroupeur des traductions d'un modèle sur la boucle courante
+    
+    Args:
+        api_url: L'URL du modèle
+        api_key: La clé API HuggingFace
+        
+    Returns:
+        Le regroupeur
+    """
+    batchers = _batchers.setdefault(asyncio.get_running_loop(), {})
+    key = (api_url, api_key)
+    if key not in batchers:
+        batchers[key] = MicroBatcher(
+            lambda texts: _post_translations(api_url, api_key, texts),
+            max_items=BATCH_MAX_ITEMS,
+            max_wait=BATCH_WINDOW_MS / 1000,
+        )
+    return batchers[key]
+
+def get_batch_stats() -> Dict[str, Any]:
+    """
+    Récupère les compteurs des regroupeurs de traductions
+    
+    Returns:
+        Les traductions demandées, dédoublonnées, et les appels envoyés, par modèle
+    """
+    stats = {}
+    for batchers in list(_batchers.values()):
+        for (api_url, _), batcher in list(batchers.items()):
+            model = api_url.rsplit("/", 1)[-1]
+            totals = stats.setdefault(model, {"submitted": 0, "coalesced": 0, "batches": 0, "sent": 0, "in_flight": 0})
+            for name, value in batcher.get_stats().items():
+                totals[name] += value
+    return stats
+
+async def translate_with_huggingface(text: str, source_lang: str, target_lang: str, api_key: str) -> Dict[str, Any]:
     """
     Traduit un texte en utilisant l'API HuggingFace
     
+    Les traductions simultanées vers un même modèle sont regroupées pendant
+    BATCH_WINDOW_MS millisecondes (ou jusqu'à BATCH_MAX_ITEMS textes) en un seul
+    appel ; un texte déjà en cours de traduction n'est pas renvoyé.
+    
     Args:
         text: Le texte à traduire
-        source_lang: La langue source
+        source_lang: La langue source ("auto" pour la détecter)
         target_lang: La langue cible
         api_key: La clé API HuggingFace
         
     Returns:
         Un dictionnaire contenant le résultat de la traduction
     """
-    # Configuration de l'API HuggingFace
-    API_URL = "https://api-inference.huggingface.co/models/Helsinki-NLP/opus-mt"
-    if source_lang != "auto":
-        API_URL = f"{API_URL}-{source_lang}-{target_lang}"
-    else:
-        # Si la langue source est "auto", utiliser un modèle de détection de langue
-        # Puis rediriger vers le bon modèle
-        API_URL = f"{API_URL}-en-{target_lang}"  # Par défaut à l'anglais
-    
-    headers = {"Authorization": f"Bearer {api_key}"}
-    
-    # Préparer les données pour l'API
-    payload = {
-        "inputs": text,
-    }
+    if source_lang == "auto":
+        source_lang = detect_source_lang(text)
     
-    # Envoyer la requête à l'API
-    response = requests.post(API_URL, headers=headers, json=payload)
+    # Configuration de l'API HuggingFace : un modèle par couple de langues
+    API_URL = f"https://api-inference.huggingface.co/models/Helsinki-NLP/opus-mt-{source_lang}-{target_lang}"
     
-    # Gérer les erreurs
-    if response.status_code != 200:
+    try:
+        translated_text = await _get_batcher(API_URL, api_key).submit(text)
+    except HuggingFaceError as e:
         return {
-            "error": f"Erreur API ({response.status_code}): {response.text}",
+            "error": str(e),
             "service": "huggingface",
             "source_lang": source_lang,
             "target_lang": target_lang
         }
-    
-    # Traiter la réponse
-    try:
-        result = response.json()
-        if isinstance(result, list) and len(result) > 0:
-            translated_text = result[0].get("translation_text", text)
-        else:
-            translated_text = str(result)
-        
-        return {
-            "translated_text": translated_text,
-            "source_lang": source_lang,
-            "target_lang": target_lang,
-            "service": "huggingface"
-        }
-    except Exception as e:
+    except ValueError as e:
         return {
             "error": f"Erreur lors du traitement de la réponse: {str(e)}",
             "service": "huggingface",
             "source_lang": source_lang,
             "target_lang": target_lang
-        }
\ No newline at end of file
+        }
+    
+    return {
+        "translated_text": translated_text,
+        "source_lang": source_lang,
+        "target_lang": target_lang,
+        "service": "huggingface"
+    }
@@ -1,70 +1,95 @@
-import requests
 import json
 import os
+import uuid
+from typing import Optional
 from taipy.gui import Gui, State, notify
 
+from utils.context_window import ConversationWindow, get_token_budget
+from utils.conversation_store import ConversationStore
+from utils.llm_router import NoProviderAvailable, llm_router
+
+MODEL = "gpt-3.5-turbo"
+# Provider tried first by the router; the other configured providers take over on errors or slowness
+PROVIDER = "openai"
+SYSTEM_PROMPT = "You are a helpful assistant."
+
+def new_conversation(messages=None) -> ConversationWindow:
+    """
+    Create a new conversation, bounded by the model's token budget.
+
+    Args:
+        - messages: The messages to replay, alternately from the user and the assistant
+          (by default, the assistant's introduction).
+
+    Returns:
+        The conversation.
+    """
+    if messages is None:
+        messages = ["Who are you?", "Hi! I am GPT-3.5. How can I help you today?"]
+    conversation = ConversationWindow(SYSTEM_PROMPT, max_tokens=get_token_budget(MODEL))
+    for position, message in enumerate(messages):
+        conversation.add("user" if position % 2 == 0 else "assistant", message)
+    return conversation
+
+# One append-only conversation per browser session
+conversations = ConversationStore(new_conversation)
+
 # Initialize variables
-context = "The following is a conversation with an AI assistant. The assistant is helpful, creative, clever, and very friendly.\n\nHuman: Hello, who are you?\nAI: I am an AI created by OpenAI. How can I help you today? "
+session_id = ""
 conversation = {
-    "Conversation": ["Who are you?", "Hi! I am GPT-3.5. How can I help you today?"]
+    "Conversation": new_conversation().contents
 }
 current_user_message = ""
 conversation_history = []
 selected_conversation = None
 
-# OpenAI API configuration
-OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "your-openai-api-key")
-API_URL = "https://api.openai.com/v1/chat/completions"
-headers = {
-    "Authorization": f"Bearer {OPENAI_API_KEY}",
-    "Content-Type": "application/json"
-}
-
 def query(messages):
     """
-    Send a request to the OpenAI API.
+    Send a request to the fastest healthy provider (OpenAI first).
     
     Args:
         - messages: The messages to send to the API.
         
     Returns:
-        The response from the API.
-    """
-    payload = {
-        "model": "gpt-3.5-turbo",
-        "messages": messages,
-        "temperature": 0.7,
-        "max_tokens": 150
-    }
+        The router's result (generated text, provider and model that produced it).
     
-    response = requests.post(API_URL, headers=headers, json=payload)
-    return response.json()
+    Raises:
+        NoProviderAvailable: If no provider is configured or all of them failed.
+    """
+    return llm_router.generate(messages, temperature=0.7, max_tokens=150, prefer=PROVIDER)
 
-def request(state: State, prompt: str) -> str:
+def on_init(state: State) -> None:
     """
-    Send a prompt to the OpenAI API and return the response.
+    Give each new browser session its own conversation.
+
+    Args:
+        - state: The state of the new session.
+    """
+    state.session_id = uuid.uuid4().hex
+    state.conversation = {"Conversation": conversations.get(state.session_id).contents}
+
+def request(state: State, prompt: str) -> Optional[str]:
+    """
+    Send a prompt, along with the conversation so far, and return the response.
 
     Args:
         - state: The current state of the app.
         - prompt: The prompt to send to the API.
 
     Returns:
-        The response from the API.
+        The response from the API, or None if no provider could answer.
     """
-    # Format the conversation history into messages for the OpenAI API
-    messages = [{"role": "system", "content": "You are a helpful assistant."}]
-    
-    # Add the user's message
-    messages.append({"role": "user", "content": prompt})
+    conversation = conversations.get(state.session_id)
     
-    # Send the request to the API
-    output = query(messages)
-    
-    # Extract the response
-    if "choices" in output and len(output["choices"]) > 0:
-        return output["choices"][0]["message"]["content"]
-    else:
-        return "Sorry, I couldn't generate a response."
+    # System prompt, summary of older turns and recent turns, within the model's token budget
+    try:
+        answer = query(conversation.chat_messages() + [{"role": "user", "content": prompt}])["text"]
+    except NoProviderAvailable:
+        return None
+    # The exchange is recorded only once answered: a failed request leaves no turn in later contexts
+    conversation.add("user", prompt)
+    conversation.add("assistant", answer)
+    return answer
 
 def send_message(state: State) -> None:
     """
@@ -73,16 +98,13 @@ def send_message(state: State) -> None:
     Args:
         - state: The current state of the app.
     """
-    # Add the user's message to the context
-    state.context += f"Human: \n {state.current_user_message}\n\n AI:"
-    # Send the user's message to the API and get the response
-    answer = request(state, state.current_user_message)
-    # Add the response to the context for future messages
-    state.context += answer
-    # Update the conversation
-    conv = state.conversation._dict.copy()
-    conv["Conversation"] += [state.current_user_message, answer]
-    state.conversation = conv
+    # Send the user's message to the API (the conversation store records both turns)
+    if request(state, state.current_user_message) is None:
+        # Keep the message in the input field so that it can be sent again
+        notify(state, "error", "Sorry, I couldn't generate a response.")
+        return
+    # Update the table from the conversation's append-only message list, without copying it
+    state.conversation = {"Conversation": conversations.get(state.session_id).contents}
     # Clear the input field
     state.current_user_message = ""
     # Notify the user
@@ -118,7 +140,9 @@ def save_conversation(state: State) -> None:
     if len(state.conversation["Conversation"]) > 0:
         name = state.conversation["Conversation"][0][:20] + "..."
         # Save the conversation
-        state.conversation_history.append({"name": name, "conversation": state.conversation._dict.copy()})
+        # Snapshot the messages: the current conversation keeps growing
+        messages = list(conversations.get(state.session_id).contents)
+        state.conversation_history.append({"name": name, "conversation": {"Conversation": messages}})
         notify(state, "success", f"Conversation '{name}' saved!")
 
 def load_conversation(state: State, idx: int) -> None:
@@ -130,7 +154,10 @@ def load_conversation(state: State, idx: int) -> None:
         - idx: The index of the conversation to load.
     """
     if idx < len(state.conversation_history):
-        state.conversation = state.conversation_history[idx]["conversation"]
+        # Replay the saved messages so that the model sees the loaded conversation
+        messages = state.conversation_history[idx]["conversation"]["Conversation"]
+        conversation = conversations.reset(state.session_id, new_conversation(messages))
+        state.conversation = {"Conversation": conversation.contents}
         state.selected_conversation = idx
         notify(state, "info", f"Conversation '{state.conversation_history[idx]['name']}' loaded!")
 
@@ -141,7 +168,35 @@ def clear_conversation(state: State) -> None:
     Args:
         - state: The current state of the app.
     """
-    state.conversation = {
-        "Conversation": []
-    }
-    state.context = "The following is a conversation with an AI assistant. The assistant is helpful, creative, clever,
\ No newline at end of file
+    state.conversation = {"Conversation": conversations.reset(state.session_id).contents}
+    notify(state, "info", "Conversation cleared!")
+
+# Define the UI with sidebar
+page = """
+<|toggle|theme|>
+
+<|layout|columns=1 4|
+<|sidebar|
+### Controls
+
+<|Clear Conversation|button|on_action=clear_conversation|>
+<|Save Conversation|button|on_action=save_conversation|>
+
+### History
+<|{conversation_history}|table|on_action=load_conversation|selected={selected_conversation}|>
+|>
+
+<|
+## Taipy Chat with GPT-3.5
+<|{conversation}|table|show_all|width=100%|style=style_conv|>
+<|{current_user_message}|input|label=Write your message here...|on_action=send_message|class_name=fullwidth|>
+|>
+|>
+"""
+
+if __name__ == "__main__":
+    # Configuration du serveur Taipy
+    host = os.environ.get("HOST", "127.0.0.1")
+    port = int(os.environ.get("PORT", 5000))
+    
+    Gui(page).run(dark_mode=True, title="Taipy Chat", css_file="main.css", host=host, port=port)
\ No newline at end of file
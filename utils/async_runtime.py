@@ -0,0 +1,164 @@
+"""
+Runtime asynchrone partagé pour Fûinjutsu.
+Une boucle d'événements tourne dans un thread dédié : le code synchrone
+(Flask, Taipy) peut y soumettre des coroutines, et les MCPs synchrones
+exécutés depuis du code asynchrone passent par un exécuteur borné.
+Les MCPs gourmands en CPU s'exécutent dans un pool de processus.
+"""
+import asyncio
+import contextvars
+import functools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+# Boucle d'événements d'arrière-plan, créée à la première utilisation
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+
+# Exécuteur borné pour les MCPs synchrones appelés depuis le chemin asynchrone
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Marque les threads de l'exécuteur (pour ne pas y resoumettre de travail en attendant son résultat)
+_executor_thread = threading.local()
+
+# Pool de processus pour les MCPs gourmands en CPU
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """
+    Récupère la boucle d'événements d'arrière-plan, en la démarrant si nécessaire.
+
+    Returns:
+        La boucle d'événements partagée
+    """
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="fuinjutsu-async", daemon=True)
+                thread.start()
+                _loop = loop
+    return _loop
+
+
+def run_coroutine(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """
+    Exécute une coroutine sur la boucle partagée et attend son résultat.
+
+    Args:
+        coro: La coroutine à exécuter
+        timeout: Délai maximal d'attente en secondes (None pour attendre indéfiniment)
+
+    Returns:
+        Le résultat de la coroutine
+    """
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except BaseException:
+        future.cancel()
+        raise
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """
+    Récupère l'exécuteur borné des MCPs synchrones.
+    Sa taille est définie par la variable d'environnement MCP_EXECUTOR_WORKERS.
+
+    Returns:
+        L'exécuteur partagé
+    """
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                max_workers = int(os.environ.get("MCP_EXECUTOR_WORKERS", 16))
+                _executor = ThreadPoolExecutor(
+                    max_workers=max_workers, thread_name_prefix="mcp-sync", initializer=_mark_executor_thread
+                )
+    return _executor
+
+
+def _mark_executor_thread() -> None:
+    """Initialise un thread de l'exécuteur."""
+    _executor_thread.active = True
+
+
+def in_executor() -> bool:
+    """
+    Indique si le thread courant appartient à l'exécuteur borné.
+    Y soumettre du travail pour en attendre le résultat pourrait épuiser l'exécuteur.
+
+    Returns:
+        True dans un thread de l'exécuteur
+    """
+    return getattr(_executor_thread, "active", False)
+
+
+def process_pool_size() -> int:
+    """
+    Nombre de processus du pool (variable d'environnement MCP_PROCESS_WORKERS,
+    par défaut le nombre de cœurs).
+
+    Returns:
+        La taille du pool
+    """
+    return int(os.environ.get("MCP_PROCESS_WORKERS", os.cpu_count() or 1))
+
+
+def get_process_pool(initializer: Optional[Callable[..., Any]] = None, initargs: Sequence[Any] = ()) -> ProcessPoolExecutor:
+    """
+    Récupère le pool de processus, en le créant si nécessaire.
+    Sa taille est donnée par process_pool_size() et sa méthode de démarrage par
+    MCP_PROCESS_START_METHOD ("spawn" par défaut : sûr dans un processus qui a
+    déjà démarré des threads).
+
+    Args:
+        initializer: Fonction exécutée au démarrage de chaque processus (à la création du pool)
+        initargs: Arguments de l'initialiseur
+
+    Returns:
+        Le pool partagé
+    """
+    global _process_pool
+    if _process_pool is None:
+        with _process_pool_lock:
+            if _process_pool is None:
+                max_workers = process_pool_size()
+                context = multiprocessing.get_context(os.environ.get("MCP_PROCESS_START_METHOD", "spawn"))
+                _process_pool = ProcessPoolExecutor(
+                    max_workers=max_workers, mp_context=context, initializer=initializer, initargs=tuple(initargs)
+                )
+    return _process_pool
+
+
+def reset_process_pool() -> None:
+    """Abandonne le pool de processus (après la mort d'un processus) ; le suivant est créé à la demande."""
+    global _process_pool
+    with _process_pool_lock:
+        pool, _process_pool = _process_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_sync(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Exécute une fonction bloquante dans l'exécuteur borné sans bloquer la boucle.
+    Le contexte de l'appelant (délai d'exécution notamment) est transmis à la fonction.
+
+    Args:
+        func: La fonction à exécuter
+        *args: Les arguments de la fonction
+
+    Returns:
+        Le résultat de la fonction
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args))
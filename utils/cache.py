@@ -0,0 +1,319 @@
+"""
+Cache des réponses pour les appels déterministes (MCPs et LLMs).
+Un niveau en mémoire (LRU borné en taille, avec expiration) et un niveau
+optionnel sur disque, partagé entre redémarrages et processus, borné en
+nombre d'entrées et en octets. La date de modification d'un fichier du
+niveau disque est sa date d'expiration : un balayage périodique supprime les
+fichiers expirés, puis ceux qui expirent le plus tôt tant que les bornes
+sont dépassées, sans lire leur contenu.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+# Après un balayage du niveau disque, part des bornes occupée au plus (marge avant le balayage suivant)
+DISK_LOW_WATERMARK = 0.9
+
+# Âge au-delà duquel un fichier temporaire abandonné (écriture interrompue) est supprimé (secondes)
+DISK_TMP_MAX_AGE = 3600.0
+
+
+def make_cache_key(namespace: str, version: str, input_data: Any) -> str:
+    """
+    Construit une clé de cache à partir d'une entrée canonisée.
+    Deux entrées JSON équivalentes (ordre des clés, espaces) donnent la même clé.
+
+    Args:
+        namespace: L'espace de noms (ex: "mcp:text_translator")
+        version: La version de l'implémentation (une nouvelle version invalide le cache)
+        input_data: Les données d'entrée
+
+    Returns:
+        La clé de cache (empreinte SHA-256 hexadécimale)
+    """
+    canonical = json.dumps(input_data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(f"{namespace}\0{version}\0{canonical}".encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Cache LRU avec expiration, doublé d'un niveau optionnel sur disque."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        default_ttl: float = 3600.0,
+        disk_dir: Optional[str] = None,
+        disk_max_entries: int = 10000,
+        disk_max_bytes: int = 100 * 1024 * 1024,
+        disk_sweep_interval: float = 300.0,
+    ):
+        """
+        Initialise le cache.
+
+        Args:
+            max_entries: Nombre maximal d'entrées gardées en mémoire
+            default_ttl: Durée de vie par défaut d'une entrée (secondes)
+            disk_dir: Dossier du niveau disque (None pour le désactiver)
+            disk_max_entries: Nombre maximal de fichiers du niveau disque
+            disk_max_bytes: Taille maximale du niveau disque (octets)
+            disk_sweep_interval: Intervalle entre deux balayages du niveau disque (secondes),
+                avancé dès que les écritures dépassent les bornes
+        """
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self.disk_max_bytes = disk_max_bytes
+        self.disk_sweep_interval = disk_sweep_interval
+        # Clé -> (date d'expiration, valeur), dans l'ordre d'utilisation
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "expirations": 0,
+            "disk_evictions": 0, "disk_expirations": 0,
+        }
+        # Occupation estimée du niveau disque : mesurée au dernier balayage, plus les écritures depuis
+        self._disk_entries = 0
+        self._disk_bytes = 0
+        self._last_sweep = 0.0
+        self._sweep_lock = threading.Lock()
+
+        if disk_dir:
+            try:
+                os.makedirs(disk_dir, exist_ok=True)
+            except OSError as e:
+                print(f"Cache disque désactivé ({disk_dir}): {str(e)}")
+                self.disk_dir = None
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """
+        Récupère une valeur du cache.
+
+        Args:
+            key: La clé de cache
+
+        Returns:
+            Le couple (trouvé, valeur)
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, entry[1]
+                del self._entries[key]
+                self._stats["expirations"] += 1
+
+        entry = self._read_disk(key, now)
+        with self._lock:
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            self._stats["hits"] += 1
+            self._stats["disk_hits"] += 1
+            self._store_memory(key, entry[0], entry[1])
+        return True, entry[1]
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        Enregistre une valeur dans le cache.
+
+        Args:
+            key: La clé de cache
+            value: La valeur (sérialisable en JSON pour le niveau disque)
+            ttl: Durée de vie en secondes (par défaut: default_ttl)
+        """
+        expires_at = time.time() + (self.default_ttl if ttl is None else ttl)
+        with self._lock:
+            self._store_memory(key, expires_at, value)
+        self._write_disk(key, expires_at, value)
+
+    def clear(self) -> None:
+        """Vide le niveau mémoire du cache et remet les compteurs à zéro."""
+        with self._lock:
+            self._entries.clear()
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Récupère les compteurs du cache.
+
+        Returns:
+            Un dictionnaire des compteurs (hits, misses, ...) et de la taille
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["max_entries"] = self.max_entries
+        stats["disk"] = self.disk_dir is not None
+        if self.disk_dir is not None:
+            stats["disk_entries"] = self._disk_entries
+            stats["disk_bytes"] = self._disk_bytes
+        return stats
+
+    def _store_memory(self, key: str, expires_at: float, value: Any) -> None:
+        """Ajoute une entrée en mémoire et évince les plus anciennes (verrou déjà pris)."""
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._stats["evictions"] += 1
+
+    def _disk_path(self, key: str) -> str:
+        """Chemin du fichier d'une entrée, réparti en sous-dossiers par préfixe."""
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str, now: float) -> Optional[Tuple[float, Any]]:
+        """Lit une entrée non expirée sur disque, ou retourne None."""
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("expires_at", 0) <= now:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        return entry["expires_at"], entry["value"]
+
+    def _write_disk(self, key: str, expires_at: float, value: Any) -> None:
+        """Écrit une entrée sur disque de manière atomique."""
+        if not self.disk_dir:
+            return
+        path = self._disk_path(key)
+        tmp_path = None
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"expires_at": expires_at, "value": value}, f, ensure_ascii=False)
+            size = os.path.getsize(tmp_path)
+            # Date de modification = date d'expiration : le balayage n'a pas à lire les fichiers
+            os.utime(tmp_path, (expires_at, expires_at))
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Erreur lors de l'écriture du cache disque: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+
+        with self._lock:
+            self._disk_entries += 1
+            self._disk_bytes += size
+            due = (
+                time.time() - self._last_sweep >= self.disk_sweep_interval
+                or self._disk_entries > self.disk_max_entries
+                or self._disk_bytes > self.disk_max_bytes
+            )
+        if due:
+            self.sweep_disk()
+
+    def sweep_disk(self) -> None:
+        """
+        Balaye le niveau disque : supprime les entrées expirées et les fichiers temporaires
+        abandonnés, puis les entrées qui expirent le plus tôt tant que le nombre de fichiers
+        ou leur taille dépassent DISK_LOW_WATERMARK des bornes.
+        Un seul balayage à la fois : un appel pendant un balayage en cours ne fait rien.
+        """
+        if not self.disk_dir or not self._sweep_lock.acquire(blocking=False):
+            return
+        try:
+            now = time.time()
+            files: List[Tuple[float, int, str]] = []
+            expired = 0
+            for subdir in self._scan(self.disk_dir):
+                if not subdir.is_dir():
+                    continue
+                for entry in self._scan(subdir.path):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if entry.name.endswith(".tmp"):
+                        # Fichier d'une écriture en cours, ou interrompue depuis longtemps
+                        if stat.st_mtime < now - DISK_TMP_MAX_AGE:
+                            self._remove(entry.path)
+                    elif stat.st_mtime <= now:
+                        expired += self._remove(entry.path)
+                    else:
+                        files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            count, total = len(files), sum(size for _, size, _ in files)
+            max_entries = int(self.disk_max_entries * DISK_LOW_WATERMARK)
+            max_bytes = int(self.disk_max_bytes * DISK_LOW_WATERMARK)
+            evicted = 0
+            if count > max_entries or total > max_bytes:
+                files.sort()
+                for _, size, path in files:
+                    if count <= max_entries and total <= max_bytes:
+                        break
+                    if self._remove(path):
+                        evicted += 1
+                    count -= 1
+                    total -= size
+
+            with self._lock:
+                self._disk_entries = count
+                self._disk_bytes = total
+                self._last_sweep = now
+                self._stats["disk_expirations"] += expired
+                self._stats["disk_evictions"] += evicted
+        finally:
+            self._sweep_lock.release()
+
+    @staticmethod
+    def _scan(path: str) -> List[os.DirEntry]:
+        """Entrées d'un dossier (vide s'il est illisible ou a été supprimé)."""
+        try:
+            with os.scandir(path) as entries:
+                return list(entries)
+        except OSError:
+            return []
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        """Supprime un fichier (déjà supprimé par un autre processus : False)."""
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
+
+
+def _disk_dir_from_env() -> Optional[str]:
+    """
+    Détermine le dossier du cache disque.
+    Activé par MCP_CACHE_DISK=1, sous DATA_PATH (par défaut /app/data).
+
+    Returns:
+        Le dossier du cache disque, ou None s'il est désactivé
+    """
+    if os.environ.get("MCP_CACHE_DISK", "0").lower() not in ("1", "true", "yes"):
+        return None
+    return os.path.join(os.environ.get("DATA_PATH", "/app/data"), "cache")
+
+
+# Instance globale du cache, configurable par variables d'environnement
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get("MCP_CACHE_MAX_ENTRIES", 1024)),
+    default_ttl=float(os.environ.get("MCP_CACHE_TTL", 3600)),
+    disk_dir=_disk_dir_from_env(),
+    disk_max_entries=int(os.environ.get("MCP_CACHE_DISK_MAX_ENTRIES", 10000)),
+    disk_max_bytes=int(os.environ.get("MCP_CACHE_DISK_MAX_BYTES", 100 * 1024 * 1024)),
+    disk_sweep_interval=float(os.environ.get("MCP_CACHE_DISK_SWEEP_INTERVAL", 300)),
+)
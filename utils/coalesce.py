@@ -0,0 +1,151 @@
+"""
+Regroupement des requêtes vers un service distant (micro-batching).
+Les éléments soumis en même temps sont collectés pendant quelques
+millisecondes, ou jusqu'à un nombre maximal d'éléments, puis envoyés en un
+seul appel ; chaque appelant reçoit le résultat de son élément. Un élément
+identique à un élément déjà en cours n'est pas renvoyé : l'appelant attend
+le même résultat (single-flight).
+"""
+import asyncio
+import contextvars
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+
+from utils.limits import get_deadline, run_with_deadline
+
+
+class MicroBatcher:
+    """
+    Collecte des éléments et les envoie par lots à une fonction asynchrone.
+
+    Un regroupeur est lié à la boucle d'événements de son premier appel.
+    """
+
+    def __init__(
+        self,
+        send_batch: Callable[[List[Hashable]], Awaitable[List[Any]]],
+        max_items: int = 32,
+        max_wait: float = 0.01,
+    ):
+        """
+        Initialise le regroupeur.
+
+        Args:
+            send_batch: La fonction qui traite un lot d'éléments et retourne un résultat par élément, dans l'ordre
+                (une exception à la place d'un résultat est levée chez les appelants de cet élément seulement)
+            max_items: Nombre d'éléments au-delà duquel le lot est envoyé sans attendre
+            max_wait: Durée maximale de collecte d'un lot (secondes)
+        """
+        self.send_batch = send_batch
+        self.max_items = max(1, max_items)
+        self.max_wait = max_wait
+        # Éléments en cours (collectés ou envoyés) -> résultat partagé
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+        # Lot en cours de collecte, avec l'instant limite le plus lointain de ses appelants
+        self._pending: List[Hashable] = []
+        self._pending_deadline: Optional[float] = None
+        self._pending_unbounded = False
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Lots envoyés (référencés jusqu'à leur fin : la boucle ne garde qu'une référence faible)
+        self._tasks: Set[asyncio.Task] = set()
+        self.submitted = 0
+        self.coalesced = 0
+        self.batches = 0
+        self.sent = 0
+
+    async def submit(self, item: Hashable) -> Any:
+        """
+        Soumet un élément et attend son résultat.
+
+        L'attente est annulable (délai de l'appelant) sans annuler le lot, dont
+        profitent les autres appelants.
+
+        Args:
+            item: L'élément (hashable : sert à reconnaître les doublons)
+
+        Returns:
+            Le résultat de l'élément
+
+        Raises:
+            Exception: L'erreur levée par send_batch pour le lot de l'élément
+        """
+        self.submitted += 1
+        future = self._in_flight.get(item)
+        if future is not None:
+            self.coalesced += 1
+            return await asyncio.shield(future)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._in_flight[item] = future
+        self._pending.append(item)
+
+        # Le lot dispose du délai de son appelant le plus patient
+        deadline = get_deadline()
+        if deadline is None:
+            self._pending_unbounded = True
+        elif self._pending_deadline is None or deadline > self._pending_deadline:
+            self._pending_deadline = deadline
+
+        if len(self._pending) >= self.max_items:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self) -> None:
+        """Envoie le lot en cours de collecte."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._pending = self._pending, []
+        deadline = None if self._pending_unbounded else self._pending_deadline
+        self._pending_deadline, self._pending_unbounded = None, False
+        if not items:
+            return
+        self.batches += 1
+        self.sent += len(items)
+        # Le lot s'exécute dans un contexte vierge : il ne dépend pas du délai de l'appelant qui l'a déclenché
+        task = contextvars.Context().run(asyncio.ensure_future, self._send(items, deadline))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, items: List[Hashable], deadline: Optional[float]) -> None:
+        """Envoie un lot et distribue les résultats (ou l'erreur) à ses appelants."""
+        try:
+            results = await run_with_deadline(self.send_batch(items), deadline)
+            if not isinstance(results, list) or len(results) != len(items):
+                raise RuntimeError(f"le lot de {len(items)} éléments a retourné {len(results) if isinstance(results, list) else 'un résultat non valide'}")
+        except BaseException as e:
+            for item in items:
+                future = self._in_flight.pop(item, None)
+                if future is not None and not future.done():
+                    future.set_exception(e if isinstance(e, Exception) else RuntimeError("lot annulé"))
+                    # Les appelants dont l'attente a expiré ne liront pas l'erreur : pas d'avertissement asyncio
+                    future.exception()
+            if not isinstance(e, Exception):
+                raise
+            return
+        for item, result in zip(items, results):
+            future = self._in_flight.pop(item, None)
+            if future is None or future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+                future.exception()
+            else:
+                future.set_result(result)
+
+    def get_stats(self) -> dict:
+        """
+        Récupère les compteurs du regroupeur.
+
+        Returns:
+            Les éléments soumis, dédoublonnés, les lots et les éléments envoyés
+        """
+        return {
+            "submitted": self.submitted,
+            "coalesced": self.coalesced,
+            "batches": self.batches,
+            "sent": self.sent,
+            "in_flight": len(self._in_flight),
+        }
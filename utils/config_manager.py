@@ -4,28 +4,176 @@ Gère le stockage sécurisé des clés API et autres paramètres.
 """
 import os
 import json
+import atexit
 import base64
+import hashlib
+import tempfile
+import threading
+import time
+from contextlib import ExitStack, contextmanager
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional, Tuple
+
+# Verrouillage de fichier entre processus : fcntl (POSIX) ou msvcrt (Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+# Paramètres de dérivation de la clé de chiffrement
+KDF_SALT = b'fuinjutsu_salt'  # Un sel fixe pour notre application
+KDF_ITERATIONS = 100000
+
+# Clés dérivées pendant la vie du processus, par (identifiant machine, sel, itérations)
+_derived_keys: Dict[Tuple[str, bytes, int], bytes] = {}
+_derived_keys_lock = threading.Lock()
+
+def derive_key(machine_id: str, salt: bytes = KDF_SALT, iterations: int = KDF_ITERATIONS) -> bytes:
+    """
+    Dérive la clé Fernet d'une machine (PBKDF2-SHA256), une seule fois par processus.
+    Si la variable d'environnement CONFIG_KEY_CACHE_FILE est définie, la clé dérivée
+    y est aussi conservée d'un processus à l'autre.
+    
+    Args:
+        machine_id: L'identifiant de la machine
+        salt: Le sel de la dérivation
+        iterations: Le nombre d'itérations PBKDF2
+        
+    Returns:
+        La clé encodée en base64 (format attendu par Fernet)
+    """
+    cache_key = (machine_id, salt, iterations)
+    with _derived_keys_lock:
+        key = _derived_keys.get(cache_key)
+        if key is None:
+            cache_file = os.environ.get("CONFIG_KEY_CACHE_FILE")
+            # L'empreinte des paramètres invalide le fichier si l'un d'eux change
+            fingerprint = hashlib.sha256(repr(cache_key).encode()).hexdigest()
+            key = _read_cached_key(cache_file, fingerprint) if cache_file else None
+            if key is None:
+                kdf = PBKDF2HMAC(
+                    algorithm=hashes.SHA256(),
+                    length=32,
+                    salt=salt,
+                    iterations=iterations,
+                )
+                key = base64.urlsafe_b64encode(kdf.derive(machine_id.encode()))
+                if cache_file:
+                    _write_cached_key(cache_file, fingerprint, key)
+            _derived_keys[cache_key] = key
+        return key
+
+def _read_cached_key(path: str, fingerprint: str) -> Optional[bytes]:
+    """Lit une clé dérivée depuis le fichier de cache, si elle correspond aux paramètres."""
+    try:
+        with open(path, 'r') as f:
+            cached = json.load(f)
+        if cached.get("fingerprint") == fingerprint:
+            return cached["key"].encode()
+    except (OSError, ValueError, KeyError, AttributeError):
+        pass
+    return None
+
+def _write_cached_key(path: str, fingerprint: str, key: bytes) -> None:
+    """Écrit une clé dérivée dans le fichier de cache (lisible par le seul propriétaire)."""
+    tmp_path = None
+    try:
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        os.chmod(tmp_path, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"fingerprint": fingerprint, "key": key.decode()}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"Erreur lors de l'écriture du cache de la clé dérivée: {str(e)}")
+        if tmp_path and os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+@contextmanager
+def file_lock(path: str) -> Iterator[None]:
+    """
+    Verrou exclusif entre processus (y compris sur d'autres machines partageant le volume),
+    tenu sur un fichier dédié.
+    
+    Args:
+        path: Le chemin du fichier de verrou (créé si nécessaire)
+    """
+    with open(path, 'a+') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK abandonne après 10 s : continuer d'attendre
+                    pass
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+# Marque une suppression en attente d'écriture
+_DELETED = object()
 
 class ConfigManager:
     """Gestionnaire de configuration pour Fûinjutsu."""
     
-    def __init__(self, config_file: str = "config.json", use_encryption: bool = True):
+    def __init__(
+        self,
+        config_file: str = "config.json",
+        use_encryption: bool = True,
+        save_delay: float = 0.0,
+        check_interval: float = 1.0,
+    ):
         """
         Initialise le gestionnaire de configuration.
         
         Args:
             config_file: Chemin vers le fichier de configuration
             use_encryption: Si True, chiffre les données sensibles
+            save_delay: Délai de regroupement des sauvegardes (secondes, 0 pour sauvegarder immédiatement)
+            check_interval: Intervalle minimal entre deux vérifications des modifications du fichier
+                par d'autres processus (secondes, 0 pour vérifier à chaque lecture)
         """
         self.config_file = config_file
+        self.lock_file = f"{config_file}.lock"
         self.use_encryption = use_encryption
+        self.save_delay = save_delay
+        self.check_interval = check_interval
         self.config_data = {}
-        self.encryption_key = None
+        # Incrémenté à chaque changement de la configuration (local ou rechargé depuis le fichier)
+        self.version = 0
+        # Empreinte (inode, date, taille) du fichier tel que lu ou écrit en dernier
+        self._signature: Optional[Tuple[int, int, int]] = None
+        self._last_check = 0.0
+        # (section, nom) -> valeur (ou _DELETED) : modifications locales pas encore écrites,
+        # réappliquées sur la version du fichier écrite entre-temps par un autre processus
+        self._pending: Dict[Tuple[str, str], Any] = {}
+        # Le chiffrement n'est initialisé qu'au premier chiffrement/déchiffrement
+        self._encryption_key = None
+        # Service -> (clé en clair, valeur chiffrée) : une clé inchangée n'est pas rechiffrée
+        self._ciphertexts: Dict[str, Tuple[str, str]] = {}
+        # Sauvegardes différées (lot en cours ou délai de regroupement)
+        self._lock = threading.RLock()
+        self._batch_depth = 0
+        self._dirty = False
+        self._save_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
         
         # Créer le dossier si nécessaire
         config_path = Path(config_file).parent
@@ -33,83 +181,248 @@ class ConfigManager:
             config_path.mkdir(parents=True, exist_ok=True)
         
         # Charger ou créer la configuration
+        # (les clés chiffrées restent chiffrées en mémoire jusqu'à leur premier accès)
         if os.path.exists(config_file):
             self.load_config()
         else:
             self.save_config()
-        
-        # Initialiser le chiffrement si nécessaire
-        if use_encryption:
+    
+    @property
+    def encryption_key(self) -> Optional[Fernet]:
+        """Le chiffreur Fernet, initialisé à la première utilisation (None sans chiffrement)."""
+        if self._encryption_key is None and self.use_encryption:
             self._init_encryption()
+        return self._encryption_key
     
     def _init_encryption(self):
         """Initialise le système de chiffrement."""
         # Utiliser une clé dérivée du nom de la machine pour le chiffrement
         # Ce n'est pas très sécurisé mais suffisant pour une utilisation basique
         machine_id = os.environ.get("COMPUTERNAME", os.environ.get("HOSTNAME", "fuinjutsu"))
-        salt = b'fuinjutsu_salt'  # Un sel fixe pour notre application
-        
-        # Dériver une clé de chiffrement
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(machine_id.encode()))
-        self.encryption_key = Fernet(key)
+        
+        # Dériver une clé de chiffrement (coûteux : mise en cache pour tout le processus)
+        self._encryption_key = Fernet(derive_key(machine_id))
+    
+    def _decrypt_api_key(self, service_name: str) -> Optional[str]:
+        """
+        Déchiffre une clé API chargée depuis le fichier, à son premier accès.
+        
+        Args:
+            service_name: Le nom du service
+            
+        Returns:
+            La clé API en clair (ou chiffrée si le déchiffrement échoue)
+        """
+        with self._lock:
+            api_keys = self.config_data.get("api_keys", {})
+            value = api_keys.get(service_name)
+            if value and value.startswith("encrypted:") and self.encryption_key:
+                try:
+                    encrypted_value = value[10:]  # Enlever le préfixe "encrypted:"
+                    decrypted_value = self.encryption_key.decrypt(encrypted_value.encode()).decode()
+                    self._ciphertexts[service_name] = (decrypted_value, value)
+                    api_keys[service_name] = value = decrypted_value
+                except Exception as e:
+                    print(f"Erreur lors du déchiffrement de la clé {service_name}: {str(e)}")
+                    # Garder la valeur chiffrée en cas d'erreur
+            return value
+    
+    def _stat_signature(self) -> Optional[Tuple[int, int, int]]:
+        """Empreinte actuelle du fichier de configuration, ou None s'il n'existe pas."""
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
     
     def load_config(self) -> Dict[str, Any]:
         """
         Charge la configuration depuis le fichier.
+        Les clés API dont la valeur chiffrée n'a pas changé gardent leur valeur déjà
+        déchiffrée, et les modifications locales pas encore écrites sont conservées.
         
         Returns:
             Les données de configuration
         """
-        try:
-            with open(self.config_file, 'r') as f:
-                self.config_data = json.load(f)
-                
-                # Déchiffrer les données sensibles si nécessaire
-                if self.use_encryption and self.encryption_key and "api_keys" in self.config_data:
-                    for key, value in self.config_data["api_keys"].items():
-                        if value.startswith("encrypted:"):
-                            try:
-                                encrypted_value = value[10:]  # Enlever le préfixe "encrypted:"
-                                decrypted_value = self.encryption_key.decrypt(encrypted_value.encode()).decode()
-                                self.config_data["api_keys"][key] = decrypted_value
-                            except Exception as e:
-                                print(f"Erreur lors du déchiffrement de la clé {key}: {str(e)}")
-                                # Garder la valeur chiffrée en cas d'erreur
-                
-                return self.config_data
-        except Exception as e:
-            print(f"Erreur lors du chargement de la configuration: {str(e)}")
-            self.config_data = {"api_keys": {}}
+        with self._lock:
+            try:
+                with open(self.config_file, 'r') as f:
+                    stat = os.fstat(f.fileno())
+                    data = json.load(f)
+                self._signature = (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+            except Exception as e:
+                print(f"Erreur lors du chargement de la configuration: {str(e)}")
+                data = {"api_keys": {}}
+            
+            # Les clés chiffrées sont déchiffrées à leur premier accès (voir get_api_key)
+            api_keys = data.get("api_keys", {})
+            ciphertexts = {}
+            for service_name, value in api_keys.items():
+                cached = self._ciphertexts.get(service_name)
+                if cached and cached[1] == value:
+                    api_keys[service_name] = cached[0]
+                    ciphertexts[service_name] = cached
+            self._ciphertexts = ciphertexts
+            
+            for (section, name), value in self._pending.items():
+                if value is _DELETED:
+                    data.get(section, {}).pop(name, None)
+                else:
+                    data.setdefault(section, {})[name] = value
+            
+            self.config_data = data
+            self.version += 1
             return self.config_data
     
+    def check_for_changes(self) -> bool:
+        """
+        Recharge la configuration si un autre processus a modifié le fichier.
+        La vérification (un stat du fichier) est faite au plus une fois par check_interval.
+        
+        Returns:
+            True si la configuration a été rechargée
+        """
+        now = time.monotonic()
+        if now - self._last_check < self.check_interval:
+            return False
+        with self._lock:
+            self._last_check = now
+            signature = self._stat_signature()
+            if signature is None or signature == self._signature:
+                return False
+            self.load_config()
+            return True
+    
     def save_config(self) -> None:
-        """Sauvegarde la configuration dans le fichier."""
-        # Créer une copie pour ne pas modifier l'original pendant le chiffrement
-        config_to_save = self.config_data.copy()
-        
-        # Chiffrer les données sensibles si nécessaire
-        if self.use_encryption and self.encryption_key and "api_keys" in config_to_save:
-            config_to_save["api_keys"] = config_to_save.get("api_keys", {}).copy()
-            for key, value in config_to_save["api_keys"].items():
-                if value and not value.startswith("encrypted:"):
-                    try:
-                        encrypted_value = self.encryption_key.encrypt(value.encode()).decode()
-                        config_to_save["api_keys"][key] = f"encrypted:{encrypted_value}"
-                    except Exception as e:
-                        print(f"Erreur lors du chiffrement de la clé {key}: {str(e)}")
-                        # Garder la valeur non chiffrée en cas d'erreur
+        """
+        Sauvegarde immédiatement la configuration dans le fichier (écriture atomique).
+        Sous verrou entre processus : si un autre processus a écrit le fichier entre-temps,
+        ses modifications sont rechargées et les modifications locales appliquées par-dessus.
+        """
+        with self._lock, ExitStack() as stack:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            try:
+                stack.enter_context(file_lock(self.lock_file))
+            except OSError as e:
+                # Verrou impossible à ouvrir (dossier en lecture seule...) : les modifications
+                # restent en mémoire et en attente, une prochaine sauvegarde les écrira
+                print(f"Erreur lors du verrouillage de la configuration ({self.lock_file}): {str(e)}")
+                self._dirty = True
+                return
+            self._dirty = False
+            
+            signature = self._stat_signature()
+            if signature is not None and signature != self._signature:
+                self.load_config()
+            
+            # Créer une copie pour ne pas modifier l'original pendant le chiffrement
+            config_to_save = self.config_data.copy()
+            
+            # Chiffrer les données sensibles si nécessaire
+            # (les clés jamais déchiffrées sont déjà chiffrées : pas besoin de dériver la clé pour elles)
+            if self.use_encryption and "api_keys" in config_to_save:
+                config_to_save["api_keys"] = config_to_save.get("api_keys", {}).copy()
+                for key, value in config_to_save["api_keys"].items():
+                    if value and not value.startswith("encrypted:"):
+                        config_to_save["api_keys"][key] = self._encrypt_api_key(key, value)
+            
+            if self._write_atomic(config_to_save):
+                self._signature = self._stat_signature()
+                self._pending.clear()
+    
+    def _encrypt_api_key(self, service_name: str, value: str) -> str:
+        """
+        Chiffre une clé API, en réutilisant la valeur chiffrée si la clé n'a pas changé.
+        
+        Args:
+            service_name: Le nom du service
+            value: La clé API en clair
+            
+        Returns:
+            La valeur chiffrée (ou en clair si le chiffrement échoue)
+        """
+        cached = self._ciphertexts.get(service_name)
+        if cached and cached[0] == value:
+            return cached[1]
+        if not self.encryption_key:
+            return value
+        try:
+            encrypted_value = f"encrypted:{self.encryption_key.encrypt(value.encode()).decode()}"
+        except Exception as e:
+            print(f"Erreur lors du chiffrement de la clé {service_name}: {str(e)}")
+            # Garder la valeur non chiffrée en cas d'erreur
+            return value
+        self._ciphertexts[service_name] = (value, encrypted_value)
+        return encrypted_value
+    
+    def _write_atomic(self, data: Dict[str, Any]) -> bool:
+        """
+        Écrit la configuration dans un fichier temporaire puis le substitue au fichier,
+        pour qu'une interruption ne laisse jamais un fichier tronqué.
         
+        Args:
+            data: Les données à écrire
+            
+        Returns:
+            True si le fichier a été écrit
+        """
+        directory = os.path.dirname(os.path.abspath(self.config_file))
+        tmp_path = None
         try:
-            with open(self.config_file, 'w') as f:
-                json.dump(config_to_save, f, indent=2)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".config.", suffix=".tmp")
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.config_file)
+            return True
         except Exception as e:
             print(f"Erreur lors de la sauvegarde de la configuration: {str(e)}")
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+    
+    def _request_save(self) -> None:
+        """Sauvegarde après une modification : immédiatement, en fin de lot ou après le délai de regroupement."""
+        with self._lock:
+            if self._batch_depth > 0:
+                self._dirty = True
+            elif self.save_delay > 0:
+                self._dirty = True
+                if self._save_timer is None:
+                    self._save_timer = threading.Timer(self.save_delay, self.flush)
+                    self._save_timer.daemon = True
+                    self._save_timer.start()
+            else:
+                self.save_config()
+    
+    def flush(self) -> None:
+        """Écrit les modifications en attente, s'il y en a."""
+        with self._lock:
+            if self._dirty:
+                self.save_config()
+    
+    @contextmanager
+    def batch(self) -> Iterator["ConfigManager"]:
+        """
+        Regroupe plusieurs modifications en une seule sauvegarde, écrite à la sortie du bloc.
+        
+        Exemple:
+            with config_manager.batch():
+                config_manager.set_api_key("openai", "...")
+                config_manager.set_api_key("huggingface", "...")
+        """
+        with self._lock:
+            self._batch_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._batch_depth -= 1
+                if self._batch_depth == 0:
+                    self.flush()
     
     def get_api_key(self, service_name: str) -> Optional[str]:
         """
@@ -121,9 +434,9 @@ class ConfigManager:
         Returns:
             La clé API ou None si elle n'existe pas
         """
-        api_keys = self.config_data.get("api_keys", {})
+        self.check_for_changes()
         # Chercher d'abord dans la configuration, puis dans les variables d'environnement
-        key = api_keys.get(service_name)
+        key = self._decrypt_api_key(service_name)
         if not key:
             env_var = f"{service_name.upper()}_API_KEY"
             key = os.environ.get(env_var)
@@ -137,10 +450,13 @@ class ConfigManager:
             service_name: Le nom du service (ex: "huggingface", "openai")
             api_key: La clé API à enregistrer
         """
-        if "api_keys" not in self.config_data:
-            self.config_data["api_keys"] = {}
-        self.config_data["api_keys"][service_name] = api_key
-        self.save_config()
+        with self._lock:
+            if "api_keys" not in self.config_data:
+                self.config_data["api_keys"] = {}
+            self.config_data["api_keys"][service_name] = api_key
+            self._pending[("api_keys", service_name)] = api_key
+            self.version += 1
+            self._request_save()
     
     def remove_api_key(self, service_name: str) -> None:
         """
@@ -149,9 +465,13 @@ class ConfigManager:
         Args:
             service_name: Le nom du service à supprimer
         """
-        if "api_keys" in self.config_data and service_name in self.config_data["api_keys"]:
-            del self.config_data["api_keys"][service_name]
-            self.save_config()
+        with self._lock:
+            if "api_keys" in self.config_data and service_name in self.config_data["api_keys"]:
+                del self.config_data["api_keys"][service_name]
+                self._ciphertexts.pop(service_name, None)
+                self._pending[("api_keys", service_name)] = _DELETED
+                self.version += 1
+                self._request_save()
     
     def get_setting(self, setting_name: str, default: Any = None) -> Any:
         """
@@ -164,6 +484,7 @@ class ConfigManager:
         Returns:
             La valeur du paramètre ou la valeur par défaut
         """
+        self.check_for_changes()
         return self.config_data.get("settings", {}).get(setting_name, default)
     
     def set_setting(self, setting_name: str, value: Any) -> None:
@@ -174,10 +495,13 @@ class ConfigManager:
             setting_name: Le nom du paramètre
             value: La valeur à enregistrer
         """
-        if "settings" not in self.config_data:
-            self.config_data["settings"] = {}
-        self.config_data["settings"][setting_name] = value
-        self.save_config()
+        with self._lock:
+            if "settings" not in self.config_data:
+                self.config_data["settings"] = {}
+            self.config_data["settings"][setting_name] = value
+            self._pending[("settings", setting_name)] = value
+            self.version += 1
+            self._request_save()
     
     def get_all_api_keys(self) -> Dict[str, str]:
         """
@@ -186,7 +510,15 @@ class ConfigManager:
         Returns:
             Un dictionnaire des clés API
         """
+        self.check_for_changes()
+        for service_name in list(self.config_data.get("api_keys", {})):
+            self._decrypt_api_key(service_name)
         return self.config_data.get("api_keys", {})
 
 # Instance globale du gestionnaire de configuration
-config_manager = ConfigManager(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json"))
\ No newline at end of file
+# (CONFIG_PATH désigne le fichier partagé entre les déploiements, ex: /app/config/config.json)
+config_manager = ConfigManager(
+    os.environ.get("CONFIG_PATH", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json")),
+    save_delay=float(os.environ.get("CONFIG_SAVE_DELAY", 0)),
+    check_interval=float(os.environ.get("CONFIG_CHECK_INTERVAL", 1.0)),
+)
\ No newline at end of file
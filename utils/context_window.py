@@ -0,0 +1,236 @@
+"""
+Fenêtre de contexte des conversations avec les LLMs.
+Garde le prompt système, les derniers échanges et un résumé compact des
+échanges plus anciens, dans un budget de tokens propre à chaque modèle.
+Le nombre de tokens est estimé localement, sans tokenizer.
+"""
+import os
+import re
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+# Mots (découpés en tronçons d'environ 4 caractères par les tokenizers BPE) et signes isolés
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Budget de tokens du contexte envoyé, par modèle (la réponse n'y est pas comprise)
+MODEL_TOKEN_BUDGETS: Dict[str, int] = {
+    "google/flan-t5-xxl": 512,
+    "gpt-3.5-turbo": 3072,
+    "gpt-4": 6144,
+    "default": 1024,
+}
+
+# Nombre maximal de tokens du résumé des échanges sortis de la fenêtre
+SUMMARY_TOKENS = 96
+
+# Nombre maximal de tokens gardés par échange dans le résumé
+SUMMARY_LINE_TOKENS = 24
+
+# Tokens ajoutés par message en plus de son contenu (rôle, séparateurs)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_SUMMARY_HEADER = "Earlier in the conversation:"
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estime le nombre de tokens d'un texte.
+    Un mot compte pour un token par tranche de 4 caractères, un signe pour un token.
+
+    Args:
+        text: Le texte
+
+    Returns:
+        Le nombre de tokens estimé
+    """
+    return sum((len(match) + 3) // 4 for match in _TOKEN_RE.findall(text))
+
+
+def truncate_tokens(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """
+    Tronque un texte à un nombre de tokens estimé.
+
+    Args:
+        text: Le texte
+        max_tokens: Le nombre maximal de tokens gardés
+        keep_end: True pour garder la fin du texte plutôt que son début
+
+    Returns:
+        Le texte tronqué (inchangé s'il tient dans le budget)
+    """
+    matches = list(_TOKEN_RE.finditer(text))
+    if keep_end:
+        matches.reverse()
+    used = 0
+    for index, match in enumerate(matches):
+        used += (match.end() - match.start() + 3) // 4
+        if used > max_tokens:
+            if index == 0:
+                return ""
+            if keep_end:
+                return "…" + text[matches[index - 1].start():]
+            return text[:matches[index - 1].end()] + "…"
+    return text
+
+
+def get_token_budget(model: str) -> int:
+    """
+    Récupère le budget de tokens du contexte d'un modèle.
+    La variable d'environnement CONTEXT_MAX_TOKENS remplace le budget configuré.
+
+    Args:
+        model: Le nom du modèle
+
+    Returns:
+        Le budget de tokens
+    """
+    if os.environ.get("CONTEXT_MAX_TOKENS"):
+        return int(os.environ["CONTEXT_MAX_TOKENS"])
+    return MODEL_TOKEN_BUDGETS.get(model, MODEL_TOKEN_BUDGETS["default"])
+
+
+class ConversationWindow:
+    """
+    Historique d'une conversation et fenêtre glissante envoyée au modèle.
+
+    Les messages sont ajoutés sans jamais recopier l'historique : la fenêtre
+    est un indice de début qui avance quand le budget est dépassé, et les
+    messages qui en sortent sont condensés dans le résumé.
+    """
+
+    def __init__(
+        self,
+        system_prompt: str = "",
+        max_tokens: int = MODEL_TOKEN_BUDGETS["default"],
+        summary_tokens: int = SUMMARY_TOKENS,
+        estimator: Callable[[str], int] = estimate_tokens,
+    ):
+        """
+        Initialise la conversation.
+
+        Args:
+            system_prompt: Le prompt système, toujours envoyé
+            max_tokens: Le budget de tokens du contexte
+            summary_tokens: Le budget du résumé des anciens échanges (0 pour le désactiver)
+            estimator: La fonction d'estimation du nombre de tokens
+        """
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.estimator = estimator
+        # Historique complet, au format des messages de l'API de chat OpenAI
+        self.messages: List[Dict[str, str]] = []
+        # Contenu de chaque message, dans l'ordre (pour l'affichage de la conversation)
+        self.contents: List[str] = []
+        # Tokens de chaque message tel qu'envoyé (tronqué s'il dépasse le budget)
+        self._tokens: List[int] = []
+        self._sent: List[str] = []
+        self._start = 0
+        self._window_tokens = 0
+        self._system_tokens = estimator(system_prompt) + MESSAGE_OVERHEAD_TOKENS if system_prompt else 0
+        # Lignes du résumé et leurs tokens, les plus anciennes en premier
+        self._summary: deque = deque()
+        self._summary_used = 0
+
+    def add(self, role: str, content: str) -> None:
+        """
+        Ajoute un message à la conversation et fait glisser la fenêtre si nécessaire.
+
+        Args:
+            role: "user" ou "assistant"
+            content: Le contenu du message
+        """
+        self.messages.append({"role": role, "content": content})
+        self.contents.append(content)
+
+        # Un message seul plus long que le budget est tronqué (on garde sa fin)
+        available = max(self.max_tokens - self._system_tokens - self.summary_tokens, 1)
+        tokens = self.estimator(content) + MESSAGE_OVERHEAD_TOKENS
+        if tokens > available:
+            content = truncate_tokens(content, available - MESSAGE_OVERHEAD_TOKENS, keep_end=True)
+            tokens = self.estimator(content) + MESSAGE_OVERHEAD_TOKENS
+        self._sent.append(content)
+        self._tokens.append(tokens)
+        self._window_tokens += tokens
+
+        # Le dernier message reste toujours dans la fenêtre
+        while self._window_tokens > available and self._start < len(self.messages) - 1:
+            self._summarize(self._start)
+            self._window_tokens -= self._tokens[self._start]
+            self._start += 1
+
+    def _summarize(self, index: int) -> None:
+        """Condense un message sorti de la fenêtre dans le résumé."""
+        if self.summary_tokens <= 0:
+            return
+        role = self.messages[index]["role"]
+        line = f"{role}: {truncate_tokens(self._sent[index].strip(), SUMMARY_LINE_TOKENS)}"
+        if not self._summary:
+            self._summary_used = self.estimator(_SUMMARY_HEADER) + MESSAGE_OVERHEAD_TOKENS
+        tokens = self.estimator(line) + 1
+        self._summary.append((line, tokens))
+        self._summary_used += tokens
+        while self._summary_used > self.summary_tokens and len(self._summary) > 1:
+            self._summary_used -= self._summary.popleft()[1]
+
+    @property
+    def summary(self) -> str:
+        """Le résumé des messages sortis de la fenêtre (vide s'il n'y en a pas)."""
+        if not self._summary:
+            return ""
+        return _SUMMARY_HEADER + "\n" + "\n".join(line for line, _ in self._summary)
+
+    @property
+    def window(self) -> List[Dict[str, str]]:
+        """Les messages de la fenêtre, dans la forme où ils sont envoyés."""
+        return [
+            {"role": self.messages[index]["role"], "content": self._sent[index]}
+            for index in range(self._start, len(self.messages))
+        ]
+
+    def chat_messages(self) -> List[Dict[str, str]]:
+        """
+        Construit les messages à envoyer à une API de chat (format OpenAI).
+
+        Returns:
+            Le prompt système, le résumé éventuel puis les messages de la fenêtre
+        """
+        messages = []
+        system = "\n\n".join(part for part in (self.system_prompt, self.summary) if part)
+        if system:
+            messages.append({"role": "system", "content": system})
+        messages.extend(self.window)
+        return messages
+
+    def render(self, labels: Optional[Dict[str, str]] = None) -> str:
+        """
+        Construit le contexte texte à envoyer à un modèle de complétion.
+
+        Args:
+            labels: Le préfixe de chaque rôle (par défaut "Human" et "AI")
+
+        Returns:
+            Le prompt système, le résumé éventuel puis les messages de la fenêtre
+        """
+        labels = labels or {"user": "Human", "assistant": "AI"}
+        parts = [part for part in (self.system_prompt, self.summary) if part]
+        turns = "\n".join(f"{labels.get(m['role'], m['role'])}: {m['content']}" for m in self.window)
+        if turns:
+            parts.append(turns)
+        return "\n\n".join(parts) + "\n"
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Récupère l'occupation de la fenêtre.
+
+        Returns:
+            Un dictionnaire avec le nombre de messages et de tokens de la fenêtre
+        """
+        return {
+            "messages": len(self.messages),
+            "window_messages": len(self.messages) - self._start,
+            "window_tokens": self._window_tokens,
+            "summary_tokens": self._summary_used,
+            "system_tokens": self._system_tokens,
+            "max_tokens": self.max_tokens,
+        }
@@ -0,0 +1,85 @@
+"""
+Stockage des conversations en cours, une par session de l'interface.
+Chaque session garde son historique en mémoire (ajouts uniquement) et sa
+fenêtre de contexte ; les sessions les moins récemment utilisées sont
+oubliées au-delà d'un nombre maximal.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from utils.context_window import ConversationWindow
+
+
+class ConversationStore:
+    """Conversations indexées par identifiant de session, bornées en nombre (LRU)."""
+
+    def __init__(self, factory: Callable[[], ConversationWindow], max_sessions: int = 1000):
+        """
+        Initialise le stockage.
+
+        Args:
+            factory: Crée la conversation d'une nouvelle session
+            max_sessions: Nombre maximal de sessions gardées en mémoire
+        """
+        self.factory = factory
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, ConversationWindow]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> ConversationWindow:
+        """
+        Récupère la conversation d'une session, en la créant si nécessaire.
+
+        Args:
+            session_id: L'identifiant de la session
+
+        Returns:
+            La conversation de la session
+        """
+        with self._lock:
+            conversation = self._sessions.get(session_id)
+            if conversation is None:
+                return self._create(session_id)
+            self._sessions.move_to_end(session_id)
+            return conversation
+
+    def reset(self, session_id: str, conversation: Optional[ConversationWindow] = None) -> ConversationWindow:
+        """
+        Remplace la conversation d'une session.
+
+        Args:
+            session_id: L'identifiant de la session
+            conversation: La conversation à reprendre (par défaut, une nouvelle)
+
+        Returns:
+            La conversation de la session
+        """
+        with self._lock:
+            return self._create(session_id, conversation)
+
+    def drop(self, session_id: str) -> Optional[ConversationWindow]:
+        """
+        Oublie la conversation d'une session.
+
+        Args:
+            session_id: L'identifiant de la session
+
+        Returns:
+            La conversation oubliée, ou None si la session est inconnue
+        """
+        with self._lock:
+            return self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _create(self, session_id: str, conversation: Optional[ConversationWindow] = None) -> ConversationWindow:
+        """Enregistre la conversation d'une session et évince les plus anciennes (verrou déjà pris)."""
+        if conversation is None:
+            conversation = self.factory()
+        self._sessions[session_id] = conversation
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        return conversation
@@ -0,0 +1,139 @@
+"""
+Lecture en flux des fichiers de données et des corps de requête.
+Les fichiers sont lus par blocs depuis le dossier de données (DATA_PATH,
+/app/data par défaut, le volume Docker) ; un chemin qui en sort est refusé.
+Les octets sont décodés en UTF-8 de manière incrémentale : un caractère
+coupé entre deux blocs est complété par le bloc suivant.
+"""
+import asyncio
+import codecs
+import os
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator
+
+# Dossier des fichiers lisibles par chemin
+DATA_PATH = os.environ.get("DATA_PATH", "/app/data")
+
+# Taille des blocs lus (octets)
+READ_BLOCK_SIZE = 64 * 1024
+
+
+def resolve_data_path(path: str) -> str:
+    """
+    Résout un chemin de fichier de données (relatif à DATA_PATH, ou absolu sous DATA_PATH).
+
+    Args:
+        path: Le chemin demandé
+
+    Returns:
+        Le chemin réel du fichier
+
+    Raises:
+        PermissionError: Si le chemin sort du dossier de données (liens symboliques compris)
+        FileNotFoundError: Si le fichier n'existe pas
+    """
+    base = os.path.realpath(DATA_PATH)
+    full_path = os.path.realpath(os.path.join(base, path))
+    if os.path.commonpath([base, full_path]) != base:
+        raise PermissionError(f"Le chemin '{path}' n'est pas dans le dossier de données {DATA_PATH}")
+    if not os.path.isfile(full_path):
+        raise FileNotFoundError(f"Fichier '{path}' introuvable dans {DATA_PATH}")
+    return full_path
+
+
+def decode_blocks(blocks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Décode un flux d'octets UTF-8 bloc par bloc (octets non valides remplacés).
+
+    Args:
+        blocks: Les blocs d'octets
+
+    Returns:
+        Un itérateur sur le texte décodé
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for block in blocks:
+        text = decoder.decode(block)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+async def adecode_blocks(blocks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Version asynchrone de decode_blocks (corps d'une requête aiohttp).
+
+    Args:
+        blocks: Les blocs d'octets
+
+    Returns:
+        Un itérateur asynchrone sur le texte décodé
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    async for block in blocks:
+        text = decoder.decode(block)
+        if text:
+            yield text
+    text = decoder.decode(b"", final=True)
+    if text:
+        yield text
+
+
+def iter_data_file(path: str, block_size: int = READ_BLOCK_SIZE) -> Iterator[str]:
+    """
+    Lit un fichier de données texte par blocs.
+
+    Args:
+        path: Le chemin du fichier, sous DATA_PATH
+        block_size: La taille des blocs lus
+
+    Returns:
+        Un itérateur sur le texte du fichier
+
+    Raises:
+        PermissionError: Si le chemin sort du dossier de données
+        FileNotFoundError: Si le fichier n'existe pas
+    """
+    full_path = resolve_data_path(path)
+
+    def blocks() -> Iterator[bytes]:
+        with open(full_path, "rb") as f:
+            while True:
+                block = f.read(block_size)
+                if not block:
+                    return
+                yield block
+
+    return decode_blocks(blocks())
+
+
+def aiter_data_file(path: str, block_size: int = READ_BLOCK_SIZE) -> AsyncIterator[str]:
+    """
+    Lit un fichier de données texte par blocs sans bloquer la boucle d'événements.
+
+    Args:
+        path: Le chemin du fichier, sous DATA_PATH
+        block_size: La taille des blocs lus
+
+    Returns:
+        Un itérateur asynchrone sur le texte du fichier
+
+    Raises:
+        PermissionError: Si le chemin sort du dossier de données
+        FileNotFoundError: Si le fichier n'existe pas
+    """
+    full_path = resolve_data_path(path)
+
+    async def blocks() -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, full_path, "rb")
+        try:
+            while True:
+                block = await asyncio.to_thread(f.read, block_size)
+                if not block:
+                    return
+                yield block
+        finally:
+            f.close()
+
+    return adecode_blocks(blocks())
@@ -0,0 +1,333 @@
+"""
+Client HTTP partagé pour les appels aux fournisseurs de LLM.
+Maintient des connexions keep-alive réutilisables (un pool par hôte),
+applique des timeouts de connexion/lecture et borne la concurrence.
+Fournit aussi une variante asynchrone basée sur aiohttp.
+"""
+import asyncio
+import contextvars
+import functools
+import json
+import os
+import threading
+import weakref
+from typing import Any, Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.limits import clamp_timeout, remaining_time
+
+# aiohttp est optionnel : sans lui, le client asynchrone délègue au client synchrone
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+# Timeout accepté par requests : une valeur unique ou un couple (connexion, lecture)
+Timeout = Union[float, Tuple[float, float]]
+
+
+class ProviderClient:
+    """Client HTTP avec pools de connexions persistantes pour les fournisseurs de LLM."""
+
+    def __init__(
+        self,
+        pool_connections: int = 10,
+        pool_maxsize: int = 20,
+        max_concurrency: int = 32,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+    ):
+        """
+        Initialise le client HTTP.
+
+        Args:
+            pool_connections: Nombre d'hôtes distincts dont le pool est conservé
+            pool_maxsize: Nombre maximal de connexions gardées ouvertes par hôte
+            max_concurrency: Nombre maximal de requêtes simultanées sur ce client
+            connect_timeout: Délai maximal d'établissement de la connexion (secondes)
+            read_timeout: Délai maximal d'attente de la réponse (secondes)
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+
+        # Chaque adaptateur gère un PoolManager urllib3 : un pool de connexions par hôte
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def request(self, method: str, url: str, timeout: Optional[Timeout] = None, **kwargs: Any) -> requests.Response:
+        """
+        Envoie une requête HTTP en réutilisant les connexions du pool.
+
+        Args:
+            method: La méthode HTTP (GET, POST, ...)
+            url: L'URL à appeler
+            timeout: Timeout spécifique, sinon (connect_timeout, read_timeout) ; réduit au
+                temps restant si l'appel a lieu pendant l'exécution d'un MCP avec délai
+            **kwargs: Arguments transmis à requests (headers, json, data, stream, ...)
+
+        Returns:
+            La réponse HTTP
+
+        Raises:
+            DeadlineExceeded: Si le délai de l'exécution courante est déjà écoulé
+
+        Note:
+            Avec stream=True, la place est conservée jusqu'à la fermeture de la réponse
+            (response.close() ou bloc `with`) : le corps est lu après le retour.
+        """
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        timeout = clamp_timeout(timeout)
+
+        if not kwargs.get("stream"):
+            with self._semaphore:
+                return self.session.request(method, url, timeout=timeout, **kwargs)
+
+        self._semaphore.acquire()
+        try:
+            response = self.session.request(method, url, timeout=timeout, **kwargs)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        self._release_on_close(response)
+        return response
+
+    def _release_on_close(self, response: requests.Response) -> None:
+        """
+        Libère la place de la requête à la première fermeture d'une réponse en streaming.
+
+        Args:
+            response: La réponse dont le corps est lu après le retour de request()
+        """
+        close = response.close
+        released = threading.Lock()
+
+        def close_and_release() -> None:
+            try:
+                close()
+            finally:
+                # Une réponse peut être fermée plusieurs fois : ne libérer qu'une fois
+                if released.acquire(blocking=False):
+                    self._semaphore.release()
+
+        response.close = close_and_release
+
+    def post(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Envoie une requête POST.
+
+        Args:
+            url: L'URL à appeler
+            **kwargs: Arguments transmis à request()
+
+        Returns:
+            La réponse HTTP
+        """
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """
+        Envoie une requête GET.
+
+        Args:
+            url: L'URL à appeler
+            **kwargs: Arguments transmis à request()
+
+        Returns:
+            La réponse HTTP
+        """
+        return self.request("GET", url, **kwargs)
+
+    def close(self) -> None:
+        """Ferme toutes les connexions ouvertes."""
+        self.session.close()
+
+    def get_settings(self) -> Dict[str, Any]:
+        """
+        Récupère la configuration du client.
+
+        Returns:
+            Un dictionnaire des paramètres du client
+        """
+        return {
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "max_concurrency": self.max_concurrency,
+            "connect_timeout": self.connect_timeout,
+            "read_timeout": self.read_timeout,
+        }
+
+
+class AsyncResponse:
+    """Réponse HTTP entièrement lue, commune aux deux implémentations du client asynchrone."""
+
+    def __init__(self, status_code: int, text: str):
+        self.status_code = status_code
+        self.text = text
+
+    def json(self) -> Any:
+        """
+        Décode le corps de la réponse en JSON.
+
+        Returns:
+            Le contenu décodé
+        """
+        return json.loads(self.text)
+
+
+class AsyncProviderClient:
+    """
+    Client HTTP asynchrone pour les fournisseurs de LLM.
+
+    Une boucle d'événements peut ainsi garder des centaines de requêtes en vol
+    sans bloquer un thread par requête. Une session aiohttp (et son pool de
+    connexions) est créée par boucle d'événements.
+    """
+
+    def __init__(
+        self,
+        pool_maxsize: int = 100,
+        max_connections: int = 200,
+        max_concurrency: int = 200,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        fallback: Optional[ProviderClient] = None,
+    ):
+        """
+        Initialise le client HTTP asynchrone.
+
+        Args:
+            pool_maxsize: Nombre maximal de connexions simultanées par hôte
+            max_connections: Nombre maximal de connexions simultanées au total
+            max_concurrency: Nombre maximal de requêtes en vol par boucle
+            connect_timeout: Délai maximal d'établissement de la connexion (secondes)
+            read_timeout: Délai maximal d'attente de la réponse (secondes)
+            fallback: Client synchrone utilisé si aiohttp n'est pas installé
+        """
+        self.pool_maxsize = pool_maxsize
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.fallback = fallback
+        # Boucle d'événements -> (session aiohttp, sémaphore)
+        self._per_loop = weakref.WeakKeyDictionary()
+
+    def _get_loop_state(self):
+        """
+        Récupère (ou crée) la session et le sémaphore de la boucle courante.
+
+        Returns:
+            Le couple (session, sémaphore)
+        """
+        loop = asyncio.get_running_loop()
+        state = self._per_loop.get(loop)
+        if state is None or state[0].closed:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=self.pool_maxsize)
+            session = aiohttp.ClientSession(connector=connector)
+            state = (session, asyncio.Semaphore(self.max_concurrency))
+            self._per_loop[loop] = state
+        return state
+
+    async def request(self, method: str, url: str, timeout: Optional[Timeout] = None, **kwargs: Any) -> AsyncResponse:
+        """
+        Envoie une requête HTTP sans bloquer la boucle d'événements.
+
+        Args:
+            method: La méthode HTTP (GET, POST, ...)
+            url: L'URL à appeler
+            timeout: Timeout spécifique, sinon (connect_timeout, read_timeout) ; borné par
+                le temps restant si l'appel a lieu pendant l'exécution d'un MCP avec délai
+            **kwargs: Arguments transmis à aiohttp (headers, json, data, ...)
+
+        Returns:
+            La réponse HTTP, corps déjà lu
+
+        Raises:
+            DeadlineExceeded: Si le délai de l'exécution courante est déjà écoulé
+        """
+        if aiohttp is None:
+            # Repli : exécuter le client synchrone dans l'exécuteur par défaut de la boucle,
+            # avec le contexte de l'appelant (le délai de l'exécution courante borne ses timeouts)
+            client = self.fallback or http_client
+            loop = asyncio.get_running_loop()
+            context = contextvars.copy_context()
+            response = await loop.run_in_executor(
+                None, functools.partial(context.run, client.request, method, url, timeout=timeout, **kwargs)
+            )
+            return AsyncResponse(response.status_code, response.text)
+
+        if timeout is None:
+            timeout = (self.connect_timeout, self.read_timeout)
+        timeout = clamp_timeout(timeout)
+        if isinstance(timeout, tuple):
+            # Le temps restant borne aussi la durée totale (sock_read ne borne que chaque lecture)
+            client_timeout = aiohttp.ClientTimeout(total=remaining_time(), sock_connect=timeout[0], sock_read=timeout[1])
+        else:
+            client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+        session, semaphore = self._get_loop_state()
+        async with semaphore:
+            async with session.request(method, url, timeout=client_timeout, **kwargs) as response:
+                return AsyncResponse(response.status, await response.text())
+
+    async def post(self, url: str, **kwargs: Any) -> AsyncResponse:
+        """
+        Envoie une requête POST.
+
+        Args:
+            url: L'URL à appeler
+            **kwargs: Arguments transmis à request()
+
+        Returns:
+            La réponse HTTP
+        """
+        return await self.request("POST", url, **kwargs)
+
+    async def get(self, url: str, **kwargs: Any) -> AsyncResponse:
+        """
+        Envoie une requête GET.
+
+        Args:
+            url: L'URL à appeler
+            **kwargs: Arguments transmis à request()
+
+        Returns:
+            La réponse HTTP
+        """
+        return await self.request("GET", url, **kwargs)
+
+    async def close(self) -> None:
+        """Ferme la session de la boucle d'événements courante."""
+        state = self._per_loop.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state[0].close()
+
+
+# Instance globale du client HTTP, configurable par variables d'environnement
+http_client = ProviderClient(
+    pool_connections=int(os.environ.get("HTTP_POOL_CONNECTIONS", 10)),
+    pool_maxsize=int(os.environ.get("HTTP_POOL_MAXSIZE", 20)),
+    max_concurrency=int(os.environ.get("HTTP_MAX_CONCURRENCY", 32)),
+    connect_timeout=float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5.0)),
+    read_timeout=float(os.environ.get("HTTP_READ_TIMEOUT", 60.0)),
+)
+
+# Instance globale du client HTTP asynchrone
+async_http_client = AsyncProviderClient(
+    pool_maxsize=int(os.environ.get("HTTP_ASYNC_MAX_PER_HOST", 100)),
+    max_connections=int(os.environ.get("HTTP_ASYNC_MAX_CONNECTIONS", 200)),
+    max_concurrency=int(os.environ.get("HTTP_ASYNC_MAX_CONCURRENCY", 200)),
+    connect_timeout=float(os.environ.get("HTTP_CONNECT_TIMEOUT", 5.0)),
+    read_timeout=float(os.environ.get("HTTP_READ_TIMEOUT", 60.0)),
+    fallback=http_client,
+)
@@ -0,0 +1,233 @@
+"""
+Identification de la langue d'un texte, hors ligne, par n-grammes de caractères.
+Chaque langue est décrite par un profil : la fréquence de ses n-grammes de 1 à
+3 caractères (mots bordés d'espaces : " le", "le "), calculée une fois sur un
+corpus et fournie avec le code. Un texte est attribué à la langue dont le
+modèle (bayésien naïf, lissage additif) rend ses n-grammes les plus probables ;
+le coût dépend de la longueur du texte (bornée), pas du nombre de langues
+connues au-delà d'une addition par n-gramme.
+
+Construction des profils à partir d'un dossier de corpus (un fichier <langue>.txt par langue) :
+    python -m utils.langid <dossier_corpus> <profils.json>
+"""
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Longueurs des n-grammes de caractères
+NGRAM_ORDERS = (1, 2, 3)
+
+# Nombre de n-grammes gardés par profil (les plus fréquents)
+PROFILE_SIZE = 1500
+
+# Lissage additif des fréquences (un n-gramme absent d'un profil n'annule pas la langue)
+SMOOTHING = 0.5
+
+# Probabilité minimale de la langue retenue (les mots isolés, "Hallo", sont souvent ambigus)
+MIN_PROBABILITY = float(os.environ.get("LANGID_MIN_PROBABILITY", 0.9))
+
+# Nombre de caractères examinés : au-delà, la langue est décidée sur le début du texte
+MAX_CHARS = int(os.environ.get("LANGID_MAX_CHARS", 1000))
+
+# Nombre de textes dont la langue détectée est gardée en mémoire
+CACHE_SIZE = int(os.environ.get("LANGID_CACHE_SIZE", 10000))
+
+# Part minimale de n-grammes connus d'au moins un profil (en dessous : écriture ou langue inconnue)
+MIN_KNOWN_RATIO = 0.3
+
+# Mots : lettres seulement (ni chiffres ni soulignés)
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def extract_ngrams(text: str, orders: Iterable[int] = NGRAM_ORDERS) -> List[str]:
+    """
+    Extrait les n-grammes de caractères des mots d'un texte, en minuscules.
+
+    Args:
+        text: Le texte
+        orders: Les longueurs des n-grammes
+
+    Returns:
+        Les n-grammes, avec répétitions (les espaces marquent le début et la fin des mots)
+    """
+    orders = tuple(orders)
+    ngrams = []
+    extend = ngrams.extend
+    for word in _WORD_RE.findall(text.lower()):
+        padded = f" {word} "
+        length = len(padded)
+        for n in orders:
+            if n == 1:
+                extend(word)
+            else:
+                extend(padded[i:i + n] for i in range(length - n + 1))
+    return ngrams
+
+
+def build_profiles(corpora: Dict[str, str], size: int = PROFILE_SIZE) -> Dict[str, Dict[str, int]]:
+    """
+    Calcule les profils des langues : les n-grammes les plus fréquents de chaque corpus.
+
+    Args:
+        corpora: Langue (code ISO 639-1) -> texte du corpus
+        size: Nombre de n-grammes gardés par langue
+
+    Returns:
+        Langue -> (n-gramme -> nombre d'occurrences)
+    """
+    return {
+        lang: dict(Counter(extract_ngrams(text)).most_common(size))
+        for lang, text in sorted(corpora.items())
+    }
+
+
+class LanguageIdentifier:
+    """
+    Identifie la langue d'un texte parmi celles de ses profils.
+
+    Les résultats sont gardés en mémoire (LRU) sous l'empreinte du texte : un
+    texte déjà vu n'est pas réexaminé, et le cache ne conserve pas les textes.
+    """
+
+    def __init__(self, profiles: Dict[str, Dict[str, int]], cache_size: int = CACHE_SIZE):
+        """
+        Initialise l'identifiant.
+
+        Args:
+            profiles: Langue -> (n-gramme -> nombre d'occurrences)
+            cache_size: Nombre de résultats gardés en mémoire (0 pour désactiver le cache)
+        """
+        self.languages: Tuple[str, ...] = tuple(sorted(profiles))
+        vocabulary = set()
+        for counts in profiles.values():
+            vocabulary.update(counts)
+
+        # N-gramme -> log-probabilité dans chaque langue (dans l'ordre de self.languages)
+        rows: Dict[str, List[float]] = {ngram: [] for ngram in vocabulary}
+        unseen = []
+        for lang in self.languages:
+            counts = profiles[lang]
+            denominator = sum(counts.values()) + SMOOTHING * len(vocabulary)
+            for ngram, row in rows.items():
+                row.append(math.log((counts.get(ngram, 0) + SMOOTHING) / denominator))
+            unseen.append(math.log(SMOOTHING / denominator))
+        self._table: Dict[str, Tuple[float, ...]] = {ngram: tuple(row) for ngram, row in rows.items()}
+        self._unseen: Tuple[float, ...] = tuple(unseen)
+
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[bytes, Tuple[Optional[str], float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0}
+
+    @classmethod
+    def from_file(cls, path: str, cache_size: int = CACHE_SIZE) -> "LanguageIdentifier":
+        """
+        Charge les profils d'un fichier JSON (langue -> n-gramme -> nombre d'occurrences).
+
+        Args:
+            path: Le chemin du fichier
+            cache_size: Nombre de résultats gardés en mémoire
+
+        Returns:
+            L'identifiant
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return cls(json.load(f), cache_size)
+
+    def scores(self, text: str) -> Dict[str, float]:
+        """
+        Calcule la probabilité de chaque langue pour un texte (sans cache).
+
+        Args:
+            text: Le texte (seuls les MAX_CHARS premiers caractères sont examinés)
+
+        Returns:
+            Langue -> probabilité (leur somme vaut 1) ; vide si le texte n'a aucun
+            n-gramme connu ou trop peu
+        """
+        ngrams = extract_ngrams(text[:MAX_CHARS])
+        if not ngrams:
+            return {}
+        get = self._table.get
+        rows = [row for row in map(get, ngrams) if row is not None]
+        if len(rows) < MIN_KNOWN_RATIO * len(ngrams):
+            return {}
+        # Les n-grammes inconnus de tous les profils pèsent autant sur chaque langue (à la normalisation près)
+        missing = len(ngrams) - len(rows)
+        totals = [sum(column) + missing * unseen for column, unseen in zip(zip(*rows), self._unseen)]
+        best = max(totals)
+        weights = [math.exp(total - best) for total in totals]
+        norm = sum(weights)
+        return {lang: weight / norm for lang, weight in zip(self.languages, weights)}
+
+    def detect(self, text: str) -> Tuple[Optional[str], float]:
+        """
+        Détecte la langue d'un texte.
+
+        Args:
+            text: Le texte
+
+        Returns:
+            Le couple (code de la langue, probabilité) ; la langue vaut None si elle n'est pas reconnue
+            (aucun n-gramme connu, ou langue la plus probable en dessous de MIN_PROBABILITY)
+        """
+        key = hashlib.blake2b(text[:MAX_CHARS].encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                self._stats["hits"] += 1
+                return result
+            self._stats["misses"] += 1
+
+        probabilities = self.scores(text)
+        if probabilities:
+            lang = max(probabilities, key=probabilities.get)
+            result = (lang if probabilities[lang] >= MIN_PROBABILITY else None, probabilities[lang])
+        else:
+            result = (None, 0.0)
+
+        if self.cache_size > 0:
+            with self._lock:
+                self._cache[key] = result
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Récupère les compteurs du cache de détection.
+
+        Returns:
+            Les détections servies par le cache, calculées, et le nombre d'entrées
+        """
+        with self._lock:
+            return {**self._stats, "entries": len(self._cache)}
+
+
+def _main(argv: List[str]) -> None:
+    """Construit le fichier de profils à partir d'un dossier de corpus."""
+    if len(argv) != 2:
+        raise SystemExit("Usage: python -m utils.langid <dossier_corpus> <profils.json>")
+    corpus_dir, output = argv
+    corpora = {}
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(".txt"):
+            with open(os.path.join(corpus_dir, name), "r", encoding="utf-8") as f:
+                corpora[name[:-len(".txt")]] = f.read()
+    profiles = build_profiles(corpora)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(profiles, f, ensure_ascii=False, separators=(",", ":"), sort_keys=True)
+        f.write("\n")
+    print(f"{len(profiles)} profils écrits dans {output} : {', '.join(profiles)}")
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
@@ -0,0 +1,340 @@
+"""
+Moteur de lexiques pondérés pour l'analyse de texte.
+Les termes (mots ou expressions de plusieurs mots) sont indexés une fois par
+processus dans une table de hachage par token ; un texte est découpé en mots
+puis parcouru en une seule passe, en respectant les frontières de mots
+("bad" ne correspond pas à "badge"). Le coût d'une analyse dépend de la
+longueur du texte, pas du nombre de termes du lexique.
+"""
+import os
+import re
+from itertools import repeat
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# NumPy est optionnel : sans lui, le score d'un lot est calculé texte par texte
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Mots (lettres et chiffres, accents compris) ; l'apostrophe sépare les mots ("j'aime" -> "j", "aime")
+_WORD_RE = re.compile(r"\w+")
+
+# Séparateur des textes d'un lot (n'est pas un caractère de mot), découpé comme un mot
+_BATCH_SEPARATOR = "\x00"
+_BATCH_RE = re.compile(r"\w+|\x00")
+
+# Nombre de textes traités ensemble par score_batch
+BATCH_CHUNK_SIZE = 2048
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Découpe un texte en mots, en minuscules.
+
+    Args:
+        text: Le texte
+
+    Returns:
+        Les mots du texte, dans l'ordre
+    """
+    return _WORD_RE.findall(text.lower())
+
+
+class Lexicon:
+    """
+    Lexique de termes pondérés (poids positif ou négatif).
+
+    Les termes d'un seul mot sont dans un dictionnaire mot -> poids ; les
+    expressions sont indexées par leur premier mot et essayées de la plus
+    longue à la plus courte, de sorte qu'une expression l'emporte sur les
+    mots qui la composent ("pas mal" plutôt que "mal").
+    """
+
+    def __init__(self, entries: Optional[Dict[str, float]] = None):
+        """
+        Initialise le lexique.
+
+        Args:
+            entries: Les termes et leur poids
+        """
+        self.words: Dict[str, float] = {}
+        # Premier mot -> [(mots de l'expression, terme, poids)], les plus longues en premier
+        self.phrases: Dict[str, List[Tuple[Tuple[str, ...], str, float]]] = {}
+        # Index des mots et vecteurs de poids pour le calcul par lot (construits à la demande)
+        self._arrays = None
+        for term, weight in (entries or {}).items():
+            self.add(term, weight)
+
+    def add(self, term: str, weight: float) -> None:
+        """
+        Ajoute (ou remplace) un terme.
+
+        Args:
+            term: Le mot ou l'expression
+            weight: Son poids
+        """
+        tokens = tuple(tokenize(term))
+        if not tokens:
+            return
+        self._arrays = None
+        if len(tokens) == 1:
+            self.words[tokens[0]] = float(weight)
+            return
+        key = " ".join(tokens)
+        candidates = [entry for entry in self.phrases.get(tokens[0], []) if entry[1] != key]
+        candidates.append((tokens, key, float(weight)))
+        candidates.sort(key=lambda entry: len(entry[0]), reverse=True)
+        self.phrases[tokens[0]] = candidates
+
+    def load_file(self, path: str) -> int:
+        """
+        Charge un fichier de lexique : un terme par ligne, suivi de son poids
+        (séparé par une tabulation ou des espaces, 1.0 s'il est absent) ;
+        les lignes vides et celles commençant par # sont ignorées.
+
+        Args:
+            path: Le chemin du fichier
+
+        Returns:
+            Le nombre de termes chargés
+
+        Raises:
+            OSError: Si le fichier ne peut pas être lu
+            ValueError: Si un poids n'est pas un nombre
+        """
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                if "\t" in line:
+                    term, _, weight = line.rpartition("\t")
+                    try:
+                        weight = float(weight)
+                    except ValueError:
+                        raise ValueError(f"{path}:{line_number}: poids non valide") from None
+                else:
+                    term, _, weight = line.rpartition(" ")
+                    try:
+                        weight = float(weight)
+                    except ValueError:
+                        # Pas de poids : le terme est la ligne entière
+                        term, weight = line, 1.0
+                self.add(term, weight)
+                count += 1
+        return count
+
+    @classmethod
+    def from_files(cls, paths: Iterable[str]) -> "Lexicon":
+        """
+        Construit un lexique à partir de fichiers (les derniers l'emportent en cas de doublon).
+
+        Args:
+            paths: Les chemins des fichiers
+
+        Returns:
+            Le lexique
+        """
+        lexicon = cls()
+        for path in paths:
+            lexicon.load_file(path)
+        return lexicon
+
+    def __len__(self) -> int:
+        return len(self.words) + sum(len(entries) for entries in self.phrases.values())
+
+    def match_tokens(self, tokens: List[str]) -> List[Tuple[str, float]]:
+        """
+        Trouve les termes du lexique dans une suite de mots, en une passe.
+
+        Args:
+            tokens: Les mots du texte (en minuscules)
+
+        Returns:
+            Les termes trouvés et leur poids, dans l'ordre du texte (une entrée par occurrence)
+        """
+        get = self.words.get
+        # Expressions : seules les positions où commence une expression connue sont examinées
+        found = self._find_phrases(tokens, [i for i, token in enumerate(tokens) if token in self.phrases] if self.phrases else ())
+
+        # Mots isolés, par tronçons entre les expressions trouvées
+        matches = []
+        position = 0
+        for index, end, term, weight in found:
+            matches.extend((token, w) for token in tokens[position:index] if (w := get(token)) is not None)
+            matches.append((term, weight))
+            position = end
+        matches.extend((token, w) for token in tokens[position:] if (w := get(token)) is not None)
+        return matches
+
+    def _find_phrases(self, tokens: List[str], starts: Iterable[int]) -> List[Tuple[int, int, str, float]]:
+        """
+        Trouve les expressions du lexique, sans chevauchement, en essayant la plus longue d'abord.
+
+        Args:
+            tokens: Les mots du texte (en minuscules)
+            starts: Les positions, croissantes, où commence une expression connue
+
+        Returns:
+            Les expressions trouvées : (début, fin, terme, poids)
+        """
+        phrases = self.phrases
+        found = []
+        last_end = 0
+        for index in starts:
+            if index < last_end:
+                continue
+            for phrase, term, weight in phrases[tokens[index]]:
+                end = index + len(phrase)
+                if tuple(tokens[index:end]) == phrase:
+                    found.append((index, end, term, weight))
+                    last_end = end
+                    break
+        return found
+
+    def match(self, text: str) -> List[Tuple[str, float]]:
+        """
+        Trouve les termes du lexique dans un texte.
+
+        Args:
+            text: Le texte
+
+        Returns:
+            Les termes trouvés et leur poids, dans l'ordre du texte
+        """
+        return self.match_tokens(tokenize(text))
+
+    @staticmethod
+    def _totals(matches: List[Tuple[str, float]]) -> Dict[str, float]:
+        """Additionne les poids positifs et négatifs des termes trouvés."""
+        positive = negative = 0.0
+        positive_count = negative_count = 0
+        for _, weight in matches:
+            if weight > 0:
+                positive += weight
+                positive_count += 1
+            elif weight < 0:
+                negative -= weight
+                negative_count += 1
+        return {
+            "positive": positive,
+            "negative": negative,
+            "positive_count": positive_count,
+            "negative_count": negative_count,
+        }
+
+    def score(self, text: str) -> Dict[str, float]:
+        """
+        Calcule les poids positifs et négatifs d'un texte.
+
+        Args:
+            text: Le texte
+
+        Returns:
+            La somme des poids positifs, la somme des poids négatifs (en valeur absolue)
+            et le nombre d'occurrences de termes positifs et négatifs
+        """
+        return self._totals(self.match(text))
+
+    def _get_arrays(self):
+        """
+        Construit l'index des mots et les vecteurs de poids du calcul par lot.
+
+        Returns:
+            Le quadruplet (mot -> colonne, poids positifs, poids négatifs, début d'expression) ;
+            les premiers mots d'expressions ont aussi une colonne, l'avant-dernière colonne
+            reçoit le séparateur de textes et la dernière les mots absents du lexique
+        """
+        if self._arrays is None:
+            vocabulary = list(self.words) + [token for token in self.phrases if token not in self.words]
+            word_ids = {word: index for index, word in enumerate(vocabulary)}
+            word_ids[_BATCH_SEPARATOR] = len(vocabulary)
+            weights = np.zeros(len(vocabulary) + 2)
+            weights[:len(self.words)] = np.fromiter(self.words.values(), dtype=np.float64, count=len(self.words))
+            starts = np.zeros(len(vocabulary) + 2, dtype=bool)
+            starts[[word_ids[token] for token in self.phrases]] = True
+            self._arrays = (word_ids, np.where(weights > 0, weights, 0.0), np.where(weights < 0, -weights, 0.0), starts)
+        return self._arrays
+
+    def score_batch(self, texts: List[str]) -> List[Dict[str, float]]:
+        """
+        Calcule les poids positifs et négatifs d'un lot de textes, avec NumPy.
+
+        Les textes sont joints par un séparateur et découpés en une seule passe ;
+        chaque mot est remplacé par sa colonne dans le lexique, le numéro de texte
+        de chaque mot est le cumul des séparateurs qui le précèdent, puis les poids
+        sont additionnés par texte avec np.bincount (le produit d'une matrice
+        documents-termes creuse par le vecteur des poids). Seules les positions où
+        commence une expression sont examinées en Python.
+
+        Args:
+            texts: Les textes
+
+        Returns:
+            Pour chaque texte, le même résultat que score()
+        """
+        if np is None:
+            return [self.score(text) for text in texts]
+        # Par tranches : les tableaux intermédiaires restent petits (et dans le cache du processeur)
+        results = []
+        for start in range(0, len(texts), BATCH_CHUNK_SIZE):
+            results.extend(self._score_chunk(texts[start:start + BATCH_CHUNK_SIZE]))
+        return results
+
+    def _score_chunk(self, texts: List[str]) -> List[Dict[str, float]]:
+        """Calcule les poids d'une tranche (non vide) d'un lot de textes, voir score_batch()."""
+        word_ids, positive_weights, negative_weights, phrase_starts = self._get_arrays()
+        separator_id = word_ids[_BATCH_SEPARATOR]
+        missing = len(positive_weights) - 1
+        joined = _BATCH_SEPARATOR.join(texts)
+        if joined.count(_BATCH_SEPARATOR) != len(texts) - 1:
+            # Le séparateur n'est pas un caractère de mot : le remplacer ne change pas le découpage
+            joined = _BATCH_SEPARATOR.join(text.replace(_BATCH_SEPARATOR, " ") for text in texts)
+        tokens = _BATCH_RE.findall(joined.lower())
+        columns = np.fromiter(map(word_ids.get, tokens, repeat(missing)), dtype=np.int64, count=len(tokens))
+        rows = np.cumsum(columns == separator_id)
+
+        positive = positive_weights[columns]
+        negative = negative_weights[columns]
+        if self.phrases:
+            # Une expression remplace les mots qui la composent (pas de chevauchement entre textes :
+            # le séparateur n'appartient à aucune expression)
+            found = self._find_phrases(tokens, np.flatnonzero(phrase_starts[columns]).tolist())
+            if found:
+                starts, ends, _, weights = (np.array(values) for values in zip(*found))
+                lengths = ends - starts
+                covered = np.arange(int(lengths.sum())) + np.repeat(starts - (np.cumsum(lengths) - lengths), lengths)
+                positive[covered] = 0.0
+                negative[covered] = 0.0
+                positive[starts] = np.maximum(weights, 0.0)
+                negative[starts] = np.maximum(-weights, 0.0)
+
+        count = len(texts)
+        results = zip(
+            np.bincount(rows, weights=positive, minlength=count).tolist(),
+            np.bincount(rows, weights=negative, minlength=count).tolist(),
+            np.bincount(rows, weights=positive > 0, minlength=count).tolist(),
+            np.bincount(rows, weights=negative > 0, minlength=count).tolist(),
+        )
+        return [
+            {"positive": p, "negative": n, "positive_count": int(pc), "negative_count": int(nc)}
+            for p, n, pc, nc in results
+        ]
+
+
+def lexicon_paths(default_paths: Iterable[str], env_var: str) -> List[str]:
+    """
+    Liste les fichiers d'un lexique : ceux fournis avec le code, puis ceux de la
+    variable d'environnement (chemins séparés par os.pathsep), qui les complètent.
+
+    Args:
+        default_paths: Les fichiers fournis
+        env_var: Le nom de la variable d'environnement
+
+    Returns:
+        Les chemins des fichiers
+    """
+    extra = [path for path in os.environ.get(env_var, "").split(os.pathsep) if path]
+    return list(default_paths) + extra
@@ -0,0 +1,343 @@
+"""
+Délais et limites de concurrence des exécutions de MCPs.
+Un délai (deadline) est attaché au contexte d'exécution courant et propagé
+aux appels HTTP du client partagé ; une cloison (bulkhead) borne les
+exécutions simultanées d'un MCP et le nombre de requêtes en attente,
+au-delà duquel les nouvelles requêtes sont rejetées immédiatement.
+"""
+import asyncio
+import contextvars
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Awaitable, Deque, Iterator, Optional, Tuple
+
+# Instant limite (horloge time.monotonic) de l'exécution courante, None sans délai
+_deadline: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar("mcp_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """Le délai de l'exécution courante est écoulé (réponse HTTP 504)."""
+
+    status_code = 504
+
+
+class Rejected(RuntimeError):
+    """Requête rejetée sans être exécutée, faute de capacité (réponse HTTP 429 ou 503)."""
+
+    def __init__(self, message: str, status_code: int = 503, retry_after: int = 1):
+        """
+        Initialise le rejet.
+
+        Args:
+            message: La raison du rejet
+            status_code: 429 (trop de requêtes pour ce MCP) ou 503 (service saturé)
+            retry_after: Délai conseillé avant une nouvelle tentative (secondes)
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+def get_deadline() -> Optional[float]:
+    """
+    Récupère l'instant limite de l'exécution courante.
+
+    Returns:
+        L'instant limite (time.monotonic), ou None sans délai
+    """
+    return _deadline.get()
+
+
+def remaining_time() -> Optional[float]:
+    """
+    Calcule le temps restant avant l'instant limite de l'exécution courante.
+
+    Returns:
+        Le temps restant en secondes (jamais négatif), ou None sans délai
+    """
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(deadline - time.monotonic(), 0.0)
+
+
+def check_deadline() -> None:
+    """
+    Vérifie que le délai de l'exécution courante n'est pas écoulé.
+
+    Raises:
+        DeadlineExceeded: Si le délai est écoulé
+    """
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("délai d'exécution dépassé")
+
+
+@contextmanager
+def deadline_scope(timeout: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Attache un délai au contexte courant (un délai englobant plus court est conservé).
+
+    Args:
+        timeout: Le délai en secondes (None pour garder le délai courant)
+
+    Returns:
+        L'instant limite en vigueur dans le bloc
+    """
+    deadline = _deadline.get()
+    if timeout is not None:
+        candidate = time.monotonic() + timeout
+        deadline = candidate if deadline is None else min(deadline, candidate)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+async def run_with_deadline(awaitable: Awaitable[Any], deadline: Optional[float]) -> Any:
+    """
+    Attend une coroutine sous un instant limite, en l'annulant s'il est dépassé.
+    Utile quand la coroutine s'exécute sur une autre boucle que celle de l'appelant :
+    le délai est rattaché au contexte de la tâche.
+
+    Args:
+        awaitable: La coroutine
+        deadline: L'instant limite (time.monotonic), ou None sans délai
+
+    Returns:
+        Le résultat de la coroutine
+
+    Raises:
+        DeadlineExceeded: Si l'instant limite est dépassé
+    """
+    token = _deadline.set(deadline)
+    try:
+        if deadline is None:
+            return await awaitable
+        try:
+            return await asyncio.wait_for(awaitable, max(deadline - time.monotonic(), 0.0))
+        except asyncio.TimeoutError:
+            raise DeadlineExceeded("délai d'exécution dépassé") from None
+    finally:
+        _deadline.reset(token)
+
+
+def clamp_timeout(timeout: Any) -> Any:
+    """
+    Réduit un timeout HTTP (valeur unique ou couple connexion/lecture) au temps restant.
+
+    Args:
+        timeout: Le timeout demandé
+
+    Returns:
+        Le timeout, au plus égal au temps restant
+
+    Raises:
+        DeadlineExceeded: Si le délai est déjà écoulé
+    """
+    remaining = remaining_time()
+    if remaining is None:
+        return timeout
+    if remaining <= 0:
+        raise DeadlineExceeded("délai d'exécution dépassé avant l'appel HTTP")
+    if isinstance(timeout, tuple):
+        return tuple(remaining if value is None else min(value, remaining) for value in timeout)
+    return remaining if timeout is None else min(timeout, remaining)
+
+
+class Bulkhead:
+    """
+    Cloison d'un MCP : au plus `max_concurrency` exécutions simultanées et au plus
+    `max_queue` requêtes en attente d'une place ; les suivantes sont rejetées.
+
+    Les threads attendent sur le sémaphore ; les tâches asyncio attendent un futur de
+    leur boucle, réveillé par release() (une tâche à la fois, dans l'ordre d'arrivée).
+    """
+
+    def __init__(self, name: str, max_concurrency: Optional[int] = None, max_queue: Optional[int] = None):
+        """
+        Initialise la cloison.
+
+        Args:
+            name: Le nom du MCP (pour les messages)
+            max_concurrency: Nombre maximal d'exécutions simultanées (None : pas de limite)
+            max_queue: Nombre maximal de requêtes en attente (None : pas de limite)
+        """
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self._semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency else None
+        self._lock = threading.Lock()
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+        # Tâches asyncio en attente d'une place : (boucle, futur à réveiller)
+        self._async_waiters: Deque[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = deque()
+
+    def _enter_queue(self) -> bool:
+        """Prend une place d'exécution si possible, sinon une place d'attente (ou rejette)."""
+        if self._semaphore is None or self._semaphore.acquire(blocking=False):
+            with self._lock:
+                self.active += 1
+            return True
+        with self._lock:
+            if self.max_queue is not None and self.waiting >= self.max_queue:
+                self.rejected += 1
+                raise Rejected(f"MCP '{self.name}' saturé : {self.waiting} requêtes en attente", status_code=429)
+            self.waiting += 1
+        return False
+
+    def _leave_queue(self, acquired: bool) -> None:
+        """Sort de l'attente, avec ou sans place d'exécution."""
+        with self._lock:
+            self.waiting -= 1
+            if acquired:
+                self.active += 1
+            else:
+                self.timed_out += 1
+        if not acquired:
+            raise DeadlineExceeded(f"délai dépassé en attente d'une place pour le MCP '{self.name}'")
+
+    def acquire(self) -> None:
+        """
+        Prend une place d'exécution, en attendant au plus jusqu'à l'instant limite courant.
+
+        Raises:
+            Rejected: Si la file d'attente est pleine
+            DeadlineExceeded: Si le délai est écoulé avant qu'une place se libère
+        """
+        if self._enter_queue():
+            return
+        remaining = remaining_time()
+        acquired = self._semaphore.acquire(timeout=remaining) if remaining is None or remaining > 0 else False
+        self._leave_queue(acquired)
+
+    async def acquire_async(self) -> None:
+        """
+        Prend une place d'exécution sans bloquer la boucle d'événements.
+        L'attente est annulable : aucune place n'est gardée si la tâche est annulée.
+
+        Raises:
+            Rejected: Si la file d'attente est pleine
+            DeadlineExceeded: Si le délai est écoulé avant qu'une place se libère
+        """
+        if self._enter_queue():
+            return
+        loop = asyncio.get_running_loop()
+        acquired = False
+        try:
+            while True:
+                remaining = remaining_time()
+                if remaining is not None and remaining <= 0:
+                    break
+                # Sous le verrou : une place libérée après cet essai réveille forcément ce futur
+                with self._lock:
+                    acquired = self._semaphore.acquire(blocking=False)
+                    if acquired:
+                        break
+                    waiter = loop.create_future()
+                    self._async_waiters.append((loop, waiter))
+                try:
+                    await asyncio.wait_for(waiter, remaining)
+                except asyncio.TimeoutError:
+                    self._discard_waiter(waiter)
+                    break
+                except asyncio.CancelledError:
+                    self._discard_waiter(waiter)
+                    raise
+        except asyncio.CancelledError:
+            with self._lock:
+                self.waiting -= 1
+            raise
+        self._leave_queue(acquired)
+
+    def _discard_waiter(self, waiter: asyncio.Future) -> None:
+        """Retire une tâche qui n'attend plus ; un réveil déjà reçu passe à la suivante."""
+        with self._lock:
+            for entry in self._async_waiters:
+                if entry[1] is waiter:
+                    self._async_waiters.remove(entry)
+                    return
+        if waiter.done() and not waiter.cancelled():
+            self._wake_next()
+
+    def _wake_next(self) -> None:
+        """Réveille la première tâche asyncio en attente d'une place, depuis n'importe quel thread."""
+        with self._lock:
+            if not self._async_waiters:
+                return
+            loop, waiter = self._async_waiters.popleft()
+        try:
+            loop.call_soon_threadsafe(self._wake, waiter)
+        except RuntimeError:
+            # Boucle fermée : la tâche n'attend plus
+            self._wake_next()
+
+    def _wake(self, waiter: asyncio.Future) -> None:
+        """Réveille une tâche dans sa boucle (la suivante si elle a abandonné entre-temps)."""
+        if waiter.cancelled():
+            self._wake_next()
+        elif not waiter.done():
+            waiter.set_result(None)
+
+    def release(self) -> None:
+        """Libère une place d'exécution."""
+        with self._lock:
+            self.active -= 1
+        if self._semaphore is not None:
+            self._semaphore.release()
+            self._wake_next()
+
+    def get_stats(self) -> dict:
+        """
+        Récupère l'occupation de la cloison.
+
+        Returns:
+            Les limites, les exécutions en cours, en attente, rejetées et expirées
+        """
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionLimit:
+    """Nombre maximal d'exécutions de MCPs en cours dans le processus, tous MCPs confondus."""
+
+    def __init__(self, limit: Optional[int]):
+        """
+        Initialise la limite.
+
+        Args:
+            limit: Nombre maximal d'exécutions en cours (None ou 0 : pas de limite)
+        """
+        self.limit = limit or None
+        self.in_flight = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def enter(self) -> None:
+        """
+        Admet une exécution.
+
+        Raises:
+            Rejected: Si la limite est atteinte (503)
+        """
+        with self._lock:
+            if self.limit is not None and self.in_flight >= self.limit:
+                self.rejected += 1
+                raise Rejected(f"service saturé : {self.in_flight} exécutions en cours", status_code=503)
+            self.in_flight += 1
+
+    def leave(self) -> None:
+        """Termine une exécution admise."""
+        with self._lock:
+            self.in_flight -= 1
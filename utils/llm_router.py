@@ -0,0 +1,888 @@
+"""
+Routage des requêtes de génération entre plusieurs fournisseurs de LLM.
+Chaque fournisseur (HuggingFace, OpenAI, Anthropic, Google AI, Mistral AI,
+Cohere) est appelé par un adaptateur qui traduit une conversation commune
+(messages au format OpenAI, ou un prompt texte) vers son API. Le routeur
+mesure, sur une fenêtre glissante, la latence (médiane et 95e centile) et le
+taux d'erreur de chaque fournisseur ; il envoie une requête au fournisseur
+sain le plus rapide, passe au suivant en cas d'erreur ou de timeout, et
+relance une requête lente auprès d'un autre fournisseur (hedging) quand elle
+dépasse le 95e centile habituel du premier : la première réponse l'emporte.
+Une réponse en streaming change de fournisseur tant qu'aucun token n'a été reçu.
+"""
+import codecs
+import contextvars
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from utils.http_client import http_client
+from utils.limits import DeadlineExceeded, remaining_time
+
+# Une requête : un prompt texte, ou des messages {"role", "content"} (system, user, assistant)
+Prompt = Union[str, List[Dict[str, str]]]
+
+# Nombre d'appels gardés par fournisseur pour les statistiques glissantes
+STATS_WINDOW = int(os.environ.get("LLM_ROUTER_WINDOW", 100))
+
+# Nombre minimal d'appels mesurés avant de se fier aux centiles d'un fournisseur
+MIN_SAMPLES = 5
+
+# Mise à l'écart d'un fournisseur : après ce nombre d'échecs consécutifs, ou ce taux d'erreur sur la fenêtre
+FAILURE_THRESHOLD = int(os.environ.get("LLM_ROUTER_FAILURE_THRESHOLD", 3))
+ERROR_RATE_THRESHOLD = float(os.environ.get("LLM_ROUTER_ERROR_RATE", 0.5))
+
+# Durée de mise à l'écart (secondes) ; ensuite, une requête sert de test
+COOLDOWN = float(os.environ.get("LLM_ROUTER_COOLDOWN", 30.0))
+
+# Relance des requêtes lentes : activée, délai avant la relance tant que le 95e centile n'est pas connu,
+# et bornes du délai (secondes)
+HEDGE_ENABLED = os.environ.get("LLM_ROUTER_HEDGE", "1") == "1"
+HEDGE_DEFAULT_DELAY = float(os.environ.get("LLM_ROUTER_HEDGE_DELAY", 2.0))
+HEDGE_MIN_DELAY = 0.05
+HEDGE_MAX_DELAY = 30.0
+
+# Nombre de requêtes simultanées vers les fournisseurs (relances comprises)
+MAX_WORKERS = int(os.environ.get("LLM_ROUTER_WORKERS", 32))
+
+# Ordre de préférence des fournisseurs à latence égale, et modèle utilisé par défaut pour chacun
+PROVIDER_ORDER = [name for name in os.environ.get(
+    "LLM_ROUTER_PROVIDERS", "huggingface,openai,anthropic,google,mistral,cohere"
+).split(",") if name]
+DEFAULT_MODELS = {
+    "huggingface": "google/flan-t5-xxl",
+    "openai": "gpt-3.5-turbo",
+    "anthropic": "claude-3-haiku-20240307",
+    "google": "gemini-1.5-flash",
+    "mistral": "mistral-small-latest",
+    "cohere": "command-r",
+}
+
+# Nombre maximal d'octets lus d'un coup dans un flux SSE (la lecture rend ce qui est déjà arrivé)
+SSE_READ_SIZE = 8192
+
+# Valeurs d'exemple des anciennes configurations : équivalent à une clé absente
+_PLACEHOLDER_KEYS = {"[YOUR ACCESS TOKEN]", "your-openai-api-key"}
+
+
+class ProviderError(RuntimeError):
+    """Échec d'un appel à un fournisseur (réponse en erreur ou inattendue)."""
+
+    def __init__(self, message: str, status_code: int = 502):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class StreamError(ProviderError):
+    """Erreur signalée par le fournisseur au cours d'un flux, après d'éventuels tokens."""
+
+
+class NoProviderAvailable(ProviderError):
+    """Aucun fournisseur n'a pu répondre (aucun configuré, ou tous en échec)."""
+
+    def __init__(self, message: str, errors: Optional[List[Tuple[str, Exception]]] = None):
+        super().__init__(message, 503)
+        self.errors = errors or []
+
+
+def as_messages(prompt: Prompt) -> List[Dict[str, str]]:
+    """
+    Convertit une requête en messages de chat.
+
+    Args:
+        prompt: Le prompt texte ou les messages
+
+    Returns:
+        Les messages (un prompt texte devient un message de l'utilisateur)
+    """
+    if isinstance(prompt, str):
+        return [{"role": "user", "content": prompt}]
+    return list(prompt)
+
+
+def as_text(prompt: Prompt) -> str:
+    """
+    Convertit une requête en prompt texte pour un modèle de complétion.
+
+    Args:
+        prompt: Le prompt texte ou les messages
+
+    Returns:
+        Le prompt : messages système, puis échanges préfixés "Human:" et "AI:" (comme
+        ConversationWindow.render), terminé par "AI:"
+    """
+    if isinstance(prompt, str):
+        return prompt
+    labels = {"user": "Human", "assistant": "AI"}
+    parts = [m["content"] for m in prompt if m["role"] == "system"]
+    turns = "\n".join(f"{labels.get(m['role'], m['role'])}: {m['content']}" for m in prompt if m["role"] != "system")
+    if turns:
+        parts.append(turns)
+    return "\n\n".join(parts) + "\nAI:"
+
+
+def _iter_received(response: Any) -> Iterator[bytes]:
+    """
+    Lit le corps d'une réponse en streaming au fur et à mesure de son arrivée.
+
+    iter_content(chunk_size=None) n'est incrémental qu'avec l'encodage chunked : une
+    réponse délimitée par la fermeture de la connexion serait lue en entier avant
+    le premier token. read1 (urllib3 2) rend les octets déjà reçus, quel que soit l'encodage.
+
+    Args:
+        response: La réponse HTTP ouverte en mode stream
+
+    Returns:
+        Un itérateur sur les blocs d'octets reçus (décompressés)
+    """
+    raw = response.raw
+    if hasattr(raw, "read1"):
+        while True:
+            block = raw.read1(SSE_READ_SIZE, decode_content=True)
+            if not block:
+                return
+            yield block
+    else:
+        # urllib3 1.x : octet par octet, chacun traité dès sa réception
+        yield from response.iter_content(chunk_size=1)
+
+
+def iter_sse_data(response: Any) -> Iterator[str]:
+    """
+    Extrait les champs "data" d'un flux Server-Sent Events.
+
+    Args:
+        response: La réponse HTTP ouverte en mode stream
+
+    Returns:
+        Un itérateur sur le contenu des lignes "data:", dès la réception de chaque ligne
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    for block in _iter_received(response):
+        pending += decoder.decode(block)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            if line.startswith("data:"):
+                yield line[5:].strip()
+    pending += decoder.decode(b"", final=True)
+    if pending.startswith("data:"):
+        yield pending[5:].strip()
+
+
+def _split_system(messages: List[Dict[str, str]]) -> Tuple[str, List[Dict[str, str]]]:
+    """Sépare les messages système (joints) des échanges, pour les API qui les reçoivent à part."""
+    system = "\n\n".join(m["content"] for m in messages if m["role"] == "system")
+    return system, [m for m in messages if m["role"] != "system"]
+
+
+class Provider:
+    """
+    Adaptateur d'un fournisseur de LLM.
+
+    La clé API est une chaîne, ou une fonction appelée à chaque requête (une clé
+    modifiée dans la configuration est prise en compte sans recréer l'adaptateur).
+    """
+
+    # URL de base de l'API du fournisseur
+    default_base_url = ""
+
+    def __init__(
+        self,
+        name: str,
+        model: str,
+        api_key: Union[str, Callable[[], Optional[str]], None] = None,
+        base_url: Optional[str] = None,
+    ):
+        """
+        Initialise l'adaptateur.
+
+        Args:
+            name: Le nom du fournisseur dans le routeur
+            model: Le modèle appelé
+            api_key: La clé API, ou la fonction qui la fournit
+            base_url: L'URL de base de l'API (par défaut celle du fournisseur, à remplacer pour un serveur local)
+        """
+        self.name = name
+        self.model = model
+        self.api_key = api_key
+        self._configured_api_key = api_key
+        self.base_url = (base_url or self.default_base_url).rstrip("/")
+
+    def get_api_key(self) -> Optional[str]:
+        """
+        Récupère la clé API du fournisseur.
+
+        Returns:
+            La clé, ou None si elle n'est pas définie
+        """
+        key = self.api_key() if callable(self.api_key) else self.api_key
+        return key if key and key not in _PLACEHOLDER_KEYS else None
+
+    def set_api_key(self, api_key: Optional[str]) -> None:
+        """
+        Remplace la clé API du fournisseur.
+
+        Args:
+            api_key: La nouvelle clé (vide ou valeur d'exemple : la clé donnée à la création est rétablie)
+        """
+        self.api_key = api_key if api_key and api_key not in _PLACEHOLDER_KEYS else self._configured_api_key
+
+    def is_configured(self) -> bool:
+        """
+        Indique si le fournisseur peut être appelé (clé API définie).
+
+        Returns:
+            True si une clé API est définie
+        """
+        return self.get_api_key() is not None
+
+    def generate(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> str:
+        """
+        Génère une réponse.
+
+        Args:
+            prompt: Le prompt texte ou les messages
+            temperature: La température de génération
+            max_tokens: Le nombre maximal de tokens générés
+            timeout: Délai maximal de l'appel (secondes), sinon celui du client HTTP
+
+        Returns:
+            Le texte généré
+
+        Raises:
+            ProviderError: Si le fournisseur répond en erreur ou de façon inattendue
+            requests.RequestException: Si l'appel échoue (connexion, timeout)
+        """
+        raise NotImplementedError
+
+    def stream(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> Iterator[str]:
+        """
+        Génère une réponse fragment par fragment.
+
+        Par défaut, la réponse complète de generate() forme un seul fragment ; les
+        adaptateurs des API qui diffusent les tokens redéfinissent cette méthode.
+
+        Args:
+            prompt: Le prompt texte ou les messages
+            temperature: La température de génération
+            max_tokens: Le nombre maximal de tokens générés
+            timeout: Délai maximal d'attente de chaque lecture (secondes), sinon celui du client HTTP
+
+        Returns:
+            Un itérateur sur les fragments du texte généré, au fur et à mesure de leur arrivée
+
+        Raises:
+            ProviderError: Si le fournisseur répond en erreur ou de façon inattendue
+            StreamError: Si le fournisseur signale une erreur au cours du flux
+            requests.RequestException: Si l'appel échoue (connexion, timeout)
+        """
+        yield self.generate(prompt, temperature, max_tokens, timeout)
+
+    def _post(self, url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: Optional[float]) -> Any:
+        """Envoie une requête JSON et retourne la réponse décodée (ProviderError si elle est en erreur)."""
+        return self._decode(http_client.post(url, headers=headers, json=payload, timeout=timeout))
+
+    def _decode(self, response: Any) -> Any:
+        """Décode une réponse JSON (ProviderError si elle est en erreur ou n'est pas du JSON)."""
+        try:
+            result = response.json()
+        except ValueError:
+            result = None
+        if response.status_code != 200:
+            error = result.get("error", result.get("message")) if isinstance(result, dict) else None
+            if isinstance(error, dict):
+                error = error.get("message", error)
+            raise ProviderError(f"{self.name} ({response.status_code}): {error or response.text[:200]}", response.status_code)
+        if result is None:
+            raise ProviderError(f"{self.name}: réponse non JSON : {response.text[:200]}")
+        return result
+
+    def _unexpected(self, result: Any) -> ProviderError:
+        """Erreur pour une réponse dont le format n'est pas celui attendu."""
+        return ProviderError(f"{self.name}: réponse inattendue : {str(result)[:200]}")
+
+
+class HuggingFaceProvider(Provider):
+    """API d'inférence HuggingFace (modèles de complétion : le prompt est envoyé sous forme de texte)."""
+
+    default_base_url = "https://api-inference.huggingface.co/models"
+
+    def _payload(self, prompt: Prompt, temperature: float, max_tokens: int) -> Dict[str, Any]:
+        """Corps de la requête d'inférence."""
+        # Une température nulle n'est pas acceptée : génération gloutonne à la place
+        parameters: Dict[str, Any] = {"max_new_tokens": max_tokens}
+        if temperature > 0:
+            parameters["temperature"] = temperature
+        else:
+            parameters["do_sample"] = False
+        return {"inputs": as_text(prompt), "parameters": parameters}
+
+    def generate(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> str:
+        result = self._post(
+            f"{self.base_url}/{self.model}",
+            {"Authorization": f"Bearer {self.get_api_key()}"},
+            self._payload(prompt, temperature, max_tokens),
+            timeout,
+        )
+        return self._generated_text(result)
+
+    def stream(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> Iterator[str]:
+        with http_client.post(
+            f"{self.base_url}/{self.model}",
+            headers={"Authorization": f"Bearer {self.get_api_key()}"},
+            json={**self._payload(prompt, temperature, max_tokens), "stream": True},
+            timeout=timeout,
+            stream=True,
+        ) as response:
+            # Les modèles sans support du streaming répondent en JSON d'un seul bloc
+            if "text/event-stream" not in response.headers.get("Content-Type", ""):
+                yield self._generated_text(self._decode(response))
+                return
+            for data in iter_sse_data(response):
+                event = json.loads(data)
+                if event.get("error"):
+                    # Les tokens déjà relayés ne forment pas une réponse complète : l'appelant doit le savoir
+                    raise StreamError(f"{self.name}: {event['error']}")
+                token = event.get("token", {})
+                if not token.get("special"):
+                    yield token.get("text", "")
+
+    def _generated_text(self, result: Any) -> str:
+        """Texte généré d'une réponse d'inférence."""
+        if isinstance(result, list) and result and isinstance(result[0], dict) and "generated_text" in result[0]:
+            return result[0]["generated_text"]
+        if isinstance(result, dict) and "error" in result:
+            # Modèle en cours de chargement : même traitement qu'une indisponibilité
+            raise ProviderError(f"{self.name}: {result['error']}", 503)
+        raise self._unexpected(result)
+
+
+class OpenAIProvider(Provider):
+    """API de chat d'OpenAI, et API compatibles (Mistral AI, serveurs locaux)."""
+
+    default_base_url = "https://api.openai.com/v1"
+
+    def generate(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> str:
+        result = self._post(
+            f"{self.base_url}/chat/completions",
+            {"Authorization": f"Bearer {self.get_api_key()}", "Content-Type": "application/json"},
+            {"model": self.model, "messages": as_messages(prompt), "temperature": temperature, "max_tokens": max_tokens},
+            timeout,
+        )
+        try:
+            return result["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            raise self._unexpected(result)
+
+    def stream(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> Iterator[str]:
+        with http_client.post(
+            f"{self.base_url}/chat/completions",
+            headers={"Authorization": f"Bearer {self.get_api_key()}", "Content-Type": "application/json"},
+            json={"model": self.model, "messages": as_messages(prompt), "temperature": temperature, "max_tokens": max_tokens, "stream": True},
+            timeout=timeout,
+            stream=True,
+        ) as response:
+            if response.status_code != 200:
+                self._decode(response)
+            for data in iter_sse_data(response):
+                if data == "[DONE]":
+                    return
+                event = json.loads(data)
+                if event.get("error"):
+                    error = event["error"]
+                    raise StreamError(f"{self.name}: {error.get('message', error) if isinstance(error, dict) else error}")
+                choices = event.get("choices", [])
+                if choices:
+                    content = choices[0].get("delta", {}).get("content")
+                    if content:
+                        yield content
+
+
+class MistralProvider(OpenAIProvider):
+    """API de chat de Mistral AI (compatible avec celle d'OpenAI)."""
+
+    default_base_url = "https://api.mistral.ai/v1"
+
+
+class AnthropicProvider(Provider):
+    """API Messages d'Anthropic (le prompt système est transmis à part)."""
+
+    default_base_url = "https://api.anthropic.com/v1"
+    api_version = "2023-06-01"
+
+    def generate(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> str:
+        system, messages = _split_system(as_messages(prompt))
+        payload: Dict[str, Any] = {"model": self.model, "messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+        if system:
+            payload["system"] = system
+        result = self._post(
+            f"{self.base_url}/messages",
+            {"x-api-key": self.get_api_key() or "", "anthropic-version": self.api_version, "Content-Type": "application/json"},
+            payload,
+            timeout,
+        )
+        try:
+            return "".join(block["text"] for block in result["content"] if block.get("type") == "text")
+        except (KeyError, TypeError):
+            raise self._unexpected(result)
+
+
+class GoogleProvider(Provider):
+    """API Gemini de Google AI (rôles "user" et "model", prompt système à part)."""
+
+    default_base_url = "https://generativelanguage.googleapis.com/v1beta"
+
+    def generate(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> str:
+        system, messages = _split_system(as_messages(prompt))
+        payload: Dict[str, Any] = {
+            "contents": [
+                {"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+                for m in messages
+            ],
+            "generationConfig": {"temperature": temperature, "maxOutputTokens": max_tokens},
+        }
+        if system:
+            payload["systemInstruction"] = {"parts": [{"text": system}]}
+        result = self._post(
+            f"{self.base_url}/models/{self.model}:generateContent",
+            {"x-goog-api-key": self.get_api_key() or "", "Content-Type": "application/json"},
+            payload,
+            timeout,
+        )
+        try:
+            return "".join(part.get("text", "") for part in result["candidates"][0]["content"]["parts"])
+        except (KeyError, IndexError, TypeError):
+            raise self._unexpected(result)
+
+
+class CohereProvider(Provider):
+    """API de chat de Cohere (v2)."""
+
+    default_base_url = "https://api.cohere.com/v2"
+
+    def generate(self, prompt: Prompt, temperature: float = 0.7, max_tokens: int = 150, timeout: Optional[float] = None) -> str:
+        result = self._post(
+            f"{self.base_url}/chat",
+            {"Authorization": f"Bearer {self.get_api_key()}", "Content-Type": "application/json"},
+            {"model": self.model, "messages": as_messages(prompt), "temperature": temperature, "max_tokens": max_tokens},
+            timeout,
+        )
+        try:
+            return "".join(block.get("text", "") for block in result["message"]["content"])
+        except (KeyError, TypeError):
+            raise self._unexpected(result)
+
+
+# Adaptateur de chaque service de LLM_SERVICES
+PROVIDER_CLASSES = {
+    "huggingface": HuggingFaceProvider,
+    "openai": OpenAIProvider,
+    "anthropic": AnthropicProvider,
+    "google": GoogleProvider,
+    "mistral": MistralProvider,
+    "cohere": CohereProvider,
+}
+
+
+class ProviderStats:
+    """Latences et erreurs des derniers appels d'un fournisseur, et état de mise à l'écart."""
+
+    def __init__(self, window: int = STATS_WINDOW):
+        # Derniers appels : (réussite, durée en secondes)
+        self.calls: Deque[Tuple[bool, float]] = deque(maxlen=window)
+        self.requests = 0
+        self.errors = 0
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.last_error: Optional[str] = None
+
+    def record(self, ok: bool, duration: float, error: Optional[Exception] = None) -> None:
+        """
+        Enregistre un appel.
+
+        Args:
+            ok: True si l'appel a réussi
+            duration: La durée de l'appel (secondes)
+            error: L'erreur, en cas d'échec
+        """
+        self.calls.append((ok, duration))
+        self.requests += 1
+        if ok:
+            self.consecutive_failures = 0
+            return
+        self.errors += 1
+        self.consecutive_failures += 1
+        self.last_error = str(error) if error is not None else None
+        if self.consecutive_failures >= FAILURE_THRESHOLD or (
+            len(self.calls) >= MIN_SAMPLES and self.error_rate() >= ERROR_RATE_THRESHOLD
+        ):
+            self.cooldown_until = time.monotonic() + COOLDOWN
+
+    def error_rate(self) -> float:
+        """Part des appels en échec sur la fenêtre."""
+        if not self.calls:
+            return 0.0
+        return sum(1 for ok, _ in self.calls if not ok) / len(self.calls)
+
+    def latency(self, quantile: float) -> Optional[float]:
+        """
+        Centile de la durée des appels réussis de la fenêtre.
+
+        Args:
+            quantile: Le centile (entre 0 et 1)
+
+        Returns:
+            La durée (secondes), None si moins de MIN_SAMPLES appels ont réussi
+        """
+        durations = sorted(duration for ok, duration in self.calls if ok)
+        if len(durations) < MIN_SAMPLES:
+            return None
+        return durations[min(int(quantile * len(durations)), len(durations) - 1)]
+
+    def is_healthy(self, now: Optional[float] = None) -> bool:
+        """Indique si le fournisseur n'est pas mis à l'écart."""
+        return (now if now is not None else time.monotonic()) >= self.cooldown_until
+
+    def expected_latency(self) -> float:
+        """
+        Durée attendue d'une requête : latence médiane, pénalisée par le taux d'erreur
+        (un fournisseur pas encore mesuré passe en premier, pour être mesuré).
+        """
+        median = self.latency(0.5)
+        if median is None:
+            return 0.0
+        return median / max(1.0 - self.error_rate(), 0.1)
+
+
+class LLMRouter:
+    """
+    Répartit les requêtes de génération entre des fournisseurs, selon leur latence et leurs erreurs.
+    """
+
+    def __init__(self, providers: Iterable[Provider], hedge: bool = HEDGE_ENABLED, max_workers: int = MAX_WORKERS):
+        """
+        Initialise le routeur.
+
+        Args:
+            providers: Les adaptateurs, dans l'ordre de préférence à latence égale
+            hedge: Si True, une requête lente est relancée auprès du fournisseur suivant
+            max_workers: Nombre maximal d'appels simultanés aux fournisseurs
+        """
+        self.providers: Dict[str, Provider] = {provider.name: provider for provider in providers}
+        self.hedge = hedge
+        self.max_workers = max_workers
+        self._stats: Dict[str, ProviderStats] = {name: ProviderStats() for name in self.providers}
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._counters = {"requests": 0, "failures": 0, "failovers": 0, "hedges": 0, "hedge_wins": 0}
+
+    def get_provider(self, name: str) -> Optional[Provider]:
+        """
+        Récupère l'adaptateur d'un fournisseur.
+
+        Args:
+            name: Le nom du fournisseur
+
+        Returns:
+            L'adaptateur, ou None s'il n'est pas dans le routeur
+        """
+        return self.providers.get(name)
+
+    def ranked(self, prefer: Optional[str] = None) -> List[Provider]:
+        """
+        Classe les fournisseurs configurés pour une requête.
+
+        Args:
+            prefer: Le fournisseur à essayer en premier s'il n'est pas mis à l'écart
+
+        Returns:
+            Les fournisseurs sains, du plus rapide au plus lent, puis ceux mis à l'écart
+            (de la fin de mise à l'écart la plus proche à la plus lointaine), en dernier recours
+        """
+        configured = [provider for provider in self.providers.values() if provider.is_configured()]
+        now = time.monotonic()
+        order = {name: position for position, name in enumerate(self.providers)}
+        with self._lock:
+            candidates = [(self._stats[provider.name], provider) for provider in configured]
+            healthy = sorted(
+                ((stats.expected_latency(), order[provider.name], provider) for stats, provider in candidates if stats.is_healthy(now)),
+                key=lambda item: item[:2],
+            )
+            cooling = sorted(
+                ((stats.cooldown_until, order[provider.name], provider) for stats, provider in candidates if not stats.is_healthy(now)),
+                key=lambda item: item[:2],
+            )
+        providers = [provider for _, _, provider in healthy]
+        if prefer is not None:
+            preferred = [provider for provider in providers if provider.name == prefer]
+            providers = preferred + [provider for provider in providers if provider.name != prefer]
+        return providers + [provider for _, _, provider in cooling]
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Récupère l'exécuteur des appels aux fournisseurs (créé à la première requête)."""
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="llm-router")
+        return self._executor
+
+    def _call(self, provider: Provider, prompt: Prompt, temperature: float, max_tokens: int, timeout: Optional[float]) -> str:
+        """Appelle un fournisseur et enregistre la durée et l'issue de l'appel."""
+        start = time.perf_counter()
+        try:
+            answer = provider.generate(prompt, temperature, max_tokens, timeout)
+        except Exception as e:
+            with self._lock:
+                self._stats[provider.name].record(False, time.perf_counter() - start, e)
+            raise
+        with self._lock:
+            self._stats[provider.name].record(True, time.perf_counter() - start)
+        return answer
+
+    def _hedge_delay(self, provider: Provider) -> float:
+        """Délai au-delà duquel une requête au fournisseur est relancée ailleurs : son 95e centile."""
+        with self._lock:
+            p95 = self._stats[provider.name].latency(0.95)
+        if p95 is None:
+            return HEDGE_DEFAULT_DELAY
+        return min(max(p95, HEDGE_MIN_DELAY), HEDGE_MAX_DELAY)
+
+    def generate(
+        self,
+        prompt: Prompt,
+        temperature: float = 0.7,
+        max_tokens: int = 150,
+        prefer: Optional[str] = None,
+        timeout: Optional[float] = None,
+        hedge: Optional[bool] = None,
+    ) -> Dict[str, Any]:
+        """
+        Génère une réponse auprès du fournisseur sain le plus rapide.
+
+        Une erreur ou un timeout fait passer au fournisseur suivant ; avec le hedging,
+        une requête plus lente que le 95e centile de son fournisseur est relancée
+        auprès du suivant, et la première réponse obtenue est retournée (l'autre
+        appel se termine en arrière-plan et compte dans les statistiques).
+
+        Args:
+            prompt: Le prompt texte ou les messages
+            temperature: La température de génération
+            max_tokens: Le nombre maximal de tokens générés
+            prefer: Le fournisseur à essayer en premier s'il n'est pas mis à l'écart
+            timeout: Délai maximal de chaque appel (secondes), sinon celui du client HTTP
+            hedge: Active ou désactive le hedging pour cette requête (par défaut, celui du routeur)
+
+        Returns:
+            Un dictionnaire avec le texte généré ("text"), le fournisseur ("provider") et le
+            modèle ("model") qui l'ont produit, la durée ("latency_ms") et le nombre d'appels ("attempts")
+
+        Raises:
+            NoProviderAvailable: Si aucun fournisseur n'est configuré, ou si tous ont échoué
+            DeadlineExceeded: Si le délai de l'exécution courante est écoulé
+        """
+        hedge = self.hedge if hedge is None else hedge
+        candidates = self.ranked(prefer)
+        if not candidates:
+            raise NoProviderAvailable("aucun fournisseur de LLM configuré (clé API absente)")
+
+        start = time.perf_counter()
+        executor = self._get_executor()
+        pending: Dict[Future, Provider] = {}
+        errors: List[Tuple[str, Exception]] = []
+        launched = 0
+
+        def launch() -> Provider:
+            nonlocal launched
+            provider = candidates[launched]
+            launched += 1
+            # Le délai de l'exécution courante (variable de contexte) suit l'appel dans le thread
+            future = executor.submit(contextvars.copy_context().run, self._call, provider, prompt, temperature, max_tokens, timeout)
+            pending[future] = provider
+            return provider
+
+        with self._lock:
+            self._counters["requests"] += 1
+        last = launch()
+        while pending:
+            # Attente jusqu'à la première réponse, ou jusqu'au moment de relancer ailleurs
+            delay = self._hedge_delay(last) if hedge and launched < len(candidates) else None
+            remaining = remaining_time()
+            if remaining is not None:
+                if remaining <= 0:
+                    raise DeadlineExceeded("délai écoulé en attendant les fournisseurs de LLM")
+                delay = remaining if delay is None else min(delay, remaining)
+            done, _ = wait(pending, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                if remaining is not None and delay == remaining:
+                    continue
+                last = launch()
+                with self._lock:
+                    self._counters["hedges"] += 1
+                continue
+
+            for future in done:
+                provider = pending.pop(future)
+                try:
+                    answer = future.result()
+                except Exception as e:
+                    errors.append((provider.name, e))
+                    continue
+                with self._lock:
+                    if provider is not candidates[0] and len(errors) == 0:
+                        self._counters["hedge_wins"] += 1
+                return {
+                    "text": answer,
+                    "provider": provider.name,
+                    "model": provider.model,
+                    "latency_ms": (time.perf_counter() - start) * 1000,
+                    "attempts": launched,
+                }
+
+            # Échec : passer au fournisseur suivant, sans attendre les appels encore en cours
+            if launched < len(candidates):
+                last = launch()
+                with self._lock:
+                    self._counters["failovers"] += 1
+
+        with self._lock:
+            self._counters["failures"] += 1
+        details = "; ".join(f"{name}: {error}" for name, error in errors)
+        raise NoProviderAvailable(f"tous les fournisseurs de LLM ont échoué ({details})", errors)
+
+    def stream(
+        self,
+        prompt: Prompt,
+        temperature: float = 0.7,
+        max_tokens: int = 150,
+        prefer: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> Iterator[Dict[str, str]]:
+        """
+        Génère une réponse fragment par fragment auprès du fournisseur sain le plus rapide.
+
+        Une erreur ou un timeout avant le premier fragment fait passer au fournisseur
+        suivant ; une fois des fragments relayés, une erreur termine le flux. Un flux
+        n'est pas relancé auprès d'un autre fournisseur (pas de hedging).
+
+        Args:
+            prompt: Le prompt texte ou les messages
+            temperature: La température de génération
+            max_tokens: Le nombre maximal de tokens générés
+            prefer: Le fournisseur à essayer en premier s'il n'est pas mis à l'écart
+            timeout: Délai maximal d'attente de chaque lecture (secondes), sinon celui du client HTTP
+
+        Returns:
+            Un itérateur sur des dictionnaires avec le fragment ("text"), le fournisseur
+            ("provider") et le modèle ("model") qui le produisent
+
+        Raises:
+            NoProviderAvailable: Si aucun fournisseur n'est configuré, ou si tous ont échoué avant le premier fragment
+            StreamError: Si le fournisseur échoue après le premier fragment
+        """
+        candidates = self.ranked(prefer)
+        if not candidates:
+            raise NoProviderAvailable("aucun fournisseur de LLM configuré (clé API absente)")
+
+        errors: List[Tuple[str, Exception]] = []
+        with self._lock:
+            self._counters["requests"] += 1
+        for position, provider in enumerate(candidates):
+            if position:
+                with self._lock:
+                    self._counters["failovers"] += 1
+            start = time.perf_counter()
+            fragments = provider.stream(prompt, temperature, max_tokens, timeout)
+            try:
+                # Jusqu'au premier fragment, un échec laisse la place au fournisseur suivant
+                try:
+                    first = next(fragments, None)
+                except Exception as e:
+                    with self._lock:
+                        self._stats[provider.name].record(False, time.perf_counter() - start, e)
+                    errors.append((provider.name, e))
+                    continue
+                try:
+                    if first is not None:
+                        yield {"text": first, "provider": provider.name, "model": provider.model}
+                    for fragment in fragments:
+                        yield {"text": fragment, "provider": provider.name, "model": provider.model}
+                except Exception as e:
+                    with self._lock:
+                        self._stats[provider.name].record(False, time.perf_counter() - start, e)
+                    if isinstance(e, StreamError):
+                        raise
+                    raise StreamError(f"{provider.name}: {e}") from e
+            finally:
+                # Flux terminé ou abandonné par l'appelant : fermer la réponse du fournisseur
+                fragments.close()
+            with self._lock:
+                self._stats[provider.name].record(True, time.perf_counter() - start)
+            return
+
+        with self._lock:
+            self._counters["failures"] += 1
+        details = "; ".join(f"{name}: {error}" for name, error in errors)
+        raise NoProviderAvailable(f"tous les fournisseurs de LLM ont échoué ({details})", errors)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Récupère les statistiques du routeur et de chaque fournisseur.
+
+        Returns:
+            Les compteurs du routeur ("router") et, par fournisseur ("providers") : appels,
+            erreurs, taux d'erreur et latences (ms) de la fenêtre, état et dernière erreur
+        """
+        now = time.monotonic()
+        with self._lock:
+            providers = {}
+            for name, stats in self._stats.items():
+                p50, p95 = stats.latency(0.5), stats.latency(0.95)
+                providers[name] = {
+                    "model": self.providers[name].model,
+                    "configured": self.providers[name].is_configured(),
+                    "healthy": stats.is_healthy(now),
+                    "requests": stats.requests,
+                    "errors": stats.errors,
+                    "error_rate": round(stats.error_rate(), 3),
+                    "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+                    "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+                    "last_error": stats.last_error,
+                }
+            return {"router": dict(self._counters), "providers": providers}
+
+
+def _configured_key(service: str) -> Optional[str]:
+    """Clé API d'un service : configuration chiffrée, puis variable d'environnement <SERVICE>_API_KEY."""
+    # Import différé : le gestionnaire de configuration lit (et crée) son fichier à l'import
+    from utils.config_manager import config_manager
+    return config_manager.get_api_key(service)
+
+
+def create_default_router(models: Optional[Dict[str, str]] = None, hedge: bool = HEDGE_ENABLED) -> LLMRouter:
+    """
+    Crée un routeur sur les services de PROVIDER_ORDER, avec les clés API de la configuration.
+
+    Args:
+        models: Le modèle à utiliser par service (par défaut DEFAULT_MODELS)
+        hedge: Si True, les requêtes lentes sont relancées auprès d'un autre fournisseur
+
+    Returns:
+        Le routeur (les services sans clé API sont ignorés jusqu'à ce qu'une clé soit définie)
+    """
+    models = {**DEFAULT_MODELS, **(models or {})}
+    providers = []
+    for service in PROVIDER_ORDER:
+        if service not in PROVIDER_CLASSES:
+            print(f"AVERTISSEMENT: fournisseur de LLM inconnu ignoré : {service}")
+            continue
+        providers.append(PROVIDER_CLASSES[service](service, models[service], lambda service=service: _configured_key(service)))
+    return LLMRouter(providers, hedge=hedge)
+
+
+# Routeur partagé des applications (services de PROVIDER_ORDER, clés lues à chaque requête)
+llm_router = create_default_router()
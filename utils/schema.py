@@ -0,0 +1,294 @@
+"""
+Schémas d'entrée des MCPs.
+Un schéma décrit chaque champ de l'entrée (type, obligation, valeur par défaut,
+bornes, valeurs permises) ; il est compilé une fois, au chargement du MCP, en
+une fonction qui valide et convertit une entrée avant toute exécution.
+
+Format d'un champ dans metadata["input_schema"] :
+
+    "max_length": {"type": "int", "description": "...", "default": 200, "min": 1}
+
+Types : "str", "int", "float", "bool", "list", "dict", "any". Options :
+"required", "default", "min"/"max" (nombres), "min_length"/"max_length"
+(chaînes et listes), "enum". L'ancien format texte ("int - description
+(par défaut: 200)") reste accepté.
+"""
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Valeur d'exemple de chaque type (entrée d'exemple de l'interface)
+EXAMPLE_VALUES: Dict[str, Any] = {"str": "", "int": 0, "float": 0.0, "bool": False, "list": [], "dict": {}, "any": None}
+
+# Ancien format texte : "type - description (par défaut: valeur)"
+_LEGACY_RE = re.compile(r"^\s*(\w+)\s*-\s*(.*?)\s*$", re.S)
+_LEGACY_DEFAULT_RE = re.compile(r"\(par défaut\s*:\s*([^)]*)\)")
+
+_TYPE_ALIASES = {
+    "string": "str", "integer": "int", "number": "float", "boolean": "bool",
+    "array": "list", "object": "dict",
+}
+
+_TRUE = {"true", "1", "yes", "oui", "on"}
+_FALSE = {"false", "0", "no", "non", "off"}
+
+
+class SchemaError(ValueError):
+    """Entrée non conforme au schéma du MCP (réponse HTTP 400)."""
+
+    status_code = 400
+
+    def __init__(self, errors: List[str]):
+        """
+        Initialise l'erreur.
+
+        Args:
+            errors: Les erreurs, une par champ
+        """
+        super().__init__("Données d'entrée non valides : " + " ; ".join(errors))
+        self.errors = errors
+
+
+def _coerce_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise TypeError("chaîne attendue")
+
+
+def _coerce_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise TypeError("entier attendu")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            pass
+    raise TypeError("entier attendu")
+
+
+def _coerce_float(value: Any) -> float:
+    if isinstance(value, bool):
+        raise TypeError("nombre attendu")
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value.strip())
+        except ValueError:
+            pass
+    raise TypeError("nombre attendu")
+
+
+def _coerce_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in _TRUE | _FALSE:
+        return value.strip().lower() in _TRUE
+    raise TypeError("booléen attendu")
+
+
+def _expect(kind: type, label: str) -> Callable[[Any], Any]:
+    def coerce(value: Any) -> Any:
+        if not isinstance(value, kind):
+            raise TypeError(f"{label} attendu")
+        return value
+    return coerce
+
+
+_COERCERS: Dict[str, Callable[[Any], Any]] = {
+    "str": _coerce_str,
+    "int": _coerce_int,
+    "float": _coerce_float,
+    "bool": _coerce_bool,
+    "list": _expect(list, "tableau"),
+    "dict": _expect(dict, "objet"),
+    "any": lambda value: value,
+}
+
+
+def _parse_legacy(spec: str) -> Dict[str, Any]:
+    """
+    Convertit un champ décrit dans l'ancien format texte.
+
+    Args:
+        spec: La description ("type - description (par défaut: valeur)")
+
+    Returns:
+        Le champ au format structuré
+    """
+    match = _LEGACY_RE.match(spec)
+    if not match:
+        return {"type": "any", "description": spec}
+    kind, description = match.group(1).lower(), match.group(2)
+    field: Dict[str, Any] = {"type": _TYPE_ALIASES.get(kind, kind if kind in _COERCERS else "any"), "description": description}
+    default = _LEGACY_DEFAULT_RE.search(description)
+    if default:
+        try:
+            field["default"] = _COERCERS[field["type"]](default.group(1).strip())
+        except TypeError:
+            field["default"] = default.group(1).strip()
+    return field
+
+
+def normalize_schema(schema: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    """
+    Met un schéma d'entrée au format structuré (les champs texte sont convertis).
+
+    Args:
+        schema: Le schéma de metadata["input_schema"]
+
+    Returns:
+        Le schéma, un dictionnaire d'options par champ
+
+    Raises:
+        ValueError: Si un champ est mal décrit
+    """
+    if not isinstance(schema, dict):
+        raise ValueError("input_schema doit être un objet")
+    fields = {}
+    for name, spec in schema.items():
+        field = _parse_legacy(spec) if isinstance(spec, str) else dict(spec) if isinstance(spec, dict) else None
+        if field is None:
+            raise ValueError(f"champ '{name}' : description non valide")
+        field["type"] = _TYPE_ALIASES.get(field.get("type", "any"), field.get("type", "any"))
+        if field["type"] not in _COERCERS:
+            raise ValueError(f"champ '{name}' : type '{field['type']}' inconnu")
+        fields[name] = field
+    return fields
+
+
+def _compile_field(field: Dict[str, Any]) -> Callable[[Any], Any]:
+    """
+    Compile la validation d'un champ en une suite de vérifications.
+
+    Args:
+        field: Les options du champ
+
+    Returns:
+        La fonction qui convertit et vérifie une valeur (TypeError ou ValueError si elle n'est pas valide)
+    """
+    coerce = _COERCERS[field["type"]]
+    checks: List[Callable[[Any], Optional[str]]] = []
+    if "min" in field:
+        checks.append(lambda v, low=field["min"]: f"doit être supérieur ou égal à {low}" if v < low else None)
+    if "max" in field:
+        checks.append(lambda v, high=field["max"]: f"doit être inférieur ou égal à {high}" if v > high else None)
+    unit = "caractère(s)" if field["type"] == "str" else "élément(s)"
+    if "min_length" in field:
+        checks.append(lambda v, low=field["min_length"]: f"doit contenir au moins {low} {unit}" if len(v) < low else None)
+    if "max_length" in field:
+        checks.append(lambda v, high=field["max_length"]: f"doit contenir au plus {high} {unit}" if len(v) > high else None)
+    if "enum" in field:
+        allowed = frozenset(field["enum"])
+        label = ", ".join(map(str, field["enum"]))
+        checks.append(lambda v: f"doit valoir l'une des valeurs : {label}" if v not in allowed else None)
+
+    if not checks:
+        return coerce
+
+    def validate(value: Any) -> Any:
+        value = coerce(value)
+        for check in checks:
+            error = check(value)
+            if error:
+                raise ValueError(error)
+        return value
+
+    return validate
+
+
+def compile_schema(schema: Dict[str, Any]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Compile un schéma d'entrée en une fonction de validation.
+
+    Args:
+        schema: Le schéma de metadata["input_schema"]
+
+    Returns:
+        La fonction qui reçoit une entrée et retourne une copie convertie, complétée
+        des valeurs par défaut (les champs hors schéma sont conservés)
+
+    Raises:
+        ValueError: Si le schéma est mal décrit
+    """
+    fields = normalize_schema(schema)
+    compiled: List[Tuple[str, Callable[[Any], Any], bool, bool, Any]] = [
+        (name, _compile_field(field), bool(field.get("required", False)), "default" in field, field.get("default"))
+        for name, field in fields.items()
+    ]
+
+    def validate(input_data: Dict[str, Any]) -> Dict[str, Any]:
+        if not isinstance(input_data, dict):
+            raise SchemaError(["l'entrée doit être un objet JSON"])
+        data = dict(input_data)
+        errors = []
+        for name, check, required, has_default, default in compiled:
+            value = data.get(name)
+            if value is None:
+                if required:
+                    errors.append(f"{name} : champ obligatoire")
+                elif has_default:
+                    data[name] = default
+                continue
+            try:
+                data[name] = check(value)
+            except (TypeError, ValueError) as e:
+                errors.append(f"{name} : {e}")
+        if errors:
+            raise SchemaError(errors)
+        return data
+
+    return validate
+
+
+def example_input(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Construit une entrée d'exemple à partir d'un schéma (valeur par défaut, première valeur permise ou valeur type).
+
+    Args:
+        schema: Le schéma de metadata["input_schema"]
+
+    Returns:
+        L'entrée d'exemple
+    """
+    example = {}
+    for name, field in normalize_schema(schema).items():
+        if "default" in field:
+            example[name] = field["default"]
+        elif field.get("enum"):
+            example[name] = field["enum"][0]
+        else:
+            value = EXAMPLE_VALUES[field["type"]]
+            example[name] = max(value, field["min"]) if "min" in field and isinstance(value, (int, float)) else value
+    return example
+
+
+def describe_schema(schema: Dict[str, Any]) -> List[str]:
+    """
+    Décrit chaque champ d'un schéma en une ligne (affichage dans l'interface).
+
+    Args:
+        schema: Le schéma de metadata["input_schema"]
+
+    Returns:
+        Une ligne par champ
+    """
+    lines = []
+    for name, field in normalize_schema(schema).items():
+        details = [field["type"]]
+        if field.get("required"):
+            details.append("obligatoire")
+        if "default" in field:
+            details.append(f"par défaut: {field['default']}")
+        if field.get("enum"):
+            details.append("valeurs: " + ", ".join(map(str, field["enum"])))
+        description = field.get("description", "")
+        lines.append(f"- {name} ({', '.join(details)}){': ' + description if description else ''}")
+    return lines
@@ -0,0 +1,391 @@
+"""
+Serveur HTTP de l'interface cyberpunk.
+Une instance unique par port, avec démarrage/arrêt explicites et une attente
+bloquante qui ne consomme pas de CPU. Les fichiers statiques sont servis
+depuis un cache mémoire, avec variantes gzip/brotli précalculées, ETag et
+en-têtes de cache, sans changer le répertoire de travail du processus.
+"""
+import errno
+import gzip
+import hashlib
+import http.server
+import mimetypes
+import os
+import socket
+import socketserver
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs, urlsplit
+
+# brotli est optionnel : sans lui, seule la variante gzip est proposée
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Durée de cache des ressources versionnées (?v=<empreinte>) : un an
+IMMUTABLE_MAX_AGE = 31536000
+
+
+class StaticAsset:
+    """Fichier statique chargé en mémoire avec ses variantes compressées."""
+
+    def __init__(self, name: str, body: bytes, mtime: float):
+        """
+        Initialise la ressource et précalcule ses variantes.
+
+        Args:
+            name: Le nom du fichier
+            body: Le contenu du fichier
+            mtime: La date de modification du fichier
+        """
+        self.name = name
+        self.mtime = mtime
+        self.content_type = mimetypes.guess_type(name)[0] or "application/octet-stream"
+        if self.content_type.startswith("text/"):
+            self.content_type += "; charset=utf-8"
+        self.version = hashlib.sha256(body).hexdigest()[:16]
+        # Encodage -> contenu ; une variante n'est gardée que si elle est plus petite
+        self.variants: Dict[str, bytes] = {"identity": body}
+        compressed = gzip.compress(body, compresslevel=9, mtime=0)
+        if len(compressed) < len(body):
+            self.variants["gzip"] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=11)
+            if len(compressed) < len(body):
+                self.variants["br"] = compressed
+        # Un ETag par représentation, puisque la réponse varie selon Accept-Encoding
+        self.etags = {
+            encoding: f'"{self.version}"' if encoding == "identity" else f'"{self.version}-{encoding}"'
+            for encoding in self.variants
+        }
+
+    def matches(self, if_none_match: str) -> bool:
+        """
+        Indique si l'en-tête If-None-Match désigne la version courante.
+
+        Args:
+            if_none_match: La valeur de l'en-tête If-None-Match
+
+        Returns:
+            True si le client possède déjà cette version
+        """
+        if if_none_match.strip() == "*":
+            return True
+        known = set(self.etags.values())
+        # Les proxys qui recompressent transforment les ETags en ETags faibles (W/"...")
+        return any(tag.strip().removeprefix("W/") in known for tag in if_none_match.split(","))
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """
+        Choisit l'encodage à servir selon l'en-tête Accept-Encoding.
+
+        Args:
+            accept_encoding: La valeur de l'en-tête Accept-Encoding
+
+        Returns:
+            L'encodage retenu ("br", "gzip" ou "identity")
+        """
+        accepted = set()
+        for part in accept_encoding.split(","):
+            token, _, params = part.strip().partition(";")
+            if params.replace(" ", "") in ("q=0", "q=0.0"):
+                continue
+            accepted.add(token.strip().lower())
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and (encoding in accepted or "*" in accepted):
+                return encoding
+        return "identity"
+
+
+class StaticAssetCache:
+    """Cache mémoire d'une liste fixe de fichiers statiques, rechargés quand ils changent."""
+
+    def __init__(self, directory: str, names: List[str], index: str = "index.html", check_interval: float = 1.0):
+        """
+        Initialise le cache et charge les fichiers.
+
+        Args:
+            directory: Le répertoire contenant les fichiers
+            names: Les noms des fichiers servis (tout autre chemin renvoie 404)
+            index: Le fichier servi pour "/"
+            check_interval: Intervalle minimal entre deux vérifications des dates de modification (secondes)
+        """
+        self.directory = os.path.abspath(directory)
+        self.names = list(names)
+        self.index = index
+        self.check_interval = check_interval
+        self._assets: Dict[str, StaticAsset] = {}
+        self._mtimes: Dict[str, float] = {}
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, path: str) -> Optional[StaticAsset]:
+        """
+        Récupère une ressource par son chemin d'URL.
+
+        Args:
+            path: Le chemin demandé (ex: "/", "/main.css")
+
+        Returns:
+            La ressource, ou None si elle n'est pas servie
+        """
+        name = path.lstrip("/") or self.index
+        now = time.monotonic()
+        if now - self._last_check >= self.check_interval:
+            with self._lock:
+                if now - self._last_check >= self.check_interval:
+                    self._last_check = now
+                    if self._current_mtimes() != self._mtimes:
+                        self._load()
+        return self._assets.get(name)
+
+    def _current_mtimes(self) -> Dict[str, float]:
+        """Dates de modification actuelles des fichiers servis."""
+        mtimes = {}
+        for name in self.names:
+            try:
+                mtimes[name] = os.stat(os.path.join(self.directory, name)).st_mtime
+            except OSError:
+                pass
+        return mtimes
+
+    def _load(self) -> None:
+        """(Re)charge tous les fichiers et versionne les références entre eux."""
+        raw = {}
+        mtimes = self._current_mtimes()
+        for name in mtimes:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                raw[name] = f.read()
+
+        # Les feuilles de style sont chargées d'abord pour connaître leur empreinte
+        assets = {}
+        for name, body in raw.items():
+            if not name.endswith(".html"):
+                assets[name] = StaticAsset(name, body, mtimes[name])
+        for name, body in raw.items():
+            if name.endswith(".html"):
+                # Référencer les ressources avec leur empreinte (?v=...) permet de les
+                # mettre en cache longtemps côté navigateur sans risque de version périmée
+                for asset in assets.values():
+                    reference = f'"{asset.name}"'.encode()
+                    body = body.replace(reference, f'"{asset.name}?v={asset.version}"'.encode())
+                assets[name] = StaticAsset(name, body, mtimes[name])
+
+        self._assets = assets
+        self._mtimes = mtimes
+
+
+class StaticFileHandler(http.server.BaseHTTPRequestHandler):
+    """Sert les fichiers d'un StaticAssetCache en HTTP/1.1 avec compression et validation ETag."""
+
+    protocol_version = "HTTP/1.1"
+    # Envoi immédiat des petites réponses (en-têtes et corps sont écrits séparément)
+    disable_nagle_algorithm = True
+
+    def __init__(self, *args: Any, assets: StaticAssetCache, **kwargs: Any):
+        self.assets = assets
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        self.send_asset(include_body=True)
+
+    def do_HEAD(self):
+        self.send_asset(include_body=False)
+
+    def send_asset(self, include_body: bool) -> None:
+        """
+        Envoie une ressource statique (ou 304 si la version du client est à jour).
+
+        Args:
+            include_body: False pour une requête HEAD
+        """
+        url = urlsplit(self.path)
+        asset = self.assets.get(url.path)
+        if asset is None:
+            self.send_error(404, "Fichier non trouvé")
+            return
+
+        # Ressource demandée avec son empreinte courante : cacheable indéfiniment
+        if parse_qs(url.query).get("v") == [asset.version]:
+            cache_control = f"public, max-age={IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            cache_control = "no-cache"
+
+        encoding = asset.negotiate(self.headers.get("Accept-Encoding", ""))
+        if asset.matches(self.headers.get("If-None-Match", "")):
+            self.send_response(304)
+            self.send_header("ETag", asset.etags[encoding])
+            self.send_header("Cache-Control", cache_control)
+            self.send_header("Vary", "Accept-Encoding")
+            self.end_headers()
+            return
+
+        body = asset.variants[encoding]
+        self.send_response(200)
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding != "identity":
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("ETag", asset.etags[encoding])
+        self.send_header("Cache-Control", cache_control)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Last-Modified", self.date_time_string(asset.mtime))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Supprimer les logs pour éviter de polluer la console
+        pass
+
+
+class UIServer:
+    """Serveur HTTP de l'interface, géré comme un singleton par port."""
+
+    _instances: Dict[int, "UIServer"] = {}
+    _instances_lock = threading.Lock()
+
+    def __init__(self, port: int, handler: Callable[..., Any], host: str = "0.0.0.0"):
+        """
+        Initialise le serveur (sans le démarrer).
+
+        Args:
+            port: Le port d'écoute
+            handler: La classe de gestionnaire de requêtes HTTP
+            host: L'adresse d'écoute
+        """
+        self.port = port
+        self.host = host
+        self.handler = handler
+        self.error: Optional[str] = None
+        self._httpd: Optional[socketserver.ThreadingTCPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._stopped.set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def get_instance(cls, port: int, handler: Callable[..., Any], host: str = "0.0.0.0") -> "UIServer":
+        """
+        Récupère le serveur associé à un port, en le créant si nécessaire.
+
+        Args:
+            port: Le port d'écoute
+            handler: La classe de gestionnaire de requêtes HTTP
+            host: L'adresse d'écoute
+
+        Returns:
+            L'instance unique pour ce port
+        """
+        with cls._instances_lock:
+            instance = cls._instances.get(port)
+            if instance is None:
+                instance = cls(port, handler, host)
+                cls._instances[port] = instance
+            return instance
+
+    @property
+    def is_running(self) -> bool:
+        """Indique si le serveur est en cours d'exécution."""
+        return not self._stopped.is_set()
+
+    def start(self) -> bool:
+        """
+        Démarre le serveur dans un thread d'arrière-plan.
+        Sans effet si le serveur tourne déjà.
+
+        Returns:
+            True si le serveur est en cours d'exécution après l'appel,
+            False si le port est occupé par un autre processus
+        """
+        with self._lock:
+            if self.is_running:
+                return True
+
+            httpd = socketserver.ThreadingTCPServer((self.host, self.port), self.handler, bind_and_activate=False)
+            httpd.allow_reuse_address = True
+            # Un thread par connexion : un flux en cours ne bloque pas les autres requêtes
+            httpd.daemon_threads = True
+            try:
+                httpd.server_bind()
+                httpd.server_activate()
+            except OSError as e:
+                httpd.server_close()
+                if e.errno == errno.EADDRINUSE:
+                    self.error = f"Le port {self.port} est déjà utilisé par un autre processus"
+                else:
+                    self.error = str(e)
+                return False
+
+            self.error = None
+            self._httpd = httpd
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._serve, name=f"ui-server-{self.port}", daemon=True)
+            self._thread.start()
+            print(f"Serveur démarré sur le port {self.port}")
+            return True
+
+    def _serve(self) -> None:
+        """Boucle de service du thread d'arrière-plan."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._stopped.set()
+
+    def stop(self) -> None:
+        """Arrête le serveur et libère le port."""
+        with self._lock:
+            if not self.is_running:
+                return
+            self._httpd.shutdown()
+            self._httpd.server_close()
+            self._thread.join()
+            self._httpd = None
+            self._thread = None
+            print(f"Serveur arrêté sur le port {self.port}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Bloque jusqu'à l'arrêt du serveur, sans consommer de CPU.
+
+        Args:
+            timeout: Délai maximal d'attente en secondes (None pour attendre indéfiniment)
+
+        Returns:
+            True si le serveur est arrêté
+        """
+        return self._stopped.wait(timeout)
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Décrit l'état du serveur.
+
+        Returns:
+            Un dictionnaire avec l'état ("running", "port_in_use" ou "stopped"), le port et l'erreur éventuelle
+        """
+        if self.is_running:
+            state = "running"
+        elif is_port_in_use(self.port):
+            state = "port_in_use"
+        else:
+            state = "stopped"
+        return {"state": state, "port": self.port, "error": self.error}
+
+
+def is_port_in_use(port: int, host: str = "127.0.0.1") -> bool:
+    """
+    Indique si un port local accepte déjà des connexions.
+
+    Args:
+        port: Le port à tester
+        host: L'adresse à tester
+
+    Returns:
+        True si un serveur écoute sur ce port
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.settimeout(0.5)
+        return sock.connect_ex((host, port)) == 0
@@ -0,0 +1,331 @@
+"""
+Résumé extractif : découpage en phrases, similarité TF-IDF et classement TextRank.
+Les phrases sont représentées par une matrice creuse phrases-termes (TF-IDF,
+lignes normalisées) stockée en coordonnées ; le graphe de similarité cosinus
+S = X·Xᵀ n'est jamais construit : chaque itération de la méthode de la
+puissance calcule S·v = X·(Xᵀ·v) avec np.bincount, en O(nombre de mots).
+La mémoire et le temps restent linéaires en la taille du document.
+"""
+import re
+from itertools import chain
+from typing import AsyncIterable, AsyncIterator, Iterable, Iterator, List, Optional, Tuple
+
+from utils.lexicon import tokenize
+
+# NumPy est optionnel : sans lui, seul le mode "lead" est disponible
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Modes de sélection des phrases
+MODES = ("lead", "textrank")
+
+# Fin de phrase : ponctuation finale (et guillemet ou parenthèse fermants) suivie d'un espace, ou ligne vide
+_BOUNDARY_RE = re.compile(r"[.!?…]+(?:\s?[\"'»)\]])*(?=\s|$)|\n\s*\n")
+
+# Abréviations courantes : le point qui les suit ne termine pas la phrase (une initiale aussi)
+ABBREVIATIONS = frozenset(
+    "m mm mme mmes mlle dr pr me st ste etc cf ex env p pp vol no art "
+    "mr mrs ms prof sr jr vs fig eg ie inc ltd co dept approx".split()
+)
+_LAST_WORD_RE = re.compile(r"\b(\w{1,8})\.$")
+
+# Facteur d'amortissement de TextRank et critère d'arrêt de la méthode de la puissance
+DAMPING = 0.85
+MAX_ITERATIONS = 100
+TOLERANCE = 1e-6
+
+
+def iter_sentences(text: str) -> Iterator[str]:
+    """
+    Découpe un texte en phrases au fur et à mesure (espaces internes normalisés).
+
+    Args:
+        text: Le texte
+
+    Returns:
+        Un itérateur sur les phrases, dans l'ordre du texte
+    """
+    pending = ""
+    start = 0
+    for boundary in chain(_BOUNDARY_RE.finditer(text), (None,)):
+        end = boundary.end() if boundary else len(text)
+        sentence = " ".join(text[start:end].split())
+        start = end
+        if not sentence:
+            continue
+        if pending:
+            sentence = pending + " " + sentence
+        # Seule la fin de la phrase est examinée (les abréviations sont courtes)
+        last_word = _LAST_WORD_RE.search(sentence, max(len(sentence) - 10, 0)) if boundary and sentence[-1] == "." else None
+        if last_word and (last_word.group(1).lower() in ABBREVIATIONS or len(last_word.group(1)) == 1 and last_word.group(1).isupper()):
+            pending = sentence
+            continue
+        pending = ""
+        yield sentence
+    if pending:
+        yield pending
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Découpe un texte en phrases (espaces internes normalisés).
+
+    Args:
+        text: Le texte
+
+    Returns:
+        Les phrases, dans l'ordre du texte
+    """
+    return list(iter_sentences(text))
+
+
+def _term_matrix(sentences: List[str]) -> Tuple["np.ndarray", "np.ndarray", "np.ndarray", int]:
+    """
+    Construit la matrice TF-IDF creuse des phrases, lignes normalisées (norme L2).
+
+    Args:
+        sentences: Les phrases
+
+    Returns:
+        Le quadruplet (lignes, colonnes, valeurs, nombre de termes) des coefficients non nuls
+    """
+    vocabulary = {}
+    index = vocabulary.setdefault
+    documents = [[index(token, len(vocabulary)) for token in tokenize(sentence)] for sentence in sentences]
+    lengths = np.fromiter(map(len, documents), dtype=np.int64, count=len(documents))
+    columns = np.fromiter((column for document in documents for column in document), dtype=np.int64, count=int(lengths.sum()))
+    rows = np.repeat(np.arange(len(documents)), lengths)
+    terms = len(vocabulary)
+
+    # Fréquences des couples (phrase, terme), puis TF sous-linéaire et IDF lissé
+    pairs, counts = np.unique(rows * max(terms, 1) + columns, return_counts=True)
+    rows, columns = pairs // max(terms, 1), pairs % max(terms, 1)
+    document_frequency = np.bincount(columns, minlength=terms)
+    idf = np.log((1 + len(sentences)) / (1 + document_frequency)) + 1.0
+    values = (1.0 + np.log(counts)) * idf[columns]
+
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(sentences)))
+    values = values / norms[rows]
+    return rows, columns, values, terms
+
+
+def textrank_scores(sentences: List[str], damping: float = DAMPING) -> "np.ndarray":
+    """
+    Calcule l'importance de chaque phrase avec TextRank (variante continue de LexRank) :
+    marche aléatoire sur le graphe des similarités cosinus TF-IDF entre phrases.
+
+    Args:
+        sentences: Les phrases
+        damping: Le facteur d'amortissement
+
+    Returns:
+        Le score de chaque phrase (leur somme vaut 1)
+
+    Raises:
+        RuntimeError: Si NumPy n'est pas installé
+    """
+    if np is None:
+        raise RuntimeError("NumPy est requis pour le mode textrank")
+    count = len(sentences)
+    if count == 0:
+        return np.zeros(0)
+    rows, columns, values, terms = _term_matrix(sentences)
+
+    def similarity_product(vector):
+        # S·v = X·(Xᵀ·v), sans construire S (count x count)
+        projected = np.bincount(columns, weights=values * vector[rows], minlength=terms)
+        return np.bincount(rows, weights=values * projected[columns], minlength=count)
+
+    # La diagonale de S (similarité d'une phrase avec elle-même) est exclue du graphe
+    diagonal = np.bincount(rows, weights=values * values, minlength=count)
+    degrees = similarity_product(np.ones(count)) - diagonal
+    connected = degrees > 1e-12
+    inverse_degrees = np.where(connected, 1.0 / np.where(connected, degrees, 1.0), 0.0)
+
+    scores = np.full(count, 1.0 / count)
+    for _ in range(MAX_ITERATIONS):
+        weighted = scores * inverse_degrees
+        # Les phrases isolées (sans mot commun) redistribuent leur score uniformément
+        dangling = scores[~connected].sum()
+        updated = (1.0 - damping) / count + damping * (similarity_product(weighted) - weighted * diagonal + dangling / count)
+        converged = np.abs(updated - scores).sum() < TOLERANCE
+        scores = updated
+        if converged:
+            break
+    return scores
+
+
+def _fit(sentence: str, budget: int) -> str:
+    """Tronque une phrase à la fin d'un mot pour tenir dans le budget (points de suspension compris)."""
+    if len(sentence) <= budget:
+        return sentence
+    cut = sentence[:max(budget - 1, 0)]
+    if " " in cut:
+        cut = cut[:cut.rindex(" ")]
+    return cut.rstrip(" ,;:") + "…" if budget > 1 else sentence[:budget]
+
+
+def lead_sentences(sentences: Iterable[str], max_length: int) -> List[str]:
+    """
+    Garde les premières phrases tant qu'elles tiennent dans la limite de longueur.
+    Les phrases sont consommées à la demande : la suite du texte n'est pas découpée.
+
+    Args:
+        sentences: Les phrases, dans l'ordre du texte
+        max_length: La longueur maximale du résumé (phrases séparées par une espace)
+
+    Returns:
+        Les phrases retenues
+    """
+    selected = []
+    used = 0
+    for sentence in sentences:
+        cost = len(sentence) + (1 if selected else 0)
+        if used + cost > max_length:
+            break
+        selected.append(sentence)
+        used += cost
+    return selected
+
+
+def select_sentences(sentences: List[str], scores: "np.ndarray", max_length: int) -> List[int]:
+    """
+    Choisit les phrases du résumé par score décroissant : chacune est gardée si elle tient
+    dans la longueur restante (une seule fois si elle est répétée dans le texte).
+
+    Args:
+        sentences: Les phrases
+        scores: Le score de chaque phrase
+        max_length: La longueur maximale du résumé (phrases séparées par une espace)
+
+    Returns:
+        Les index des phrases retenues, dans l'ordre du texte
+    """
+    selected = []
+    seen = set()
+    used = 0
+    for index in np.argsort(-scores, kind="stable").tolist():
+        sentence = sentences[index]
+        cost = len(sentence) + (1 if selected else 0)
+        if used + cost <= max_length and sentence not in seen:
+            seen.add(sentence)
+            selected.append(index)
+            used += cost
+    return sorted(selected)
+
+
+def summarize(text: str, max_length: int, mode: str = "textrank") -> str:
+    """
+    Résume un texte en extrayant ses phrases les plus représentatives.
+
+    Args:
+        text: Le texte
+        max_length: La longueur maximale du résumé en caractères
+        mode: "lead" (premières phrases) ou "textrank" (phrases les plus centrales)
+
+    Returns:
+        Le résumé (phrases dans l'ordre du texte) ; si aucune phrase ne tient, la meilleure est tronquée
+
+    Raises:
+        ValueError: Si le mode est inconnu
+        RuntimeError: Si le mode textrank est demandé sans NumPy
+    """
+    if mode not in MODES:
+        raise ValueError(f"mode de résumé inconnu : {mode}")
+
+    if mode == "lead":
+        sentences = iter_sentences(text)
+        first = next(sentences, None)
+        if first is None:
+            return ""
+        selected = lead_sentences(chain((first,), sentences), max_length)
+        return " ".join(selected) if selected else _fit(first, max_length)
+
+    sentences = split_sentences(text)
+    if len(sentences) <= 1:
+        return _fit(sentences[0], max_length) if sentences else ""
+    scores = textrank_scores(sentences)
+    selected = select_sentences(sentences, scores, max_length)
+    if not selected:
+        return _fit(sentences[int(np.argmax(scores))], max_length)
+    return " ".join(sentences[index] for index in selected)
+
+
+def _chunk_end(buffer: str, chunk_size: int) -> int:
+    """Position de coupe d'un tampon plein : après la dernière fin de phrase, sinon le dernier espace, de la seconde moitié du morceau."""
+    end = 0
+    for boundary in _BOUNDARY_RE.finditer(buffer, chunk_size // 2, chunk_size):
+        end = boundary.end()
+    if end:
+        return end
+    space = max(buffer.rfind(" ", chunk_size // 2, chunk_size), buffer.rfind("\n", chunk_size // 2, chunk_size))
+    return space + 1 if space > 0 else chunk_size
+
+
+class _ChunkBuffer:
+    """Tampon de découpage d'un texte reçu par fragments en morceaux d'environ `chunk_size` caractères."""
+
+    def __init__(self, chunk_size: int):
+        self.chunk_size = chunk_size
+        self.parts: List[str] = []
+        self.size = 0
+
+    def feed(self, piece: str) -> List[str]:
+        """Ajoute un fragment et retourne les morceaux complets."""
+        self.parts.append(piece)
+        self.size += len(piece)
+        if self.size < self.chunk_size:
+            return []
+        buffer = "".join(self.parts)
+        chunks = []
+        while len(buffer) >= self.chunk_size:
+            end = _chunk_end(buffer, self.chunk_size)
+            chunks.append(buffer[:end])
+            buffer = buffer[end:]
+        self.parts, self.size = [buffer], len(buffer)
+        return [chunk for chunk in chunks if not chunk.isspace()]
+
+    def flush(self) -> List[str]:
+        """Retourne le dernier morceau (incomplet)."""
+        buffer = "".join(self.parts)
+        self.parts, self.size = [], 0
+        return [buffer] if buffer and not buffer.isspace() else []
+
+
+def iter_chunks(pieces: Iterable[str], chunk_size: int) -> Iterator[str]:
+    """
+    Regroupe les fragments d'un texte en morceaux d'au plus `chunk_size` caractères,
+    coupés de préférence en fin de phrase. Seul le morceau en cours est gardé en mémoire.
+
+    Args:
+        pieces: Les fragments du texte, dans l'ordre (par exemple les blocs lus d'un fichier)
+        chunk_size: La taille maximale d'un morceau en caractères
+
+    Returns:
+        Un itérateur sur les morceaux
+    """
+    buffer = _ChunkBuffer(chunk_size)
+    for piece in pieces:
+        yield from buffer.feed(piece)
+    yield from buffer.flush()
+
+
+async def aiter_chunks(pieces: AsyncIterable[str], chunk_size: int) -> AsyncIterator[str]:
+    """
+    Version asynchrone de iter_chunks.
+
+    Args:
+        pieces: Les fragments du texte, dans l'ordre
+        chunk_size: La taille maximale d'un morceau en caractères
+
+    Returns:
+        Un itérateur asynchrone sur les morceaux
+    """
+    buffer = _ChunkBuffer(chunk_size)
+    async for piece in pieces:
+        for chunk in buffer.feed(piece):
+            yield chunk
+    for chunk in buffer.flush():
+        yield chunk